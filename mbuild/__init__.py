@@ -2,6 +2,7 @@ from mbuild.box import Box
 from mbuild.coarse_graining import coarse_grain
 from mbuild.coordinate_transform import *
 from mbuild.compound import *
+from mbuild.flat_system import FlatSystem
 from mbuild.pattern import *
 from mbuild.packing import *
 from mbuild.port import Port
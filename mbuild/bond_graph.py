@@ -1,44 +1,9 @@
-"""
-NOTE: The functions 'connected_components' and '_bfs' have been 
-obtained (with modifications) from the Networkx Python package, 
-which is distributed under the following BSD license:
-
-Copyright (C) 2004-2016, NetworkX Developers
-Aric Hagberg <hagberg@lanl.gov>
-Dan Schult <dschult@colgate.edu>
-Pieter Swart <swart@lanl.gov>
-All rights reserved.
-
-Redistribution and use in source and binary forms, with or without
-modification, are permitted provided that the following conditions are
-met:
-
- * Redistributions of source code must retain the above copyright
-   notice, this list of conditions and the following disclaimer.
-
- * Redistributions in binary form must reproduce the above
-   copyright notice, this list of conditions and the following
-   disclaimer in the documentation and/or other materials provided
-   with the distribution.
-
- * Neither the name of the NetworkX Developers nor the names of its
-   contributors may be used to endorse or promote products derived
-   from this software without specific prior written permission.
-
-THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
-"AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
-LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
-A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
-OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
-SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
-LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
-DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
-THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
-(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
-OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
-"""
-
 from collections import defaultdict
+from itertools import chain
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
 
 
 class BondGraph(object):
@@ -47,120 +12,370 @@ class BondGraph(object):
     `BondGraph` is designed to mimic the API and partial functionality of
      NetworkX's `Graph` data structure.
 
+    Every node is assigned an integer index when it first enters the graph
+    and bonds are stored as pairs of these indices. The bulk of the
+    adjacency lives in compressed sparse row (CSR) arrays; bonds added or
+    removed since the last compaction are kept in small pending tables and
+    folded into the arrays once they make up a sizeable fraction of the
+    graph. The node-based methods are a thin view on top of this, while the
+    index-based methods (`node_indices`, `neighbor_indices`, `edge_array`,
+    `degree_array`) expose the arrays for vectorized work. A node keeps its
+    index until the slots of removed nodes are reclaimed, which renumbers
+    the remaining nodes in order and advances the version.
+
     """
+    # Pending edits are compacted once they exceed `_min_pending` or
+    # `_pending_fraction` of the compacted bonds, whichever is larger.
+    _min_pending = 1024
+    _pending_fraction = 0.25
+    # The slots of removed nodes are reclaimed once they exceed `_min_dead`
+    # or `_dead_fraction` of all slots, whichever is larger.
+    _min_dead = 64
+    _dead_fraction = 0.5
+
     def __init__(self):
-        self._adj = defaultdict(set)
+        self._nodes = []
+        self._node_index = dict()
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+        self._added = defaultdict(set)
+        self._removed = defaultdict(set)
+        self._n_pending = 0
+        self._n_dead = 0
+        self._n_edges = 0
+        # Incremented on every change to the bonds, so that lookups derived
+        # from them can tell when they are stale.
+        self._version = 0
+
+    def __getstate__(self):
+        # Only the nodes and the compacted arrays are pickled; the node
+        # lookup is rebuilt from the nodes.
+        self._compact()
+        return dict(nodes=self._nodes, indptr=self._indptr,
+                    indices=self._indices, n_edges=self._n_edges)
+
+    def __setstate__(self, state):
+        self.__init__()
+        self._nodes = state['nodes']
+        self._node_index = {node: idx for idx, node in enumerate(self._nodes)
+                            if node is not None}
+        self._n_dead = len(self._nodes) - len(self._node_index)
+        self._indptr = state['indptr']
+        self._indices = state['indices']
+        self._n_edges = state['n_edges']
 
     def add_node(self, node):
-        if not self.has_node(node):
-            self._adj[node] = set()
+        self._get_or_add_index(node)
 
     def remove_node(self, node):
-        adj = self._adj
-        for other_node in self.nodes():
-            if node in adj[other_node]:
-                self.remove_edge(node, other_node)
+        idx = self._node_index.get(node)
+        if idx is None:
+            return
+        for neighbor in self.neighbor_indices(idx).tolist():
+            self._remove_edge_index(idx, neighbor)
+        if node in self._node_index:
+            self._drop_index(idx)
+        self._maybe_compact()
 
     def has_node(self, node):
-        return node in self._adj
+        return node in self._node_index
 
     def nodes(self):
-        return [node for node in self._adj]
+        return [node for node in self._node_index]
 
     def nodes_iter(self):
-        for node in self._adj:
+        for node in self._node_index:
             yield node
 
     def number_of_nodes(self):
-        return sum(1 for _ in self.nodes_iter())
+        return len(self._node_index)
 
     def add_edge(self, node1, node2):
-        self._adj[node1].add(node2)
-        self._adj[node2].add(node1)
+        self._add_edge_index(self._get_or_add_index(node1),
+                             self._get_or_add_index(node2))
+        self._maybe_compact()
 
     def remove_edge(self, node1, node2):
-        adj = self._adj
-        if self.has_node(node1) and self.has_node(node2):
-            adj[node1].remove(node2)
-            adj[node2].remove(node1)
-            if not adj[node1]:
-                del adj[node1]
-            if not adj[node2]:
-                del adj[node2]
-        else:
+        if not self.has_edge(node1, node2):
             raise ValueError('There is no edge between {} and {}'.format(
                 node1, node2))
+        self._remove_edge_index(self._node_index[node1],
+                                self._node_index[node2])
+        self._maybe_compact()
 
     def has_edge(self, node1, node2):
-        if self.has_node(node1):
-            return node2 in self._adj[node1]
+        if self.has_node(node1) and self.has_node(node2):
+            return self._has_edge_index(self._node_index[node1],
+                                        self._node_index[node2])
+        return False
 
     def edges(self):
-        edges = set()
-        for node, neighbors in self._adj.items():
-            for neighbor in neighbors:
-                bond = (node, neighbor) if id(node) < id(neighbor) else (neighbor, node)
-                edges.add(bond)
-        return list(edges)
+        nodes = self._nodes
+        return [(nodes[i], nodes[j]) for i, j in self.edge_array().tolist()]
 
     def edges_iter(self):
         for edge in self.edges():
             yield edge
 
     def number_of_edges(self):
-        return sum(1 for _ in self.edges())
+        return self._n_edges
 
     def neighbors(self, node):
         if self.has_node(node):
-            return [neighbor for neighbor in self._adj[node]]
+            nodes = self._nodes
+            return [nodes[idx] for idx in
+                    self.neighbor_indices(self._node_index[node]).tolist()]
         else:
             return []
 
     def neighbors_iter(self, node):
-        if self.has_node(node):
-            return (neighbor for neighbor in self._adj[node])
-        else:
-            return iter(())
+        return iter(self.neighbors(node))
 
     def compose(self, graph):
-        adj = self._adj
-        for node, neighbors in graph._adj.items():
-            if self.has_node(node):
-                adj[node].union(neighbors)
-            elif neighbors:
-                adj[node] = neighbors
+        if graph is self:
+            return
+        self._add_edge_array(graph._nodes, graph.edge_array())
 
     def subgraph(self, nodes):
         new_graph = BondGraph()
         nodes = list(nodes)
-        adj = self._adj
-        for node in nodes:
-            if node not in adj:
-                continue
-            for neighbor in adj[node]:
-                if neighbor in nodes:
-                    new_graph.add_edge(node, neighbor)
+        new_graph._add_edge_array(nodes, self.edge_array(nodes))
         return new_graph
 
+    def copy(self, mapping=None):
+        """Return a copy of the graph, optionally relabeling its nodes.
+
+        The compacted bond arrays are shared with the copy instead of being
+        duplicated. They are never modified in place, so this is safe and
+        makes copying even very large graphs cheap.
+
+        Parameters
+        ----------
+        mapping : dict or sequence, optional
+            If given, every node `node` is replaced by `mapping[node]` in the
+            copy.
+
+        """
+        self._compact()
+        graph = BondGraph()
+        if mapping is None:
+            graph._nodes = list(self._nodes)
+        else:
+            graph._nodes = [None if node is None else mapping[node]
+                            for node in self._nodes]
+        graph._node_index = {node: idx for idx, node in enumerate(graph._nodes)
+                             if node is not None}
+        graph._n_dead = self._n_dead
+        graph._indptr = self._indptr
+        graph._indices = self._indices
+        graph._n_edges = self._n_edges
+        return graph
+
     def connected_components(self):
-        seen = set()
-        components = []
-        for v in self.nodes():
-            if v not in seen:
-                c = set(self._bfs(v))
-                components.append(list(c))
-                seen.update(c)
-
-        return components
-
-    def _bfs(self, source):
-        seen = set()
-        nextlevel = {source}
-        while nextlevel:
-            thislevel = nextlevel
-            nextlevel = set()
-            for v in thislevel:
-                if v not in seen:
-                    yield v
-                    seen.add(v)
-                    nextlevel.update(self.neighbors(v))
+        self._compact()
+        n_nodes = len(self._nodes)
+        adjacency = csr_matrix(
+            (np.ones(len(self._indices), dtype=np.int8), self._indices,
+             self._indptr), shape=(n_nodes, n_nodes))
+        _, labels = connected_components(adjacency, directed=False)
+
+        alive = np.fromiter(self._node_index.values(), dtype=np.int64,
+                            count=len(self._node_index))
+        alive = alive[np.argsort(labels[alive], kind='stable')]
+        splits = np.flatnonzero(np.diff(labels[alive])) + 1
+        nodes = self._nodes
+        return [[nodes[idx] for idx in component]
+                for component in np.split(alive, splits)
+                if len(component)]
+
+    def node_indices(self, nodes):
+        """Return the integer index of each node, or -1 if not in the graph. """
+        node_index = self._node_index
+        return np.fromiter((node_index.get(node, -1) for node in nodes),
+                           dtype=np.int64)
+
+    def neighbor_indices(self, idx):
+        """Return the indices of the nodes bonded to the node at `idx`. """
+        neighbors = self._compacted_neighbors(idx)
+        removed = self._removed.get(idx)
+        if removed:
+            neighbors = neighbors[~np.isin(neighbors, list(removed))]
+        added = self._added.get(idx)
+        if added:
+            neighbors = np.concatenate(
+                [neighbors, np.fromiter(added, dtype=np.int64,
+                                        count=len(added))])
+        return neighbors
+
+    def edge_array(self, nodes=None):
+        """Return all bonds as an (n_edges, 2) array of node indices.
+
+        If `nodes` is given, bonds are instead returned as positions in the
+        sequence `nodes`, leaving out bonds to nodes that are not in it.
+        """
+        self._compact()
+        rows = np.repeat(np.arange(len(self._indptr) - 1, dtype=np.int64),
+                         np.diff(self._indptr))
+        mask = rows <= self._indices
+        edges = np.column_stack((rows[mask], self._indices[mask]))
+        if nodes is None:
+            return edges
+
+        positions = np.full(len(self._nodes), -1, dtype=np.int64)
+        indices = self.node_indices(nodes)
+        found = indices >= 0
+        positions[indices[found]] = np.flatnonzero(found)
+        edges = positions[edges]
+        return edges[(edges >= 0).all(axis=1)]
+
+    def degree_array(self):
+        """Return the number of bonds of every node, indexed by node index. """
+        self._compact()
+        return np.diff(self._indptr)
+
+    def _get_or_add_index(self, node):
+        idx = self._node_index.get(node)
+        if idx is None:
+            idx = len(self._nodes)
+            self._nodes.append(node)
+            self._node_index[node] = idx
+        return idx
+
+    def _drop_index(self, idx):
+        del self._node_index[self._nodes[idx]]
+        self._nodes[idx] = None
+        self._n_dead += 1
+
+    def _compacted_neighbors(self, idx):
+        if idx + 1 < len(self._indptr):
+            return self._indices[self._indptr[idx]:self._indptr[idx + 1]]
+        return self._indices[:0]
+
+    def _degree(self, idx):
+        return (len(self._compacted_neighbors(idx))
+                - len(self._removed.get(idx, ()))
+                + len(self._added.get(idx, ())))
+
+    def _has_edge_index(self, idx1, idx2):
+        if idx2 in self._added.get(idx1, ()):
+            return True
+        if idx2 in self._removed.get(idx1, ()):
+            return False
+        return bool((self._compacted_neighbors(idx1) == idx2).any())
+
+    def _add_edge_index(self, idx1, idx2):
+        if self._has_edge_index(idx1, idx2):
+            return
+        if idx2 in self._removed.get(idx1, ()):
+            self._discard(self._removed, idx1, idx2)
+        else:
+            self._added[idx1].add(idx2)
+            self._added[idx2].add(idx1)
+        self._n_pending += 1
+        self._n_edges += 1
+        self._version += 1
+
+    def _remove_edge_index(self, idx1, idx2):
+        if idx2 in self._added.get(idx1, ()):
+            self._discard(self._added, idx1, idx2)
+        else:
+            self._removed[idx1].add(idx2)
+            self._removed[idx2].add(idx1)
+        self._n_pending += 1
+        self._n_edges -= 1
+        self._version += 1
+        for idx in (idx1, idx2):
+            if self._nodes[idx] is not None and self._degree(idx) == 0:
+                self._drop_index(idx)
+
+    @staticmethod
+    def _discard(table, idx1, idx2):
+        for i, j in ((idx1, idx2), (idx2, idx1)):
+            table[i].discard(j)
+            if not table[i]:
+                del table[i]
+
+    def _add_edge_array(self, nodes, edges):
+        """Add bonds given as index pairs into the sequence `nodes`. """
+        if not len(edges):
+            return
+        used = np.unique(edges)
+        remap = np.empty(used[-1] + 1, dtype=np.int64)
+        remap[used] = [self._get_or_add_index(nodes[idx])
+                       for idx in used.tolist()]
+        edges = remap[edges]
+        if len(edges) + self._n_pending > self._compaction_threshold():
+            self._compact(extra=edges)
+            self._version += 1
+        else:
+            for idx1, idx2 in edges.tolist():
+                self._add_edge_index(idx1, idx2)
+
+    def _compaction_threshold(self):
+        return max(self._min_pending,
+                   self._pending_fraction * len(self._indices))
+
+    def _reclaim_threshold(self):
+        return max(self._min_dead, self._dead_fraction * len(self._nodes))
+
+    def _maybe_compact(self):
+        if (self._n_pending > self._compaction_threshold()
+                or self._n_dead > self._reclaim_threshold()):
+            self._compact()
+
+    @staticmethod
+    def _table_keys(table, n_nodes):
+        counts = [len(neighbors) for neighbors in table.values()]
+        rows = np.repeat(np.fromiter(table.keys(), dtype=np.int64,
+                                     count=len(table)), counts)
+        cols = np.fromiter(chain.from_iterable(table.values()),
+                           dtype=np.int64, count=sum(counts))
+        return rows * n_nodes + cols
+
+    def _compact(self, extra=None):
+        """Fold pending edits (and `extra` index pairs) into the CSR arrays.
+
+        The slots of removed nodes are reclaimed at the same time if there
+        are enough of them.
+        """
+        n_nodes = len(self._nodes)
+        reclaim = self._n_dead > self._reclaim_threshold()
+        if (not self._n_pending and extra is None and not reclaim
+                and len(self._indptr) == n_nodes + 1):
+            return
+
+        rows = np.repeat(np.arange(len(self._indptr) - 1, dtype=np.int64),
+                         np.diff(self._indptr))
+        keys = [rows * n_nodes + self._indices]
+        if self._removed:
+            removed = self._table_keys(self._removed, n_nodes)
+            keys[0] = keys[0][~np.isin(keys[0], removed)]
+        if self._added:
+            keys.append(self._table_keys(self._added, n_nodes))
+        if extra is not None:
+            keys.append(extra[:, 0] * n_nodes + extra[:, 1])
+            keys.append(extra[:, 1] * n_nodes + extra[:, 0])
+        keys = np.unique(np.concatenate(keys))
+        rows, cols = np.divmod(keys, max(n_nodes, 1))
+
+        if reclaim:
+            # Removed nodes have no bonds left, and renumbering the others
+            # in order keeps the bonds sorted.
+            alive = np.array([node is not None for node in self._nodes],
+                             dtype=bool)
+            remap = np.cumsum(alive) - 1
+            rows, cols = remap[rows], remap[cols]
+            self._nodes = [node for node in self._nodes if node is not None]
+            self._node_index = {node: idx
+                                for idx, node in enumerate(self._nodes)}
+            self._n_dead = 0
+            self._version += 1
+            n_nodes = len(self._nodes)
+
+        self._indices = cols
+        self._indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_nodes), out=self._indptr[1:])
+        self._added = defaultdict(set)
+        self._removed = defaultdict(set)
+        self._n_pending = 0
+        self._n_edges = int(np.count_nonzero(rows <= cols))
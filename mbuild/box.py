@@ -17,6 +17,8 @@ class Box(object):
         Box length in x, y and z directions.
     angles : np.ndarray, shape(3,), dtype=float, default=[90,90,90]
         Angles defining the tilt of the box
+    vectors : np.ndarray, shape(3, 3), dtype=float
+        Box vectors as rows, see `Box.vectors`.
 
     """
     def __init__(self, lengths=None, mins=None, maxs=None, angles=None):
@@ -73,6 +75,17 @@ class Box(object):
     def angles(self):
         return self._angles
 
+    @property
+    def vectors(self):
+        """The vectors spanning the box, as rows.
+
+        The first vector points along x and the second lies in the xy-plane
+        (the same lower triangular form as `mb.Lattice`). `angles` are the
+        angles between the second and third (alpha), first and third (beta)
+        and first and second (gamma) vectors, in degrees.
+        """
+        return _box_vectors(self.lengths, self.angles)
+
     @mins.setter
     def mins(self, mins):
         mins = np.array(mins, dtype=np.float)
@@ -110,6 +123,52 @@ class Box(object):
     def __repr__(self):
         return "Box(mins={}, maxs={}, angles={})".format(self.mins, self.maxs, self.angles)
 
+def _unit_vectors(angles):
+    """Return unit vectors with the given angles in lower triangular form.
+
+    This was adapted from the ASE triclinic.py lattice parameter code.
+
+    S. R. Bahn and K. W. Jacobsen
+    An object-oriented scripting interface to a
+    legacy electronic structure code Comput. Sci. Eng., Vol. 4, 56-66, 2002
+
+    Parameters
+    ----------
+    angles : array-like, shape=(3,), dtype=float
+        Angles alpha, beta and gamma between the vectors, in degrees.
+
+    Returns
+    -------
+    np.ndarray, shape=(3, 3), dtype=float
+
+    Raises
+    ------
+    ValueError
+        If no set of vectors has these angles.
+
+    """
+    alpha, beta, gamma = np.radians(np.asarray(angles, dtype=np.float64))
+    cos_a, cos_b, cos_g = np.cos(alpha), np.cos(beta), np.cos(gamma)
+    sin_b, sin_g = np.sin(beta), np.sin(gamma)
+    c_y = (cos_a - cos_b * cos_g) / sin_g
+    c_z = sin_b ** 2 - c_y ** 2
+    if not c_z > 0.:
+        raise ValueError('Incorrect lattice vector coefficients.'
+                         'Lattice parameters chosen return a non-positive '
+                         'z vector.')
+    return np.array([[1, 0, 0],
+                     [cos_g, sin_g, 0],
+                     [cos_b, c_y, np.sqrt(c_z)]], dtype=np.float64)
+
+
+def _box_vectors(lengths, angles):
+    """Return the vectors of a box with the given lengths and angles. """
+    unit = _unit_vectors(angles)
+    # Snap the rounding noise of right angles.
+    unit[np.abs(unit) < 1e-12] = 0.0
+    return unit * np.asarray(lengths, dtype=float)[:, None]
+
+
 class _BoxArray(np.ndarray):
     """Subclass of np.ndarry specifically for mb.Box
 
@@ -0,0 +1,308 @@
+"""Linked-cell neighbor search for fixed-cutoff pair queries. """
+import itertools
+
+import numpy as np
+
+from mbuild.box import _box_vectors
+
+__all__ = ['CellList']
+
+# Offsets to a cell and its 26 neighbors.
+_OFFSETS = np.array(list(itertools.product((-1, 0, 1), repeat=3)), dtype=int)
+# A cell and the 13 neighbors that come after it, each pair of neighboring
+# cells being visited once.
+_HALF_OFFSETS = _OFFSETS[13:]
+# Cells per dimension are capped so that cell IDs fit into 64 bits.
+_MAX_CELLS = 2 ** 20
+
+
+class CellList(object):
+    """Linked-cell list for finding all points within a fixed cutoff.
+
+    Space is divided into a grid of cells at least `cutoff` wide, and every
+    point is binned into a cell, so that all neighbors of a point within the
+    cutoff lie in its own or one of the 26 adjacent cells. Only occupied
+    cells are stored, sorted by cell ID, so sparse systems spread over large
+    regions do not allocate a dense grid. All searches are vectorized and
+    process the points in batches.
+
+    Periodic dimensions are gridded over the box, which may be triclinic, in
+    fractional coordinates along the box vectors; the minimum image is used
+    for all distances. Non-periodic dimensions are gridded over the extent of
+    the data.
+
+    For systems of uniform density this is the fastest way to find all pairs
+    within a fixed distance, and moving points only requires rebinning them,
+    see `update`.
+
+    Parameters
+    ----------
+    data : array-like, shape=(n, 3), dtype=float
+        The points to be indexed.
+    cutoff : float
+        The largest distance that will be searched for.
+    bounds : array-like, shape=(3,), dtype=float, optional, default=None
+        Size of the periodic box along each dimension. A size of zero means
+        that space is not periodic along that dimension. For a triclinic
+        box, the lengths of the box vectors. Defaults to no periodicity.
+    angles : array-like, shape=(3,), dtype=float, optional, default=None
+        Angles between the box vectors in degrees, as in `mb.Box`. Defaults
+        to an orthorhombic box. A triclinic box must be periodic in all three
+        dimensions.
+
+    Attributes
+    ----------
+    n : int
+        The number of points.
+    cutoff : float
+        The largest distance that can be searched for.
+    bounds : np.ndarray, shape=(3,), dtype=float
+        Size of the periodic box along each dimension.
+    n_cells : np.ndarray, shape=(3,), dtype=int
+        The number of cells along each dimension.
+
+    See Also
+    --------
+    periodic_kdtree.PeriodicCKDTree : Neighbor search without a fixed cutoff
+
+    """
+    def __init__(self, data, cutoff, bounds=None, angles=None):
+        data = np.asarray(data, dtype=float).reshape((-1, 3))
+        if cutoff <= 0:
+            raise ValueError('The cutoff must be positive, not '
+                             '{}.'.format(cutoff))
+        self.cutoff = float(cutoff)
+        if bounds is None:
+            bounds = np.zeros(3)
+        self.bounds = np.array(bounds, dtype=float)
+        self._periodic = self.bounds > 0
+
+        if angles is not None and not np.allclose(angles, 90.0):
+            if not self._periodic.all():
+                raise ValueError('A triclinic box must be periodic in all '
+                                 'three dimensions. Bounds: {}'.format(
+                                     self.bounds))
+            self._vectors = _box_vectors(self.bounds, angles)
+            self._origin = np.zeros(3)
+        else:
+            # Non-periodic dimensions span the extent of the data.
+            if len(data):
+                mins = data.min(axis=0)
+                spans = data.max(axis=0) - mins
+            else:
+                mins = spans = np.zeros(3)
+            self._origin = np.where(self._periodic, 0.0, mins)
+            self._vectors = np.diag(np.where(
+                self._periodic, self.bounds, np.maximum(spans, self.cutoff)))
+        self._inverse = np.linalg.inv(self._vectors)
+
+        # Distances between opposite faces of the (box) grid.
+        widths = (abs(np.linalg.det(self._vectors)) /
+                  np.linalg.norm(np.cross(self._vectors[[1, 2, 0]],
+                                          self._vectors[[2, 0, 1]]), axis=1))
+        self.n_cells = np.clip(np.floor(widths / self.cutoff).astype(int),
+                               1, _MAX_CELLS)
+        # Neighboring cells are only distinct with at least three cells
+        # along each periodic dimension; otherwise the images of a point in
+        # the same cell are told apart by their shifts.
+        self._distinct = bool(np.all((self.n_cells >= 3) | ~self._periodic))
+        self.update(data)
+
+    @property
+    def n(self):
+        return len(self._order)
+
+    def _bin(self, xyz):
+        """Return the wrapped coordinates and cells of points. """
+        fractional = (xyz - self._origin) @ self._inverse
+        periodic = self._periodic
+        if periodic.any():
+            fractional[:, periodic] -= np.floor(fractional[:, periodic])
+            fractional[:, periodic] = np.where(
+                fractional[:, periodic] >= 1.0, 0.0, fractional[:, periodic])
+        cells = np.floor(fractional * self.n_cells).astype(np.int64)
+        # Points on the upper face of a periodic box and outside of the
+        # extent of the data otherwise.
+        cells = np.clip(cells, 0, self.n_cells - 1)
+        return fractional @ self._vectors + self._origin, cells
+
+    def _cell_ids(self, cells):
+        n_cells = self.n_cells
+        return (cells[..., 0] * n_cells[1] + cells[..., 1]) * n_cells[2] + \
+            cells[..., 2]
+
+    def update(self, data):
+        """Rebin the points after they moved.
+
+        The grid is kept and the points are only re-sorted if any of them
+        moved to a different cell.
+
+        Parameters
+        ----------
+        data : array-like, shape=(n, 3), dtype=float
+            The new positions of the points.
+
+        """
+        xyz, cells = self._bin(np.asarray(data, dtype=float).reshape((-1, 3)))
+        ids = self._cell_ids(cells)
+        if getattr(self, '_ids', None) is None or not np.array_equal(
+                ids, self._ids):
+            self._ids = ids
+            self._order = np.argsort(ids, kind='stable')
+            sorted_ids = ids[self._order]
+            self._occupied, self._starts, self._counts = np.unique(
+                sorted_ids, return_index=True, return_counts=True)
+            self._cells = cells[self._order]
+        self._xyz = xyz[self._order]
+
+    def _neighbors(self, cells, offset):
+        """Pair points with the indexed points in one neighboring cell.
+
+        Returns the index of the point and the sorted position of the
+        indexed point of every candidate pair, and for every point the shift
+        of the neighboring cell's image, in box vectors.
+        """
+        neighbor = cells + offset
+        shift = np.zeros_like(neighbor)
+        periodic = self._periodic
+        if periodic.any():
+            shift[:, periodic] = np.floor_divide(neighbor[:, periodic],
+                                                 self.n_cells[periodic])
+            neighbor[:, periodic] -= shift[:, periodic] * self.n_cells[periodic]
+        valid = ((neighbor >= 0) & (neighbor < self.n_cells)).all(axis=1)
+
+        ids = self._cell_ids(neighbor)
+        pos = np.searchsorted(self._occupied, ids)
+        pos[pos == len(self._occupied)] = 0
+        counts = np.where(valid & (self._occupied[pos] == ids),
+                          self._counts[pos], 0)
+        first = np.repeat(np.arange(len(cells)), counts)
+        second = (np.repeat(self._starts[pos] - (np.cumsum(counts) - counts),
+                            counts) + np.arange(counts.sum()))
+        return first, second, shift
+
+    def _distances(self, xyz, first, second, shift, r):
+        """Return the candidate pairs within `r` and their distances. """
+        d = self._xyz[second] - xyz[first]
+        if shift.any():
+            d += (shift @ self._vectors)[first]
+        squared = np.einsum('ij,ij->i', d, d)
+        keep = np.flatnonzero(squared <= r * r)
+        return first[keep], second[keep], np.sqrt(squared[keep])
+
+    def _check_radius(self, r):
+        if r is None:
+            return self.cutoff
+        if r > self.cutoff:
+            raise ValueError('Cannot search beyond the cutoff of the cell '
+                             'list ({} > {}).'.format(r, self.cutoff))
+        return r
+
+    def pairs(self, r=None, return_distances=False, batch_size=65536):
+        """Find all pairs of points within a distance `r` of each other.
+
+        Parameters
+        ----------
+        r : float, optional, default=self.cutoff
+            The maximum distance, at most `self.cutoff`.
+        return_distances : bool, optional, default=False
+            Also return the distance of every pair.
+        batch_size : int, optional, default=65536
+            The number of points processed at a time, which bounds the
+            memory used for candidate pairs.
+
+        Returns
+        -------
+        pairs : np.ndarray, shape=(m, 2), dtype=int
+            Indices of the points in every pair, with the lower index first,
+            sorted by the first and then the second index.
+        distances : np.ndarray, shape=(m,), dtype=float
+            Minimum image distance of every pair, if `return_distances`.
+
+        """
+        r = self._check_radius(r)
+        offsets = _HALF_OFFSETS if self._distinct else _OFFSETS
+        found = [np.empty((0, 2), dtype=int)]
+        found_distances = [np.empty(0)]
+        for start in range(0, self.n, batch_size):
+            xyz = self._xyz[start:start + batch_size]
+            cells = self._cells[start:start + batch_size]
+            for offset in offsets:
+                first, second, distances = self._distances(
+                    xyz, *self._neighbors(cells, offset), r)
+                first += start
+                if not offset.any() or not self._distinct:
+                    # Visited from both points.
+                    keep = first < second
+                    first, second = first[keep], second[keep]
+                    distances = distances[keep]
+                found.append(np.column_stack((first, second)))
+                found_distances.append(distances)
+
+        pairs = self._order[np.concatenate(found)]
+        distances = np.concatenate(found_distances)
+        pairs.sort(axis=1)
+        order = np.lexsort((distances, pairs[:, 1], pairs[:, 0]))
+        pairs, distances = pairs[order], distances[order]
+        if not self._distinct:
+            # Keep the nearest image of every pair.
+            unique = np.ones(len(pairs), dtype=bool)
+            unique[1:] = (pairs[1:] != pairs[:-1]).any(axis=1)
+            pairs, distances = pairs[unique], distances[unique]
+        if return_distances:
+            return pairs, distances
+        return pairs
+
+    def query(self, x, r=None):
+        """Find all points within a distance `r` of each of the points `x`.
+
+        Parameters
+        ----------
+        x : array-like, shape=(m, 3) or (3,), dtype=float
+            The points to find neighbors of.
+        r : float, optional, default=self.cutoff
+            The maximum distance, at most `self.cutoff`.
+
+        Returns
+        -------
+        indptr : np.ndarray, shape=(m + 1,), dtype=int
+            The neighbors of `x[i]` are `indices[indptr[i]:indptr[i + 1]]`.
+        indices : np.ndarray, dtype=int
+            Indices of the neighbors of every point, nearest first.
+        distances : np.ndarray, dtype=float
+            Minimum image distance to every neighbor.
+
+        """
+        r = self._check_radius(r)
+        xyz, cells = self._bin(np.asarray(x, dtype=float).reshape((-1, 3)))
+        rows = [np.empty(0, dtype=int)]
+        found = [np.empty(0, dtype=int)]
+        found_distances = [np.empty(0)]
+        for offset in _OFFSETS if self.n else ():
+            first, second, distances = self._distances(
+                xyz, *self._neighbors(cells, offset), r)
+            rows.append(first)
+            found.append(second)
+            found_distances.append(distances)
+
+        rows = np.concatenate(rows)
+        indices = self._order[np.concatenate(found)]
+        distances = np.concatenate(found_distances)
+        order = np.lexsort((distances, rows))
+        rows, indices, distances = rows[order], indices[order], distances[order]
+        if not self._distinct:
+            # Keep the nearest image of every neighbor.
+            order = np.lexsort((distances, indices, rows))
+            rows, indices, distances = (rows[order], indices[order],
+                                        distances[order])
+            unique = np.ones(len(rows), dtype=bool)
+            unique[1:] = (rows[1:] != rows[:-1]) | (indices[1:] !=
+                                                    indices[:-1])
+            rows, indices, distances = (rows[unique], indices[unique],
+                                        distances[unique])
+            order = np.lexsort((distances, rows))
+            rows, indices, distances = (rows[order], indices[order],
+                                        distances[order])
+        indptr = np.zeros(len(xyz) + 1, dtype=int)
+        np.cumsum(np.bincount(rows, minlength=len(xyz)), out=indptr[1:])
+        return indptr, indices, distances
@@ -81,11 +81,16 @@ class Proxy(Compound):
 
         newone.name = deepcopy(self.name)
         newone.wrapped = clone(self.wrapped)
+        newone._index = None
+        newone._root = newone
+        newone._topology_version = 0
+        newone._coordinate_version = 0
+        newone._rigid_bodies = None
 
         if hasattr(self, 'index'):
             newone.index = deepcopy(self.index)
 
-        if self.children is None:
+        if self._children is None:
             newone.children = None
         else:
             newone.children = OrderedSet()
@@ -108,7 +113,7 @@ class Proxy(Compound):
                 if not isinstance(compound, list):
                     newone.labels[label] = compound._clone(
                         clone_of, root_container)
-                    compound.referrers.add(clone_of[compound])
+                    clone_of[compound]._add_referrer(newone)
                 else:
                     # compound is a list of compounds, so we create an empty
                     # list, and add the clones of the original list elements.
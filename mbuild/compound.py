@@ -1,7 +1,7 @@
-__all__ = ['load', 'clone', 'Compound', 'Particle']
+__all__ = ['load', 'clone', 'clone_many', 'Compound', 'Particle']
 
 from collections import OrderedDict, defaultdict, Iterable
-from copy import deepcopy
+from collections.abc import ItemsView, MutableMapping, ValuesView
 import itertools
 import os
 import sys
@@ -17,7 +17,9 @@ from parmed.periodic_table import AtomicNum, element_by_name, Mass, Element
 
 from mbuild.bond_graph import BondGraph
 from mbuild.box import Box
+from mbuild.cell_list import CellList
 from mbuild.exceptions import MBuildError
+from mbuild.flat_system import FlatSystem
 from mbuild.utils.decorators import deprecated
 from mbuild.formats.xyz import read_xyz, write_xyz
 from mbuild.formats.json_formats import compound_to_json, compound_from_json
@@ -25,10 +27,10 @@ from mbuild.formats.hoomdxml import write_hoomdxml
 from mbuild.formats.lammpsdata import write_lammpsdata
 from mbuild.formats.gsdwriter import write_gsd
 from mbuild.formats.par_writer import write_par
-from mbuild.periodic_kdtree import PeriodicCKDTree
+from mbuild.periodic_kdtree import PeriodicCKDTree, _minimum_image
 from mbuild.utils.io import run_from_ipython, import_, has_networkx
 from mbuild.utils.jsutils import overwrite_nglview_default
-from mbuild.coordinate_transform import _translate, _rotate
+from mbuild.coordinate_transform import _translate, _rotate, _rotation_matrices
 
 
 def load(filename_or_object, relative_to_module=None, compound=None, coords_only=False,
@@ -213,6 +215,692 @@ def clone(existing_compound, clone_of=None, root_container=None):
     return newone
 
 
+def clone_many(existing_compound, n_copies):
+    """Make many clones of a Compound from a shared template.
+
+    The hierarchy, labels and bonds of `existing_compound` are recorded once
+    and every copy is stamped from that record, which is considerably faster
+    than calling `clone` repeatedly. Each copy is an independent Compound
+    hierarchy, exactly as returned by `clone`.
+
+    Parameters
+    ----------
+    existing_compound : mb.Compound
+        Existing Compound that will be copied
+    n_copies : int
+        Number of copies to make
+
+    Returns
+    -------
+    list of mb.Compound
+
+    """
+    if n_copies <= 0:
+        return []
+    template = _CloneTemplate(existing_compound)
+    if not template.supported:
+        return [template.blueprint] + [clone(existing_compound)
+                                       for _ in range(n_copies - 1)]
+    copies = [template.instantiate() for _ in range(n_copies - 1)]
+    copies.append(template.blueprint)
+    return copies
+
+
+# Source of the topology and coordinate versions of all hierarchies. Versions
+# are unique across hierarchies, so a part moved from one hierarchy to
+# another can never report a version it had before the move.
+_versions = itertools.count(1)
+
+# What a port particle, or a Compound without Particles, contributes to the
+# (charge, n_particles, n_rigid, max_rigid_id) aggregates of its ancestors.
+_NO_CONTRIBUTION = (0.0, 0, 0, None)
+# Stands in for a maximum rigid body ID that has to be recomputed.
+_UNKNOWN = object()
+
+
+def _accumulate(aggregates, contribution):
+    """Add a part's contribution to a list of aggregates. """
+    charge, n_particles, n_rigid, max_rigid_id = contribution
+    aggregates[0] += charge
+    aggregates[1] += n_particles
+    aggregates[2] += n_rigid
+    if max_rigid_id is not None and (aggregates[3] is None or
+                                     max_rigid_id > aggregates[3]):
+        aggregates[3] = max_rigid_id
+
+
+def _flatten_compounds(objs):
+    """Yield the items of a (possibly nested) list-like of Compounds. """
+    for obj in objs:
+        if isinstance(obj, Iterable) and not isinstance(obj, str):
+            for item in _flatten_compounds(obj):
+                yield item
+        else:
+            yield obj
+
+
+def _preorder(compound):
+    """Yield the Compounds below `compound` in preorder, without recursion. """
+    stack = list(reversed(compound.children))
+    while stack:
+        node = stack.pop()
+        yield node
+        if node.children:
+            stack.extend(reversed(node.children))
+
+
+def _as_names(names):
+    """Return a name or a list-like of names as a tuple. """
+    if isinstance(names, str):
+        return (names,)
+    return tuple(names)
+
+
+def _nearest_named(particles, names):
+    """Group Particles by their nearest Compound called any of `names`.
+
+    Every Particle is assigned to itself if it carries one of the names and
+    otherwise to its nearest ancestor that does. The owner of each Compound
+    is looked up once, however many Particles it holds.
+
+    Returns
+    -------
+    group_ids : list of int
+        Index of the group of every Particle, in order of first appearance,
+        or -1 for Particles without a named owner.
+    group_names : list of str
+        Name of every group.
+    """
+    owners = dict()
+    groups = dict()
+    group_ids = list()
+    group_names = list()
+    for particle in particles:
+        path = list()
+        node = particle
+        while node is not None and node not in owners:
+            if node.name in names:
+                owners[node] = node
+                break
+            path.append(node)
+            node = node.parent
+        owner = owners.get(node)
+        for compound in path:
+            owners[compound] = owner
+        if owner is None:
+            group_ids.append(-1)
+            continue
+        group = groups.get(owner)
+        if group is None:
+            group = groups[owner] = len(group_names)
+            group_names.append(owner.name)
+        group_ids.append(group)
+    return group_ids, group_names
+
+
+def _referrer_set(referrers):
+    """Return the compactly stored referrers of a Compound as a tuple or set. """
+    if referrers is None:
+        return ()
+    if isinstance(referrers, set):
+        return referrers
+    return (referrers,)
+
+
+class _Labels(MutableMapping):
+    """The labels of a Compound, with auto-numbered labels computed lazily.
+
+    Parts added under a label ending in '[$]' are appended to a list stored
+    under the label's prefix. The numbered labels, e.g. 'CH3[2]', that refer
+    to the items of such a list are not stored but resolved from the list
+    when they are looked up or iterated over, so that a Compound with many
+    children only stores its explicit labels. Deleting a numbered label
+    hides it without renumbering the remaining ones.
+
+    """
+    __slots__ = ('_store', '_hidden')
+
+    def __init__(self, *args, **kwargs):
+        self._store = OrderedDict()
+        # Numbered labels that have been deleted.
+        self._hidden = None
+        self.update(*args, **kwargs)
+
+    def _numbered(self, key):
+        """Return the part a numbered label refers to, or None. """
+        if not isinstance(key, str) or not key.endswith(']'):
+            return None
+        start = key.rfind('[')
+        number = key[start + 1:-1]
+        if start < 0 or not number.isdecimal() or str(int(number)) != number:
+            return None
+        parts = self._store.get(key[:start])
+        if not isinstance(parts, list) or int(number) >= len(parts):
+            return None
+        if self._hidden and key in self._hidden:
+            return None
+        return parts[int(number)]
+
+    def _hide(self, key):
+        if self._hidden is None:
+            self._hidden = set()
+        self._hidden.add(key)
+
+    def _iter_items(self):
+        store = self._store
+        hidden = self._hidden or ()
+        for key, value in store.items():
+            yield key, value
+            if isinstance(value, list):
+                pattern = key + '[{}]'
+                for i, part in enumerate(value):
+                    numbered = pattern.format(i)
+                    if numbered not in store and numbered not in hidden:
+                        yield numbered, part
+
+    def _remove_parts(self, parts):
+        """Remove all labels referring to one of `parts`.
+
+        Returns the parts for which a label was removed.
+        """
+        store = self._store
+        hidden = self._hidden or ()
+        found = []
+        for key, value in list(store.items()):
+            if isinstance(value, Compound):
+                if value in parts:
+                    del store[key]
+                    found.append(value)
+            elif isinstance(value, list):
+                pattern = key + '[{}]'
+                for i, part in enumerate(value):
+                    if part in parts:
+                        numbered = pattern.format(i)
+                        if numbered not in store and numbered not in hidden:
+                            self._hide(numbered)
+                            found.append(part)
+        return found
+
+    def __getitem__(self, key):
+        try:
+            return self._store[key]
+        except KeyError:
+            pass
+        part = self._numbered(key)
+        if part is None:
+            raise KeyError(key)
+        return part
+
+    def __contains__(self, key):
+        return key in self._store or self._numbered(key) is not None
+
+    def __setitem__(self, key, value):
+        self._store[key] = value
+
+    def __delitem__(self, key):
+        found = self._store.pop(key, None) is not None
+        if self._numbered(key) is not None:
+            self._hide(key)
+            found = True
+        if not found:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key, _ in self._iter_items():
+            yield key
+
+    def __len__(self):
+        return sum(1 for _ in self._iter_items())
+
+    def __bool__(self):
+        # Numbered labels only exist alongside a stored list label.
+        return bool(self._store)
+
+    def items(self):
+        return _LabelItems(self)
+
+    def values(self):
+        return _LabelValues(self)
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, list(self.items()))
+
+
+class _LabelItems(ItemsView):
+
+    def __iter__(self):
+        return self._mapping._iter_items()
+
+
+class _LabelValues(ValuesView):
+
+    def __iter__(self):
+        for _, value in self._mapping._iter_items():
+            yield value
+
+
+class _CloneTemplate(object):
+    """Record of a Compound hierarchy from which copies can be stamped.
+
+    The template is taken from a regular clone of the prototype (the
+    blueprint), so it captures whatever `_clone` copies, including Port
+    anchors. The state of every Compound is split into immutable values
+    (including read-only arrays), which all copies share, writeable arrays,
+    which are copied, and references to other Compounds, which are stored as
+    positions in the template. Coordinates of a copy are held in a single
+    array with one row per Compound.
+
+    Compounds holding state that cannot be described this way (e.g. Proxies
+    wrapping an outside Compound) mark the template as not `supported`.
+
+    Parameters
+    ----------
+    prototype : mb.Compound
+        The Compound to be copied.
+
+    """
+    # Attributes rebuilt for every copy rather than taken from the blueprint.
+    _structure = frozenset(['parent', '_children', '_labels', '_referrers',
+                            'bond_graph', '_index', '_root', '_pos',
+                            '_aggregates', '_rigid_bodies',
+                            '_topology_version', '_coordinate_version',
+                            '__dict__', '__weakref__'])
+    _immutable = (str, bool, int, float, np.generic, np.ndarray, type(None))
+
+    def __init__(self, prototype):
+        clone_of = dict()
+        self.blueprint = clone(prototype, clone_of=clone_of)
+        nodes = list(clone_of.values())
+        position = {node: i for i, node in enumerate(nodes)}
+        self.supported = False
+
+        self.nodes = list()
+        for node in nodes:
+            state = dict()
+            arrays = list()
+            references = list()
+            for key, value in self._state(node):
+                if key in self._structure:
+                    continue
+                if isinstance(value, Compound):
+                    if value not in position:
+                        return
+                    references.append((key, position[value]))
+                elif isinstance(value, np.ndarray) and value.flags.writeable:
+                    arrays.append(key)
+                    state[key] = value.copy()
+                elif isinstance(value, self._immutable):
+                    state[key] = value
+                else:
+                    return
+
+            labels = list()
+            hidden = None
+            if node._labels:
+                for label, part in node._labels._store.items():
+                    if isinstance(part, Compound):
+                        labels.append((label, position[part]))
+                    else:
+                        labels.append((label, [position[p] for p in part]))
+                hidden = node._labels._hidden
+
+            if node.bond_graph is not None and node is not self.blueprint:
+                return
+            self.nodes.append((
+                type(node), state, arrays, references,
+                None if node.parent is None else position[node.parent],
+                None if node._children is None else
+                [position[child] for child in node._children],
+                (labels, frozenset(hidden) if hidden else None),
+                [position[referrer] for referrer in
+                 _referrer_set(node._referrers)]))
+
+        self.xyz = np.array([node._pos for node in nodes], dtype=float)
+        # Bonds are kept as a graph over template positions; copies of it
+        # share its bond arrays.
+        if self.blueprint.bond_graph is not None:
+            self.bond_graph = self.blueprint.bond_graph.copy(position)
+        else:
+            self.bond_graph = None
+        self.supported = True
+
+    @staticmethod
+    def _state(node):
+        """Yield the (name, value) pairs of all attributes set on `node`. """
+        for key in Compound.__slots__:
+            try:
+                # Bypass `__getattr__` hooks such as the one of Proxy.
+                yield key, object.__getattribute__(node, key)
+            except AttributeError:
+                pass
+        for item in node.__dict__.items():
+            yield item
+
+    def instantiate(self):
+        """Return a new copy of the prototype. """
+        nodes = [spec[0].__new__(spec[0]) for spec in self.nodes]
+        xyz = self.xyz.copy()
+        for node, row, spec in zip(nodes, xyz, self.nodes):
+            (_, state, arrays, references, parent, children, labels,
+             referrers) = spec
+            for key, value in state.items():
+                setattr(node, key, value)
+            for key in arrays:
+                setattr(node, key, state[key].copy())
+            for key, i in references:
+                setattr(node, key, nodes[i])
+            node._pos = row
+            node._aggregates = None
+            node._rigid_bodies = None
+            node.parent = None if parent is None else nodes[parent]
+            if children is None:
+                node._children = None
+            else:
+                node._children = OrderedSet([nodes[i] for i in children])
+            labels, hidden = labels
+            if labels:
+                node._labels = _Labels()
+                node._labels._store.update(
+                    (label, nodes[i] if isinstance(i, int) else
+                     [nodes[j] for j in i])
+                    for label, i in labels)
+                if hidden:
+                    node._labels._hidden = set(hidden)
+            else:
+                node._labels = None
+            if len(referrers) == 1:
+                node._referrers = nodes[referrers[0]]
+            else:
+                node._referrers = set(nodes[i] for i in referrers) or None
+            node.bond_graph = None
+            node._index = None
+            node._root = node
+            node._topology_version = 0
+            node._coordinate_version = 0
+
+        root = nodes[0]
+        if self.bond_graph is not None:
+            root.bond_graph = self.bond_graph.copy(nodes)
+        return root
+
+
+def _unpickle_hierarchy(classes):
+    """Create the bare Compounds of a pickled hierarchy and return its root.
+
+    The Compounds are kept on the root until `Compound.__setstate__` has
+    rebuilt the hierarchy, so that references to them from within the
+    pickled state can be resolved in the meantime.
+    """
+    nodes = [cls.__new__(cls) for cls in classes]
+    object.__getattribute__(nodes[0], '__dict__')['_unpickled_nodes'] = nodes
+    return nodes[0]
+
+
+def _unpickle_compound(root, position):
+    """Return the Compound at `position` in the hierarchy below `root`. """
+    nodes = object.__getattribute__(root, '__dict__').get('_unpickled_nodes')
+    if nodes is not None:
+        return nodes[position]
+    if position == 0:
+        return root
+    return root._particle_index().nodes[position - 1]
+
+
+class _ParticleIndex(object):
+    """Flat index of the Particles of a hierarchy, cached on its root.
+
+    The index lists all non-port Particles followed by all port Particles,
+    each in hierarchy order, so the Particles below any Compound occupy a
+    contiguous range. Particle counts and integer lookups are then O(1).
+
+    All Compounds below the root are listed in preorder as well, so that the
+    successors of any Compound are a contiguous slice of `nodes` and the
+    hierarchy can be traversed without recursion.
+
+    The index also owns the coordinate buffer of the hierarchy, holding one
+    row per Particle in the same order. The `_pos` of every Particle is
+    rebound to a view of its row, so the coordinates of any Compound in the
+    hierarchy are contiguous slices of the buffer and can be returned without
+    copying.
+
+    The index is dropped whenever Compounds are added to or removed from the
+    hierarchy and rebuilt on demand.
+
+    Parameters
+    ----------
+    root : mb.Compound
+        The Compound at the top of the hierarchy.
+
+    Attributes
+    ----------
+    particles : list of mb.Compound
+        All non-port Particles in hierarchy order.
+    ports : list of mb.Compound
+        All port Particles in hierarchy order.
+    xyz : np.ndarray, shape=(n, 3), dtype=float
+        Coordinates of all Particles, followed by all port Particles.
+    spans : dict
+        Maps every Compound with children to a tuple
+        `(start, stop, port_start, port_stop, order_start, order_stop,
+        node_start, node_stop)` giving its rows in `xyz`, its slice of
+        `order` and the slice of `nodes` holding its successors.
+    order : np.ndarray, shape=(n,), dtype=int
+        Rows of `xyz` in hierarchy order, including port Particles.
+    nodes : list of mb.Compound
+        All Compounds below the root in preorder.
+    port_nodes : np.ndarray, dtype=int
+        Positions of all Ports in `nodes`.
+    frozen : dict
+        Flat topologies built by `Compound.freeze`, keyed by the Compound
+        and the arguments they were built for.
+    trees : dict
+        Neighbor search trees built by `Compound._periodic_kdtree`, keyed by
+        the Compound and the periodic box they were built for.
+    bound : bool
+        False if any Particle overrides `pos`, in which case positions are
+        not backed by the buffer and must be gathered per Particle.
+
+    """
+    def __init__(self, root):
+        from mbuild.port import Port
+
+        particles = list()
+        ports = list()
+        order = list()
+        nodes = list()
+        port_nodes = list()
+        starts = dict()
+        self.spans = dict()
+
+        # Iterative preorder walk; each Compound is visited again on exit to
+        # record where its Particles and successors stop.
+        stack = [(root, True)]
+        while stack:
+            node, entering = stack.pop()
+            if entering and node is not root:
+                if isinstance(node, Port):
+                    port_nodes.append(len(nodes))
+                nodes.append(node)
+            if not node.children:
+                if node.port_particle:
+                    order.append(-1 - len(ports))
+                    ports.append(node)
+                else:
+                    order.append(len(particles))
+                    particles.append(node)
+            elif entering:
+                starts[node] = (len(particles), len(ports), len(order),
+                                len(nodes))
+                stack.append((node, False))
+                stack.extend((child, True) for child in reversed(node.children))
+            else:
+                start, port_start, order_start, node_start = starts.pop(node)
+                self.spans[node] = (start, len(particles),
+                                    port_start, len(ports),
+                                    order_start, len(order),
+                                    node_start, len(nodes))
+
+        self.particles = particles
+        self.ports = ports
+        self.nodes = nodes
+        self.port_nodes = np.array(port_nodes, dtype=int)
+        self._leaves = None
+        self._names = None
+        self._names_version = None
+        self._bonds = None
+        self._bond_graph = None
+        self._bond_version = None
+        self.frozen = dict()
+        self.trees = dict()
+        self._rows = None
+        self._positions = None
+        self._degrees = None
+        self._degree_graph = None
+        self._degree_version = None
+
+        n_particles = len(particles)
+        self.spans = {node: (start, stop,
+                             n_particles + port_start, n_particles + port_stop,
+                             order_start, order_stop, node_start, node_stop)
+                      for node, (start, stop, port_start, port_stop,
+                                 order_start, order_stop, node_start,
+                                 node_stop)
+                      in self.spans.items()}
+        self.order = np.array(order, dtype=int)
+        self.order[self.order < 0] = n_particles - 1 - self.order[self.order < 0]
+
+        leaves = particles + ports
+        self.bound = all(type(leaf).pos is Compound.pos for leaf in leaves)
+        self.xyz = np.array([leaf._pos for leaf in leaves],
+                            dtype=float).reshape((-1, 3))
+        if self.bound:
+            for leaf, row in zip(leaves, self.xyz):
+                leaf._pos = row
+
+    def particles_named(self, name):
+        """Return the sorted indices of all Particles called `name`. """
+        if self._names_version != Compound._name_version:
+            names = defaultdict(list)
+            for i, particle in enumerate(self.particles):
+                names[particle.name].append(i)
+            self._names = {key: np.array(val, dtype=int)
+                           for key, val in names.items()}
+            self._names_version = Compound._name_version
+        return self._names.get(name, np.empty(0, dtype=int))
+
+    def bonds(self, compound, bond_graph):
+        """Return the bonds within `compound` as pairs of Particle indices.
+
+        All bonds of the hierarchy are kept as index pairs sorted by their
+        lower index. As the Particles of `compound` occupy a contiguous range
+        of indices, its bonds are found with a binary search rather than by
+        building a subgraph.
+        """
+        if (self._bond_graph is not bond_graph or
+                self._bond_version != bond_graph._version):
+            bonds = bond_graph.edge_array(self.particles)
+            bonds.sort(axis=1)
+            self._bonds = bonds[np.argsort(bonds[:, 0], kind='stable')]
+            self._bond_graph = bond_graph
+            self._bond_version = bond_graph._version
+
+        start, stop = self.spans[compound][:2]
+        lo, hi = np.searchsorted(self._bonds[:, 0], [start, stop])
+        bonds = self._bonds[lo:hi]
+        return bonds[bonds[:, 1] < stop]
+
+    def degrees(self, bond_graph):
+        """Return the number of bonds of every Particle, in index order. """
+        if (self._degree_graph is not bond_graph or
+                self._degree_version != bond_graph._version):
+            indices = bond_graph.node_indices(self.particles)
+            found = indices >= 0
+            self._degrees = np.zeros(len(indices), dtype=int)
+            self._degrees[found] = bond_graph.degree_array()[indices[found]]
+            self._degree_graph = bond_graph
+            self._degree_version = bond_graph._version
+        return self._degrees
+
+    def successors(self, compound):
+        """Return the Compounds below `compound` in preorder. """
+        node_start, node_stop = self.spans[compound][6:]
+        return self.nodes[node_start:node_stop]
+
+    def leaves(self, compound, include_ports=False):
+        """Return the Particles of `compound` in hierarchy order. """
+        start, stop, port_start, port_stop, order_start, order_stop = \
+            self.spans[compound][:6]
+        if not include_ports or port_start == port_stop:
+            return self.particles[start:stop]
+        n_particles = len(self.particles)
+        if start == stop:
+            return self.ports[port_start - n_particles:port_stop - n_particles]
+        if self._leaves is None:
+            self._leaves = self.particles + self.ports
+        leaves = self._leaves
+        return [leaves[row] for row in self.order[order_start:order_stop]]
+
+    def ports_of(self, compound):
+        """Return the Ports below `compound` in preorder. """
+        node_start, node_stop = self.spans[compound][6:]
+        lo, hi = np.searchsorted(self.port_nodes, [node_start, node_stop])
+        return [self.nodes[i] for i in self.port_nodes[lo:hi]]
+
+    def get(self, compound, include_ports=False):
+        """Return the coordinates of `compound`, as a view where possible. """
+        start, stop, port_start, port_stop, order_start, order_stop = \
+            self.spans[compound][:6]
+        if not include_ports or port_start == port_stop:
+            return self.xyz[start:stop]
+        if start == stop:
+            return self.xyz[port_start:port_stop]
+        return self.xyz[self.order[order_start:order_stop]]
+
+    def set(self, compound, arrnx3, include_ports=False):
+        """Write `arrnx3` into the rows belonging to `compound`. """
+        start, stop, port_start, port_stop, order_start, order_stop = \
+            self.spans[compound][:6]
+        if not include_ports or port_start == port_stop:
+            self.xyz[start:stop] = arrnx3
+        elif start == stop:
+            self.xyz[port_start:port_stop] = arrnx3
+        else:
+            self.xyz[self.order[order_start:order_stop]] = arrnx3
+
+    def position(self, compound):
+        """Return the position of `compound` in preorder, the root being 0. """
+        if self._positions is None:
+            self._positions = {node: i for i, node in
+                               enumerate(self.nodes, start=1)}
+        return self._positions[compound]
+
+    def rows(self, compounds):
+        """Return the rows in `xyz` of the Particles of each of `compounds`.
+
+        Port Particles are included. Returns the concatenated rows and the
+        number of rows belonging to each Compound.
+        """
+        starts = list()
+        stops = list()
+        for compound in compounds:
+            span = self.spans.get(compound)
+            if span is None:
+                if self._rows is None:
+                    self._rows = {leaf: row for row, leaf in
+                                  enumerate(self.particles + self.ports)}
+                row = self._rows[compound]
+                starts.extend((row, row))
+                stops.extend((row + 1, row))
+            else:
+                starts.extend(span[0:4:2])
+                stops.extend(span[1:4:2])
+        lengths = np.array(stops, dtype=int) - np.array(starts, dtype=int)
+        offsets = np.cumsum(lengths) - lengths
+        rows = (np.repeat(np.array(starts, dtype=int) - offsets, lengths) +
+                np.arange(lengths.sum()))
+        return rows, lengths.reshape((-1, 2)).sum(axis=1)
+
+
 class Compound(object):
     """A building block in the mBuild hierarchy.
 
@@ -254,10 +942,11 @@ class Compound(object):
     bond_graph : mb.BondGraph
         Graph-like object that stores bond information for this Compound
     children : OrderedSet
-        Contains all children (other Compounds).
-    labels : OrderedDict
+        Contains all children (other Compounds). Empty for Particles.
+    labels : OrderedDict-like
         Labels to Compound/Atom mappings. These do not necessarily need not be
-        in self.children.
+        in self.children. Auto-numbered labels such as 'CH3[0]' are resolved
+        from the list label 'CH3' rather than stored.
     parent : mb.Compound
         The parent Compound that contains this part. Can be None if this
         compound is the root of the containment hierarchy.
@@ -271,14 +960,35 @@ class Compound(object):
     boundingbox
     center
     contains_rigid
+    coordinate_version
     max_rigid_id
     n_particles
     n_bonds
     root
+    topology_version
     xyz
     xyz_with_ports
 
+    Notes
+    -----
+    Most Compounds in a large system are Particles, so Compound keeps its
+    state in `__slots__` and only creates the containers behind `children`,
+    `labels` and `referrers` once they are needed. A Particle with its
+    default periodicity does not store a periodicity array either. Arbitrary
+    attributes can still be set on any Compound.
+
+    Compounds with children keep running totals of the charge, the number
+    of Particles and the rigid bodies below them. They are updated as parts
+    are added, removed or relabeled, so `charge`, `n_particles`,
+    `contains_rigid` and `max_rigid_id` do not traverse the hierarchy.
+
     """
+    __slots__ = ('_name', '_pos', '_periodicity', '_charge', 'parent',
+                 '_children', '_labels', '_referrers', 'bond_graph',
+                 'port_particle', '_index', '_root', '_rigid_id',
+                 '_aggregates', '_rigid_bodies', '_topology_version',
+                 '_coordinate_version',
+                 '__dict__', '__weakref__')
 
     def __init__(self, subcompounds=None, name=None, pos=None, charge=0.0,
                  periodicity=None, port_particle=False):
@@ -289,32 +999,37 @@ class Compound(object):
                 raise ValueError(
                     'Compound.name should be a string. You passed '
                     '{}'.format(name))
-            self.name = name
+            self._name = name
         else:
-            self.name = self.__class__.__name__
+            self._name = self.__class__.__name__
 
         # A periodicity of zero in any direction is treated as non-periodic.
+        # None stands in for all zeros, see the `periodicity` property.
         if periodicity is None:
-            self._periodicity = np.array([0.0, 0.0, 0.0])
+            self._periodicity = None
         else:
             self._periodicity = np.asarray(periodicity)
 
         if pos is not None:
-            self._pos = np.asarray(pos, dtype=float)
+            self._pos = np.array(pos, dtype=float)
         else:
             self._pos = np.zeros(3)
 
         self.parent = None
-        self.children = OrderedSet()
-        self.labels = OrderedDict()
-        self.referrers = set()
+        self._children = None
+        self._labels = None
+        self._referrers = None
 
         self.bond_graph = None
         self.port_particle = port_particle
+        self._index = None
+        self._root = self
+        self._topology_version = 0
+        self._coordinate_version = 0
 
         self._rigid_id = None
-        self._contains_rigid = False
-        self._check_if_contains_rigid_bodies = False
+        self._aggregates = None
+        self._rigid_bodies = None
 
         # self.add() must be called after labels and children are initialized.
         if subcompounds:
@@ -322,11 +1037,75 @@ class Compound(object):
                 raise MBuildError(
                     'Cannot set the charge of a Compound containing '
                     'subcompounds.')
-            self.add(subcompounds)
             self._charge = 0.0
+            self.add(subcompounds)
         else:
             self._charge = charge
 
+    # Incremented whenever any Compound is renamed, so that cached lookups by
+    # name can tell when they are stale.
+    _name_version = 0
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def children(self):
+        """The children of the Compound, an empty tuple for Particles. """
+        if self._children is None:
+            return ()
+        return self._children
+
+    @children.setter
+    def children(self, value):
+        self._children = value
+        self._aggregates = None
+
+    @property
+    def labels(self):
+        """Labels to Compound/Atom mappings, created on first access. """
+        if self._labels is None:
+            self._labels = _Labels()
+        return self._labels
+
+    @labels.setter
+    def labels(self, value):
+        if value is not None and not isinstance(value, _Labels):
+            value = _Labels(value)
+        self._labels = value
+
+    @property
+    def referrers(self):
+        """Other compounds that reference this part with labels. """
+        referrers = self._referrers
+        if not isinstance(referrers, set):
+            # A single referrer, typically the parent, is stored as is.
+            if referrers is None:
+                referrers = set()
+            else:
+                referrers = {referrers}
+            self._referrers = referrers
+        return referrers
+
+    @referrers.setter
+    def referrers(self, value):
+        self._referrers = value
+
+    def _add_referrer(self, referrer):
+        referrers = self._referrers
+        if referrers is None:
+            self._referrers = referrer
+        elif isinstance(referrers, set):
+            referrers.add(referrer)
+        elif referrers is not referrer:
+            self._referrers = {referrers, referrer}
+
+    @name.setter
+    def name(self, value):
+        self._name = value
+        Compound._name_version += 1
+
     def particles(self, include_ports=False):
         """Return all Particles of the Compound.
 
@@ -342,10 +1121,11 @@ class Compound(object):
 
         """
         if not self.children:
-            yield self
-        else:
-            for particle in self._particles(include_ports):
-                yield particle
+            return iter((self,))
+        index = self._particle_index()
+        if index is not None:
+            return iter(index.leaves(self, include_ports))
+        return self._particles(include_ports)
 
     def _particles(self, include_ports=False):
         """Return all Particles of the Compound. """
@@ -357,6 +1137,9 @@ class Compound(object):
     def successors(self):
         """Yield Compounds below self in the hierarchy.
 
+        The Compounds are yielded in preorder, read from the particle index
+        of the hierarchy when it is up to date.
+
         Yields
         -------
         mb.Compound
@@ -364,13 +1147,11 @@ class Compound(object):
 
         """
         if not self.children:
-            return
-        for part in self.children:
-            # Parts local to the current Compound.
-            yield part
-            # Parts further down the hierarchy.
-            for subpart in part.successors():
-                yield subpart
+            return iter(())
+        index = self._particle_index()
+        if index is not None:
+            return iter(index.successors(self))
+        return _preorder(self)
 
     @property
     def n_particles(self):
@@ -384,8 +1165,7 @@ class Compound(object):
         """
         if not self.children:
             return 1
-        else:
-            return self._n_particles(include_ports=False)
+        return self._aggregate()[1]
 
     def _n_particles(self, include_ports=False):
         """Return the number of Particles in the Compound. """
@@ -398,7 +1178,7 @@ class Compound(object):
         return True
 
     def ancestors(self):
-        """Generate all ancestors of the Compound recursively.
+        """Generate all ancestors of the Compound, from the parent upwards.
 
         Yields
         ------
@@ -406,10 +1186,10 @@ class Compound(object):
             The next Compound above self in the hierarchy
 
         """
-        if self.parent is not None:
-            yield self.parent
-            for ancestor in self.parent.ancestors():
-                yield ancestor
+        parent = self.parent
+        while parent is not None:
+            yield parent
+            parent = parent.parent
 
     @property
     def root(self):
@@ -421,12 +1201,19 @@ class Compound(object):
             The Compound at the top of self's hierarchy
 
         """
-        parent = None
-        for parent in self.ancestors():
-            pass
-        if parent is None:
-            return self
-        return parent
+        # `_root` always points at self or one of its ancestors. It goes
+        # stale when the cached Compound is itself added to a parent, in
+        # which case we hop upwards through the parents' cached roots and
+        # remember the result.
+        root = self._root
+        if root.parent is None:
+            return root
+        cached = root
+        while root.parent is not None:
+            root = root.parent._root
+        cached._root = root
+        self._root = root
+        return root
 
     def particles_by_name(self, name):
         """Return all Particles of the Compound with a specific name
@@ -442,18 +1229,126 @@ class Compound(object):
             The next Particle in the Compound with the user-specified name
 
         """
-        for particle in self.particles():
-            if particle.name == name:
-                yield particle
+        index = self._particle_index() if self.children else None
+        if index is None:
+            for particle in self.particles():
+                if particle.name == name:
+                    yield particle
+            return
+        start, stop = index.spans[self][:2]
+        matches = index.particles_named(name)
+        lo, hi = np.searchsorted(matches, [start, stop])
+        for i in matches[lo:hi]:
+            yield index.particles[i]
+
+    def select(self, name=None, element=None, within=None, x=None, y=None,
+               z=None, box=None, degree=None, rigid_id=None, indices=False):
+        """Return the Particles of the Compound that match all criteria.
+
+        The criteria are evaluated as vectorized masks over arrays of the
+        names, elements, positions, bond counts and rigid body IDs of all
+        Particles, which are cached until the hierarchy changes. Port
+        particles are never selected.
+
+        Parameters
+        ----------
+        name : str or list-like of str, optional
+            Select Particles with any of these names.
+        element : str or list-like of str, optional
+            Select Particles of any of these elements, as determined when
+            converting to ParmEd.
+        within : str or list-like of str, optional
+            Select Particles that are part of a Compound, or are themselves
+            Compounds, with any of these names, e.g. the name of a residue.
+        x, y, z : tuple of float, optional
+            Select Particles whose coordinate lies strictly between the two
+            bounds. Use None for an open bound, e.g. `z=(1.0, None)`.
+        box : mb.Box, optional
+            Select Particles inside the box, including its boundaries.
+        degree : int or list-like of int, optional
+            Select Particles with any of these numbers of bonds.
+        rigid_id : int or list-like of int, optional
+            Select Particles that belong to any of these rigid bodies.
+        indices : bool, optional, default=False
+            Return the positions of the selected Particles in
+            `self.particles()` instead of the Particles themselves.
+
+        Returns
+        -------
+        list of mb.Compound or np.ndarray, dtype=int
+            The selected Particles, in hierarchy order.
+
+        Examples
+        --------
+        Find the singly bonded oxygens above a surface:
+
+        >>> dangling = silica.select(name='O', z=(1.2, None), degree=1)
+
+        """
+        index = self.root._particle_index()
+        if self.children:
+            start, stop = index.spans[self][:2]
+            particles = index.particles[start:stop]
+        else:
+            particles = list(self.particles())
+        if not particles:
+            return np.empty(0, dtype=int) if indices else []
+        mask = np.ones(len(particles), dtype=bool)
+
+        if name is not None or element is not None or rigid_id is not None:
+            arrays = self._frozen_topology()['arrays']
+            if name is not None:
+                mask &= np.isin(arrays['names'], _as_names(name))
+            if element is not None:
+                mask &= np.isin(arrays['elements'], _as_names(element))
+            if rigid_id is not None:
+                mask &= np.isin(arrays['rigid_ids'], rigid_id)
+        if within is not None:
+            arrays = self._frozen_topology(residues=_as_names(within))['arrays']
+            mask &= arrays['residue_ids'] >= 0
+
+        if x is not None or y is not None or z is not None or box is not None:
+            xyz = self.xyz
+            for dim, bounds in enumerate((x, y, z)):
+                if bounds is None:
+                    continue
+                low, high = bounds
+                if low is not None:
+                    mask &= xyz[:, dim] > low
+                if high is not None:
+                    mask &= xyz[:, dim] < high
+            if box is not None:
+                mask &= np.all((xyz >= box.mins) & (xyz <= box.maxs), axis=1)
+
+        if degree is not None:
+            bond_graph = self.root.bond_graph
+            if bond_graph is None:
+                degrees = np.zeros(len(particles), dtype=int)
+            elif self.children:
+                degrees = index.degrees(bond_graph)[start:stop]
+            else:
+                degrees = np.array([len(bond_graph.neighbors(self))])
+            mask &= np.isin(degrees, degree)
+
+        selected = np.flatnonzero(mask)
+        if indices:
+            return selected
+        return [particles[i] for i in selected.tolist()]
 
     @property
     def charge(self):
-        return sum([particle._charge for particle in self.particles()])
+        if not self.children:
+            return self._charge
+        return self._aggregate()[0]
 
     @charge.setter
     def charge(self, value):
         if self._contains_only_ports():
+            before = self._contribution()
             self._charge = value
+            self._topology_changed()
+            if self.parent is not None:
+                self.parent._aggregate_changed(before, self._contribution())
         else:
             raise AttributeError(
                 "charge is immutable for Compounds that are "
@@ -466,9 +1361,12 @@ class Compound(object):
     @rigid_id.setter
     def rigid_id(self, value):
         if self._contains_only_ports():
+            before = self._contribution()
             self._rigid_id = value
-            for ancestor in self.ancestors():
-                ancestor._check_if_contains_rigid_bodies = True
+            self.root._rigid_bodies = None
+            self._topology_changed()
+            if self.parent is not None:
+                self.parent._aggregate_changed(before, self._contribution())
         else:
             raise AttributeError(
                 "rigid_id is immutable for Compounds that are "
@@ -490,19 +1388,14 @@ class Compound(object):
 
         Notes
         -----
-        The private variable '_check_if_contains_rigid_bodies' is used to help
-        cache the status of 'contains_rigid'. If '_check_if_contains_rigid_bodies'
-        is False, then the rigid body containment of the Compound has not changed,
-        and the particle tree is not traversed, boosting performance.
+        The number of rigid particles below each Compound is kept up to date
+        as parts are added and removed, so the particle tree is not
+        traversed.
 
         """
-        if self._check_if_contains_rigid_bodies:
-            self._check_if_contains_rigid_bodies = False
-            if any(particle.rigid_id is not None for particle in self._particles()):
-                self._contains_rigid = True
-            else:
-                self._contains_rigid = False
-        return self._contains_rigid
+        if not self.children:
+            return False
+        return self._aggregate()[2] > 0
 
     @property
     def max_rigid_id(self):
@@ -518,11 +1411,96 @@ class Compound(object):
             rigid body IDs are found, None is returned
 
         """
-        try:
-            return max([particle.rigid_id for particle in self.particles()
-                        if particle.rigid_id is not None])
-        except ValueError:
+        if not self.children:
+            return self._rigid_id
+        return self._aggregate()[3]
+
+    def _contribution(self):
+        """Return what `self` adds to the aggregates of its ancestors.
+
+        Returns
+        -------
+        tuple
+            The charge, the number of Particles, the number of rigid
+            Particles and the maximum rigid body ID (or None) of `self`.
+
+        """
+        if not self.children:
+            if self.port_particle:
+                return _NO_CONTRIBUTION
+            rigid_id = self._rigid_id
+            return self._charge, 1, int(rigid_id is not None), rigid_id
+        return tuple(self._aggregate())
+
+    def _aggregate(self):
+        """Return the aggregates of a Compound with children.
+
+        The aggregates are computed from the children the first time they
+        are needed, and so is the maximum rigid body ID after the part that
+        held it was removed.
+        """
+        aggregates = self._aggregates
+        if aggregates is None:
+            aggregates = [0.0, 0, 0, None]
+            for child in self._children:
+                _accumulate(aggregates, child._contribution())
+            self._aggregates = aggregates
+        elif aggregates[3] is _UNKNOWN:
+            max_rigid_id = None
+            for child in self._children:
+                child_max = child._contribution()[3]
+                if child_max is not None and (max_rigid_id is None or
+                                              child_max > max_rigid_id):
+                    max_rigid_id = child_max
+            aggregates[3] = max_rigid_id
+        return aggregates
+
+    def _aggregate_changed(self, before, after):
+        """Update the aggregates of `self` and its ancestors.
+
+        Parameters
+        ----------
+        before, after : tuple
+            What a part of `self` contributed before and after the change,
+            see `_contribution`.
+
+        """
+        if before == after:
             return
+        node = self
+        while node is not None:
+            aggregates = node._aggregates
+            if aggregates is not None:
+                aggregates[0] += after[0] - before[0]
+                aggregates[1] += after[1] - before[1]
+                aggregates[2] += after[2] - before[2]
+                max_rigid_id = aggregates[3]
+                if not aggregates[2]:
+                    aggregates[3] = None
+                elif max_rigid_id is not _UNKNOWN:
+                    gained, lost = after[3], before[3]
+                    if gained is not None and (max_rigid_id is None or
+                                               gained >= max_rigid_id):
+                        aggregates[3] = gained
+                    elif lost is not None and lost == max_rigid_id:
+                        # Other particles may share the ID; find out lazily.
+                        aggregates[3] = _UNKNOWN
+            node = node.parent
+
+    def _remove_child(self, child):
+        """Detach `child` from `self.children`, updating the aggregates. """
+        contribution = child._contribution()
+        if len(self._children) > 1:
+            self._children.remove(child)
+            self._aggregate_changed(contribution, _NO_CONTRIBUTION)
+        else:
+            # Without children `self` counts as a Particle again.
+            before = self._contribution()
+            self._children.remove(child)
+            self._aggregates = None
+            if self.parent is not None:
+                self.parent._aggregate_changed(before, self._contribution())
+        self._invalidate_index()
 
     def rigid_particles(self, rigid_id=None):
         """Generate all particles in rigid bodies.
@@ -542,13 +1520,68 @@ class Compound(object):
             particle with a matching rigid_id if specified
 
         """
-        for particle in self.particles():
-            if rigid_id is not None:
-                if particle.rigid_id == rigid_id:
-                    yield particle
-            else:
+        if not self.children:
+            if self._rigid_id is not None and rigid_id in (None,
+                                                           self._rigid_id):
+                yield self
+            return
+        if not self.contains_rigid:
+            return
+        if rigid_id is None:
+            for particle in self.particles():
                 if particle.rigid_id is not None:
                     yield particle
+            return
+
+        members = self._rigid_bodies_of_root().get(rigid_id, ())
+        if self.parent is None:
+            for particle in members:
+                yield particle
+        elif len(members) <= self.n_particles:
+            # Only keep the members of the body that are below `self`.
+            for particle in members:
+                for ancestor in particle.ancestors():
+                    if ancestor is self:
+                        yield particle
+                        break
+        else:
+            for particle in self.particles():
+                if particle.rigid_id == rigid_id:
+                    yield particle
+
+    def _rigid_bodies_of_root(self):
+        """Return the rigid bodies of this Compound's hierarchy.
+
+        The registry maps every rigid_id in the hierarchy to an ordered set
+        of the Particles carrying it, in hierarchy order. It is cached on the
+        root, dropped whenever a rigid_id is set or rigid parts are added and
+        rebuilt on demand. Removed Particles are taken out of it directly.
+
+        Returns
+        -------
+        dict
+            Maps each rigid_id to an OrderedSet of Particles.
+
+        """
+        root = self.root
+        bodies = root._rigid_bodies
+        if bodies is None:
+            bodies = dict()
+            if root.contains_rigid or root._rigid_id is not None:
+                for particle in root.particles():
+                    if particle._rigid_id is not None:
+                        members = bodies.get(particle._rigid_id)
+                        if members is None:
+                            members = bodies[particle._rigid_id] = OrderedSet()
+                        members.add(particle)
+            root._rigid_bodies = bodies
+        return bodies
+
+    def _rigid_body_ids(self):
+        """Return the sorted rigid_ids of the bodies in the Compound. """
+        if self.parent is None:
+            return sorted(self._rigid_bodies_of_root())
+        return sorted(set(p.rigid_id for p in self.rigid_particles()))
 
     def label_rigid_bodies(self, discrete_bodies=None, rigid_particles=None):
         """Designate which Compounds should be treated as rigid bodies
@@ -642,9 +1675,6 @@ class Compound(object):
 
     def unlabel_rigid_bodies(self):
         """Remove all rigid body labels from the Compound """
-        self._check_if_contains_rigid_bodies = True
-        for child in self.children:
-            child._check_if_contains_rigid_bodies = True
         for particle in self.particles():
             particle.rigid_id = None
 
@@ -659,26 +1689,44 @@ class Compound(object):
                 particle.rigid_id += increment
 
     def _reorder_rigid_ids(self):
-        """Reorder rigid body IDs ensuring consecutiveness.
+        """Reorder the rigid body IDs of the hierarchy ensuring consecutiveness.
 
         Primarily used internally to ensure consecutive rigid_ids following
         removal of a Compound.
 
         """
-        max_rigid = self.max_rigid_id
-        unique_rigid_ids = sorted(
-            set([p.rigid_id for p in self.rigid_particles()]))
-        n_unique_rigid = len(unique_rigid_ids)
-        if max_rigid and n_unique_rigid != max_rigid + 1:
-            missing_rigid_id = (
-                unique_rigid_ids[-1] * (unique_rigid_ids[-1] + 1)) / 2 - sum(unique_rigid_ids)
-            for successor in self.successors():
-                if successor.rigid_id is not None:
-                    if successor.rigid_id > missing_rigid_id:
-                        successor.rigid_id -= 1
-            if self.rigid_id:
-                if self.rigid_id > missing_rigid_id:
-                    self.rigid_id -= 1
+        # Close all gaps at once, however many bodies were removed, touching
+        # only the Particles of bodies whose ID changes.
+        root = self.root
+        bodies = root._rigid_bodies_of_root()
+        unique_rigid_ids = sorted(bodies)
+        if not unique_rigid_ids or \
+                unique_rigid_ids[-1] == len(unique_rigid_ids) - 1:
+            return
+        new_ids = dict()
+        renumbered = dict()
+        for new_id, old_id in enumerate(unique_rigid_ids):
+            renumbered[new_id] = bodies[old_id]
+            if new_id != old_id:
+                new_ids[old_id] = new_id
+
+        # The renumbering preserves the order of the IDs, so the maximum ID
+        # below any Compound is renumbered like the IDs themselves and the
+        # aggregates only need their maxima mapped.
+        seen = set()
+        for old_id, new_id in new_ids.items():
+            for particle in bodies[old_id]:
+                particle._rigid_id = new_id
+                ancestor = particle.parent
+                while ancestor is not None and ancestor not in seen:
+                    seen.add(ancestor)
+                    ancestor = ancestor.parent
+        for ancestor in seen:
+            aggregates = ancestor._aggregates
+            if aggregates is not None and aggregates[3] in new_ids:
+                aggregates[3] = new_ids[aggregates[3]]
+        root._rigid_bodies = renumbered
+        root._topology_changed()
 
     def add(self, new_child, label=None, containment=True, replace=False,
             inherit_periodicity=True, reset_rigid_ids=True):
@@ -712,8 +1760,7 @@ class Compound(object):
         # Support batch add via lists, tuples and sets.
         if (isinstance(new_child, Iterable) and
                 not isinstance(new_child, str)):
-            for child in new_child:
-                self.add(child, reset_rigid_ids=reset_rigid_ids)
+            self.add_many(new_child, reset_rigid_ids=reset_rigid_ids)
             return
 
         if not isinstance(new_child, Compound):
@@ -724,22 +1771,29 @@ class Compound(object):
         if new_child.contains_rigid or new_child.rigid_id is not None:
             if self.contains_rigid and reset_rigid_ids:
                 new_child._increment_rigid_ids(increment=self.max_rigid_id + 1)
-            self._check_if_contains_rigid_bodies = True
+            if containment:
+                self.root._rigid_bodies = None
         if self.rigid_id is not None:
             self.rigid_id = None
 
         # Create children and labels on the first add operation
-        if self.children is None:
-            self.children = OrderedSet()
-        if self.labels is None:
-            self.labels = OrderedDict()
+        if self._children is None:
+            self._children = OrderedSet()
+        if self._labels is None:
+            self._labels = _Labels()
 
         if containment:
             if new_child.parent is not None:
                 raise MBuildError('Part {} already has a parent: {}'.format(
                     new_child, new_child.parent))
-            self.children.add(new_child)
+            before = None if self._children else self._contribution()
+            self._children.add(new_child)
             new_child.parent = self
+            new_child._index = None
+            new_child._rigid_bodies = None
+            new_child._root = self.root
+            self._children_added(before, new_child._contribution())
+            self._invalidate_index()
 
             if new_child.bond_graph is not None:
                 if self.root.bond_graph is None:
@@ -750,29 +1804,215 @@ class Compound(object):
                 new_child.bond_graph = None
 
         # Add new_part to labels. Does not currently support batch add.
-        if label is None:
-            label = '{0}[$]'.format(new_child.__class__.__name__)
+        self._add_label(new_child, label, replace)
 
-        if label.endswith('[$]'):
-            label = label[:-3]
-            if label not in self.labels:
-                self.labels[label] = []
-            label_pattern = label + '[{}]'
+        if (inherit_periodicity and isinstance(new_child, Compound) and
+                new_child._periodicity is not None and
+                new_child._periodicity.any()):
+            self.periodicity = new_child.periodicity
+
+    def add_many(self, new_children, label=None, containment=True,
+                 replace=False, inherit_periodicity=True,
+                 reset_rigid_ids=True):
+        """Add many parts to the Compound in a single operation.
 
-            count = len(self.labels[label])
-            self.labels[label].append(new_child)
-            label = label_pattern.format(count)
+        Equivalent to calling `add` on every part in turn, but the root of
+        the hierarchy is resolved only once, bond graphs are merged in a
+        single pass and labels are assigned without re-validating the whole
+        Compound for every part. Use this when adding a large number of
+        children, e.g. when filling a box or populating a lattice.
 
-        if not replace and label in self.labels:
-            raise MBuildError('Label "{0}" already exists in {1}.'.format(
-                label, self))
+        Parameters
+        ----------
+        new_children : list-like of mb.Compound
+            The objects to be added to this Compound. Nested list-likes are
+            flattened.
+        label : str or list-like of str, optional
+            A descriptive string applied to every part, or one string per
+            part. A single string should end in '[$]' when adding more than
+            one part; defaults to '{ClassName}[$]'.
+        containment : bool, optional, default=True
+            Add the parts to self.children.
+        replace : bool, optional, default=False
+            Replace the label if it already exists.
+        inherit_periodicity : bool, optional, default=True
+            Replace the periodicity of self with the periodicity of the
+            last periodic Compound being added
+        reset_rigid_ids : bool, optional, default=True
+            If the Compounds to be added contain rigid bodies, reset the
+            rigid_ids such that values remain distinct from rigid_ids
+            already present in `self` and in each other.
+
+        See Also
+        --------
+        Compound.add
+
+        """
+        new_children = list(_flatten_compounds(new_children))
+        if not new_children:
+            return
+        if label is None or isinstance(label, str):
+            child_labels = [label] * len(new_children)
         else:
-            self.labels[label] = new_child
-        new_child.referrers.add(self)
+            child_labels = list(label)
+            if len(child_labels) != len(new_children):
+                raise ValueError('Received {} labels for {} parts.'.format(
+                    len(child_labels), len(new_children)))
+
+        # Validate everything up front so a bad part does not leave the
+        # Compound half-populated.
+        seen = set()
+        for new_child in new_children:
+            if not isinstance(new_child, Compound):
+                raise ValueError('Only objects that inherit from '
+                                 'mbuild.Compound can be added to Compounds. '
+                                 'You tried to add "{}".'.format(new_child))
+            if containment:
+                if new_child.parent is not None:
+                    raise MBuildError('Part {} already has a parent: '
+                                      '{}'.format(new_child, new_child.parent))
+                if new_child in seen:
+                    raise MBuildError('Part {} already has a parent: '
+                                      '{}'.format(new_child, self))
+                seen.add(new_child)
+        if not replace:
+            self._check_new_labels(new_children, child_labels)
+
+        # Keep a running maximum, as `self.max_rigid_id` only changes once
+        # the parts are in place.
+        rigid_children = [child for child in new_children
+                          if child.contains_rigid or child.rigid_id is not None]
+        if rigid_children:
+            max_rigid_id = self.max_rigid_id if self.contains_rigid else None
+            for child in rigid_children:
+                if max_rigid_id is not None and reset_rigid_ids:
+                    child._increment_rigid_ids(increment=max_rigid_id + 1)
+                child_max = child.max_rigid_id
+                if max_rigid_id is None or child_max > max_rigid_id:
+                    max_rigid_id = child_max
+            if containment:
+                self.root._rigid_bodies = None
+        if self.rigid_id is not None:
+            self.rigid_id = None
 
-        if (inherit_periodicity and isinstance(new_child, Compound) and
-                new_child.periodicity.any()):
-            self.periodicity = new_child.periodicity
+        if self._children is None:
+            self._children = OrderedSet()
+        if self._labels is None:
+            self._labels = _Labels()
+
+        if containment:
+            root = self.root
+            children = self._children
+            before = None if children else self._contribution()
+            added = [0.0, 0, 0, None]
+            graphs = []
+            for new_child in new_children:
+                children.add(new_child)
+                new_child.parent = self
+                new_child._index = None
+                new_child._rigid_bodies = None
+                new_child._root = root
+                _accumulate(added, new_child._contribution())
+                if new_child.bond_graph is not None:
+                    graphs.append(new_child.bond_graph)
+                    new_child.bond_graph = None
+            self._children_added(before, tuple(added))
+            self._invalidate_index()
+
+            if graphs:
+                if root.bond_graph is None:
+                    root.bond_graph = graphs.pop(0)
+                for graph in graphs:
+                    root.bond_graph.compose(graph)
+
+        for new_child, child_label in zip(new_children, child_labels):
+            self._add_label(new_child, child_label, replace)
+
+        if inherit_periodicity:
+            for new_child in reversed(new_children):
+                if (new_child._periodicity is not None and
+                        new_child._periodicity.any()):
+                    self.periodicity = new_child.periodicity
+                    break
+
+    def _children_added(self, before, contribution):
+        """Update the aggregates after children have been added to `self`.
+
+        Parameters
+        ----------
+        before : tuple or None
+            The contribution of `self` if it had no children before, else
+            None.
+        contribution : tuple
+            The combined contribution of the new children.
+
+        """
+        if before is None:
+            self._aggregate_changed(_NO_CONTRIBUTION, contribution)
+        else:
+            # A Particle turned container: its own charge and rigid_id no
+            # longer count, only what its children contribute.
+            self._aggregates = None
+            if self.parent is not None:
+                self.parent._aggregate_changed(before, self._contribution())
+
+    def _check_new_labels(self, new_children, labels):
+        """Raise if adding `new_children` under `labels` reuses a label.
+
+        The labels are resolved as `_add_label` would, without changing
+        anything, so that conflicts with existing labels or within the batch
+        are found before any part is added.
+        """
+        existing = self._labels if self._labels is not None else _Labels()
+        taken = set()
+        counts = dict()
+        for new_child, label in zip(new_children, labels):
+            if label is None:
+                label = '{0}[$]'.format(new_child.__class__.__name__)
+            if label.endswith('[$]'):
+                prefix = label[:-3]
+                count = counts.get(prefix)
+                if count is None:
+                    parts = existing._store.get(prefix)
+                    count = len(parts) if isinstance(parts, list) else 0
+                counts[prefix] = count + 1
+                label = '{0}[{1}]'.format(prefix, count)
+                conflict = label in existing._store or label in taken
+            else:
+                conflict = label in existing or label in taken
+            if conflict:
+                raise MBuildError('Label "{0}" already exists in {1}.'.format(
+                    label, self))
+            taken.add(label)
+
+    def _add_label(self, new_child, label, replace):
+        """Label `new_child`, numbering it automatically for '[$]' labels. """
+        labels = self.labels
+        if label is None:
+            label = '{0}[$]'.format(new_child.__class__.__name__)
+
+        if label.endswith('[$]'):
+            label = label[:-3]
+            label_list = labels.get(label)
+            if label_list is None:
+                label_list = labels[label] = []
+            label_list.append(new_child)
+            # The numbered label resolves to the part from the list; it only
+            # needs to be stored if it replaces an explicit label.
+            label = '{0}[{1}]'.format(label, len(label_list) - 1)
+            if label in labels._store:
+                if not replace:
+                    raise MBuildError('Label "{0}" already exists in '
+                                      '{1}.'.format(label, self))
+                labels[label] = new_child
+        elif label in labels._store or labels.get(label) is not new_child:
+            # A numbered label that already resolves to `new_child` from its
+            # list label need not be stored.
+            if not replace and label in labels:
+                raise MBuildError('Label "{0}" already exists in {1}.'.format(
+                    label, self))
+            labels[label] = new_child
+        new_child._add_referrer(self)
 
     def remove(self, objs_to_remove):
         """ Cleanly remove children from the Compound.
@@ -794,13 +2034,12 @@ class Compound(object):
             return
 
         # Remove Port objects separately
-        ports_removed = set()
-        for obj in objs_to_remove:
-            if isinstance(obj, Port):
-                ports_removed.add(obj)
-                self._remove(obj)
-                obj.parent.children.remove(obj)
-                self._remove_references(obj)
+        ports_removed = set(obj for obj in objs_to_remove
+                            if isinstance(obj, Port))
+        for port in ports_removed:
+            self._remove(port)
+            port.parent._remove_child(port)
+        self._remove_references(ports_removed)
 
         objs_to_remove = objs_to_remove - ports_removed
 
@@ -808,89 +2047,101 @@ class Compound(object):
         particles_to_remove = set([particle for obj in objs_to_remove
                                             for particle in obj.particles()])
 
-        # Recursively get container compounds to remove
-        to_remove = list()
-
-        def _check_if_empty(child):
-            if child in to_remove:
-                return
-            if set(child.particles()).issubset(particles_to_remove):
-                if child.parent:
-                    to_remove.append(child)
-                    _check_if_empty(child.parent)
-                else:
-                    warn("This will remove all particles in "
-                            "compound {}".format(self))
-            return
-
+        # A container is removed as well once all of its particles are.
+        n_removed = defaultdict(int)
         for particle in particles_to_remove:
-            _check_if_empty(particle)
+            for ancestor in particle.ancestors():
+                n_removed[ancestor] += 1
+
+        to_remove = list()
+        for part in itertools.chain(particles_to_remove, n_removed):
+            if part.children and n_removed.get(part) != part.n_particles:
+                continue
+            if part.parent is not None:
+                to_remove.append(part)
+            else:
+                warn("This will remove all particles in "
+                     "compound {}".format(self))
+        self._invalidate_index()
 
         # Fix rigid_ids and remove obj from bondgraph
         for removed_part in to_remove:
-            self._remove(removed_part)
+            self._remove(removed_part, removed=particles_to_remove)
 
         # Remove references to object
         for removed_part in to_remove:
             if removed_part.parent is not None:
-                removed_part.parent.children.remove(removed_part)
-            self._remove_references(removed_part)
+                removed_part.parent._remove_child(removed_part)
+        self._remove_references(to_remove)
 
         # Remove ghost ports
-        all_ports_list = list(self.all_ports())
-        for port in all_ports_list:
-            if port.anchor not in [i for i in self.particles()]:
-                port.parent.children.remove(port)
+        remaining = set(self.particles())
+        for port in self.all_ports():
+            if port.anchor not in remaining:
+                port.parent._remove_child(port)
 
         # Check and reorder rigid id
-        for _ in particles_to_remove:
-            if self.contains_rigid:
-                self.root._reorder_rigid_ids()
-
-
-    def _remove(self, removed_part):
-        """Worker for remove(). Fixes rigid IDs and removes bonds"""
-        if removed_part.rigid_id is not None:
-            for ancestor in removed_part.ancestors():
-                ancestor._check_if_contains_rigid_bodies = True
-        if self.root.bond_graph and self.root.bond_graph.has_node(
-                removed_part):
-            for neighbor in self.root.bond_graph.neighbors(
-                    removed_part):
-                self.root.remove_bond((removed_part, neighbor))
-            self.root.bond_graph.remove_node(removed_part)
-
-
-    def _remove_references(self, removed_part):
-        """Remove labels pointing to this part and vice versa. """
-        removed_part.parent = None
-
-        # Remove labels in the hierarchy pointing to this part.
-        referrers_to_remove = set()
-        for referrer in removed_part.referrers:
-            if removed_part not in referrer.ancestors():
-                for label, referred_part in list(referrer.labels.items()):
-                    if referred_part is removed_part:
-                        del referrer.labels[label]
-                        referrers_to_remove.add(referrer)
-        removed_part.referrers -= referrers_to_remove
-
-        # Remove labels in this part pointing into the hierarchy.
-        labels_to_delete = []
-        if isinstance(removed_part, Compound):
-            for label, part in list(removed_part.labels.items()):
+        root = self.root
+        bodies = root._rigid_bodies
+        if bodies is not None:
+            for particle in particles_to_remove:
+                members = bodies.get(particle.rigid_id)
+                if members is not None:
+                    members.discard(particle)
+                    if not members:
+                        del bodies[particle.rigid_id]
+        if particles_to_remove and root.contains_rigid:
+            root._reorder_rigid_ids()
+
+    def _remove(self, removed_part, removed=()):
+        """Worker for remove(). Fixes rigid IDs and removes bonds
+
+        Bonds to Particles in `removed`, which are being removed as well, are
+        deleted without adding Ports in their place.
+        """
+        bond_graph = self.root.bond_graph
+        if bond_graph and bond_graph.has_node(removed_part):
+            for neighbor in bond_graph.neighbors(removed_part):
+                if neighbor in removed:
+                    bond_graph.remove_edge(removed_part, neighbor)
+                else:
+                    self.root.remove_bond((removed_part, neighbor))
+            bond_graph.remove_node(removed_part)
+
+    def _remove_references(self, removed_parts):
+        """Remove labels pointing to these parts and vice versa. """
+        # Labels are collected per referrer so that each referrer's labels
+        # are scanned only once, however many of its parts are removed.
+        stale_labels = defaultdict(set)
+        pending = list(removed_parts)
+        while pending:
+            removed_part = pending.pop()
+            removed_part.parent = None
+            removed_part._root = removed_part
+            removed_part._topology_changed()
+            removed_part._coordinates_changed()
+            for part in removed_part.successors():
+                part._root = removed_part
+
+            # Labels in the hierarchy pointing to this part.
+            for referrer in _referrer_set(removed_part._referrers):
+                if removed_part not in referrer.ancestors():
+                    stale_labels[referrer].add(removed_part)
+
+            # Remove labels in this part pointing into the hierarchy.
+            labels_to_delete = []
+            for label, part in list((removed_part._labels or {}).items()):
                 if not isinstance(part, Compound):
-                    for p in part:
-                        self._remove_references(p)
+                    pending.extend(part)
                 elif removed_part not in part.ancestors():
-                    try:
-                        part.referrers.discard(removed_part)
-                    except KeyError:
-                        pass
-                    else:
-                        labels_to_delete.append(label)
-        for label in labels_to_delete:
-            removed_part.labels.pop(label, None)
+                    part.referrers.discard(removed_part)
+                    labels_to_delete.append(label)
+            for label in labels_to_delete:
+                removed_part.labels.pop(label, None)
+
+        for referrer, parts in stale_labels.items():
+            for part in referrer.labels._remove_parts(parts):
+                part.referrers.discard(referrer)
 
     def referenced_ports(self):
         """Return all Ports referenced by this Compound.
@@ -915,9 +2166,19 @@ class Compound(object):
 
         """
         from mbuild.port import Port
+        if not self.children:
+            return []
+        index = self._particle_index()
+        if index is not None:
+            return index.ports_of(self)
         return [successor for successor in self.successors()
                 if isinstance(successor, Port)]
 
+    def _materialize_ports(self):
+        """Build the subports of all compact Ports in the hierarchy. """
+        for port in self.all_ports():
+            port._materialize()
+
     def available_ports(self):
         """Return all unoccupied Ports referenced by this Compound.
 
@@ -944,12 +2205,18 @@ class Compound(object):
         bond_graph.edges_iter : Iterates over all edges in a BondGraph
 
         """
-        if self.root.bond_graph:
-            if self.root == self:
-                return self.root.bond_graph.edges_iter()
-            else:
-                return self.root.bond_graph.subgraph(
-                    self.particles()).edges_iter()
+        root = self.root
+        if root.bond_graph:
+            if root == self:
+                return root.bond_graph.edges_iter()
+            if not self.children:
+                return iter(())
+            index = self._particle_index()
+            if index is not None:
+                particles = index.particles
+                return ((particles[i], particles[j]) for i, j in
+                        index.bonds(self, root.bond_graph).tolist())
+            return root.bond_graph.subgraph(self.particles()).edges_iter()
         else:
             return iter(())
 
@@ -963,6 +2230,14 @@ class Compound(object):
             The number of bonds in the Compound
 
         """
+        root = self.root
+        if root.bond_graph is None:
+            return 0
+        if root == self:
+            return root.bond_graph.number_of_edges()
+        index = self._particle_index()
+        if index is not None and self.children:
+            return len(index.bonds(self, root.bond_graph))
         return sum(1 for _ in self.bonds())
 
     def add_bond(self, particle_pair):
@@ -978,10 +2253,16 @@ class Compound(object):
             self.root.bond_graph = BondGraph()
 
         self.root.bond_graph.add_edge(particle_pair[0], particle_pair[1])
+        self._topology_changed()
 
-    def generate_bonds(self, name_a, name_b, dmin, dmax):
+    def generate_bonds(self, name_a=None, name_b=None, dmin=None, dmax=None,
+                       box=None, rules=None):
         """Add Bonds between all pairs of types a/b within [dmin, dmax].
 
+        All pairs within the largest `dmax` are found in a single search with
+        a `CellList` over the Particles named in any rule, and the matching
+        pairs are added to the bond graph at once.
+
         Parameters
         ----------
         name_a : str
@@ -992,26 +2273,62 @@ class Compound(object):
             The minimum distance between Particles for considering a bond
         dmax : float
             The maximum distance between Particles for considering a bond
+        box : mb.Box, optional, default=None
+            Periodic box to use instead of `self.periodicity`, which may be
+            triclinic (e.g. from `mb.Lattice.get_populated_box`).
+        rules : list of tuple, optional, default=None
+            Several `(name_a, name_b, dmin, dmax)` rules to apply in one
+            pass, instead of `name_a`, `name_b`, `dmin` and `dmax`.
+
+        Examples
+        --------
+        >>> silica.generate_bonds(rules=[('Si', 'O', 0.0, 0.20419),
+        ...                              ('O', 'H', 0.0, 0.11)])
 
         """
-        particle_kdtree = PeriodicCKDTree(
-            data=self.xyz, bounds=self.periodicity)
-        particle_array = np.array(list(self.particles()))
-        added_bonds = list()
-        for p1 in self.particles_by_name(name_a):
-            nearest = self.particles_in_range(p1, dmax, max_particles=20,
-                                              particle_kdtree=particle_kdtree,
-                                              particle_array=particle_array)
-            for p2 in nearest:
-                if p2 == p1:
-                    continue
-                bond_tuple = (p1, p2) if id(p1) < id(p2) else (p2, p1)
-                if bond_tuple in added_bonds:
-                    continue
-                min_dist = self.min_periodic_distance(p2.pos, p1.pos)
-                if (p2.name == name_b) and (dmin <= min_dist <= dmax):
-                    self.add_bond((p1, p2))
-                    added_bonds.append(bond_tuple)
+        single = (name_a, name_b, dmin, dmax)
+        if rules is None:
+            if any(arg is None for arg in single):
+                raise ValueError('name_a, name_b, dmin and dmax are required '
+                                 'unless rules are given.')
+            rules = [single]
+        elif any(arg is not None for arg in single):
+            raise ValueError('Either rules or name_a, name_b, dmin and dmax '
+                             'may be given, not both.')
+        rules = [tuple(rule) for rule in rules]
+        if any(len(rule) != 4 for rule in rules):
+            raise ValueError('Every rule must be a tuple (name_a, name_b, '
+                             'dmin, dmax), got {}.'.format(rules))
+        cutoff = max((rule[3] for rule in rules), default=0)
+        if cutoff <= 0:
+            return
+
+        selected = {name: self.select(name=name, indices=True)
+                    for rule in rules for name in rule[:2]}
+        # Only Particles named in any rule need to be binned.
+        candidates = np.unique(np.concatenate(list(selected.values())))
+        if len(candidates) < 2:
+            return
+        pairs, distances = self._cell_list(cutoff, box, candidates).pairs(
+            return_distances=True)
+        pairs = candidates[pairs]
+
+        keep = np.zeros(len(pairs), dtype=bool)
+        named = dict()
+        for name_a, name_b, dmin, dmax in rules:
+            for name in (name_a, name_b):
+                if name not in named:
+                    named[name] = np.isin(pairs, selected[name])
+            is_a, is_b = named[name_a], named[name_b]
+            keep |= (((is_a[:, 0] & is_b[:, 1]) | (is_b[:, 0] & is_a[:, 1])) &
+                     (dmin <= distances) & (distances <= dmax))
+        if not keep.any():
+            return
+        root = self.root
+        if root.bond_graph is None:
+            root.bond_graph = BondGraph()
+        root.bond_graph._add_edge_array(list(self.particles()), pairs[keep])
+        self._topology_changed()
 
     def remove_bond(self, particle_pair):
         """Deletes a bond between a pair of Particles
@@ -1028,6 +2345,7 @@ class Compound(object):
             warn("Bond between {} and {} doesn't exist!".format(*particle_pair))
             return
         self.root.bond_graph.remove_edge(*particle_pair)
+        self._topology_changed()
         bond_vector = particle_pair[0].pos - particle_pair[1].pos
         if np.allclose(bond_vector, np.zeros(3)):
             warn("Particles {} and {} overlap! Ports will not be added."
@@ -1051,23 +2369,107 @@ class Compound(object):
     @pos.setter
     def pos(self, value):
         if not self.children:
-            self._pos = value
+            # Write in place so the root's coordinate buffer stays current.
+            self._pos[...] = value
+            self._coordinates_changed()
         else:
             raise MBuildError('Cannot set position on a Compound that has'
                               ' children.')
 
     @property
     def periodicity(self):
+        if self._periodicity is None:
+            # Created on first access so that in-place edits persist.
+            self._periodicity = np.zeros(3)
         return self._periodicity
 
     @periodicity.setter
     def periodicity(self, periods):
         self._periodicity = np.array(periods)
 
+    def _particle_index(self):
+        """Return the particle index of this Compound's hierarchy.
+
+        The index is (re)built lazily when requested from the root. For
+        Compounds further down the hierarchy None is returned if the root's
+        index is out of date, so that repeatedly querying a small part of a
+        growing hierarchy does not rebuild the entire index each time.
+
+        Returns
+        -------
+        _ParticleIndex or None
+
+        """
+        root = self.root
+        index = root._index
+        if index is None and root is self:
+            index = _ParticleIndex(root)
+            root._index = index
+        return index
+
+    def _coordinates(self):
+        """Return the particle index if it backs particle positions. """
+        index = self._particle_index()
+        if index is not None and not index.bound:
+            return None
+        return index
+
+    def _invalidate_index(self):
+        """Mark the particle index of this Compound's hierarchy stale. """
+        self.root._index = None
+        # Adding or removing parts also changes the hierarchy's coordinates.
+        self._topology_changed()
+        self._coordinates_changed()
+
+    @property
+    def topology_version(self):
+        """A number that changes whenever the topology of the hierarchy does.
+
+        The version belongs to the root of the hierarchy and is advanced when
+        parts are added or removed anywhere in it, when bonds are added or
+        removed and when the charge or rigid body ID of a Particle changes.
+        Results derived from the topology can be stored together with the
+        version and reused for as long as it is unchanged.
+
+        See Also
+        --------
+        Compound.coordinate_version
+
+        """
+        return self.root._topology_version
+
+    @property
+    def coordinate_version(self):
+        """A number that changes whenever coordinates in the hierarchy do.
+
+        The version belongs to the root of the hierarchy and is advanced by
+        writes through `pos`, `xyz`, `xyz_with_ports` (and so by
+        `translate`, `rotate` and friends) and by every change of the
+        topology. Coordinates modified in place through the arrays returned
+        by these properties are not tracked.
+
+        See Also
+        --------
+        Compound.topology_version
+
+        """
+        return self.root._coordinate_version
+
+    def _topology_changed(self):
+        self.root._topology_version = next(_versions)
+
+    def _coordinates_changed(self):
+        self.root._coordinate_version = next(_versions)
+
     @property
     def xyz(self):
         """Return all particle coordinates in this compound.
 
+        For Compounds with children this is a view into the coordinate buffer
+        shared by the whole hierarchy whenever that buffer is current, so it
+        reflects later changes to particle positions. Use `xyz.copy()` to keep
+        a snapshot.
+
         Returns
         -------
         pos : np.ndarray, shape=(n, 3), dtype=float
@@ -1076,6 +2478,9 @@ class Compound(object):
         if not self.children:
             pos = np.expand_dims(self._pos, axis=0)
         else:
+            index = self._coordinates()
+            if index is not None:
+                return index.get(self)
             arr = np.fromiter(itertools.chain.from_iterable(
                 particle.pos for particle in self.particles()), dtype=float)
             pos = arr.reshape((-1, 3))
@@ -1094,6 +2499,9 @@ class Compound(object):
         if not self.children:
             pos = self._pos
         else:
+            index = self._coordinates()
+            if index is not None:
+                return index.get(self, include_ports=True)
             arr = np.fromiter(
                 itertools.chain.from_iterable(
                     particle.pos for particle in self.particles(
@@ -1121,6 +2529,11 @@ class Compound(object):
                         self, arrnx3))
             self.pos = np.squeeze(arrnx3)
         else:
+            index = self._coordinates()
+            if index is not None:
+                index.set(self, arrnx3)
+                self._coordinates_changed()
+                return
             for atom, coords in zip(
                 self._particles(
                     include_ports=False), arrnx3):
@@ -1144,6 +2557,11 @@ class Compound(object):
                         self, arrnx3))
             self.pos = np.squeeze(arrnx3)
         else:
+            index = self._coordinates()
+            if index is not None:
+                index.set(self, arrnx3, include_ports=True)
+                self._coordinates_changed()
+                return
             for atom, coords in zip(
                 self._particles(
                     include_ports=True), arrnx3):
@@ -1176,7 +2594,7 @@ class Compound(object):
         xyz = self.xyz
         return Box(mins=xyz.min(axis=0), maxs=xyz.max(axis=0))
 
-    def min_periodic_distance(self, xyz0, xyz1):
+    def min_periodic_distance(self, xyz0, xyz1, box=None):
         """Vectorized distance calculation considering minimum image.
 
         Parameters
@@ -1185,6 +2603,10 @@ class Compound(object):
             Coordinates of first point
         xyz1 : np.ndarray, shape=(3,), dtype=float
             Coordinates of second point
+        box : mb.Box, optional, default=None
+            Periodic box to use instead of `self.periodicity`. The box may
+            be triclinic, in which case the minimum image is taken along the
+            box vectors.
 
         Returns
         -------
@@ -1193,17 +2615,62 @@ class Compound(object):
             image convention
 
         """
+        if box is not None and not np.allclose(box.angles, 90.0):
+            d = _minimum_image(np.asarray(xyz0) - np.asarray(xyz1),
+                               box.vectors)
+            return np.sqrt((d ** 2).sum(axis=-1))
+        periodicity = self.periodicity if box is None else box.lengths
         d = np.abs(xyz0 - xyz1)
-        d = np.where(d > 0.5 * self.periodicity, self.periodicity - d, d)
+        d = np.where(d > 0.5 * periodicity, periodicity - d, d)
         return np.sqrt((d ** 2).sum(axis=-1))
 
+    def _periodic_kdtree(self, box=None):
+        """Return a PeriodicCKDTree of the Particles in the Compound.
+
+        The tree is periodic in `self.periodicity`, or in `box` if given. It
+        is cached on the particle index and only reused while it holds the
+        current coordinates, as writes through the `xyz` and `pos` views do
+        not advance `coordinate_version`.
+        """
+        if box is None:
+            bounds, angles = self.periodicity, None
+        else:
+            bounds, angles = box.lengths, box.angles
+        if not self.children:
+            return PeriodicCKDTree(data=self.xyz, bounds=bounds,
+                                   angles=angles)
+        index = self.root._particle_index()
+        key = (self, tuple(bounds), None if angles is None else tuple(angles))
+        cached = index.trees.get(key)
+        xyz = self.xyz
+        if (cached is None or cached[0] != self.coordinate_version or
+                not np.array_equal(cached[1].real_data, xyz)):
+            cached = (self.coordinate_version,
+                      PeriodicCKDTree(data=xyz.copy(), bounds=bounds,
+                                      angles=angles))
+            index.trees[key] = cached
+        return cached[1]
+
+    def _cell_list(self, cutoff, box=None, rows=None):
+        """Return a CellList of the Particles in the Compound.
+
+        The cell list is periodic in `self.periodicity`, or in `box` if
+        given. If `rows` is given, only the Particles at these positions in
+        `self.particles()` are binned.
+        """
+        xyz = self.xyz if rows is None else self.xyz[rows]
+        if box is None:
+            return CellList(xyz, cutoff, bounds=self.periodicity)
+        return CellList(xyz, cutoff, bounds=box.lengths, angles=box.angles)
+
     def particles_in_range(
             self,
             compound,
             dmax,
             max_particles=20,
             particle_kdtree=None,
-            particle_array=None):
+            particle_array=None,
+            box=None):
         """Find particles within a specified range of another particle.
 
         Parameters
@@ -1211,36 +2678,159 @@ class Compound(object):
         compound : mb.Compound
             Reference particle to find other particles in range of
         dmax : float
-            Maximum distance from 'compound' to look for Particles
+            Maximum distance from 'compound' to look for Particles; Particles
+            exactly `dmax` away are not returned
         max_particles : int, optional, default=20
             Maximum number of Particles to return
         particle_kdtree : mb.PeriodicCKDTree, optional
             KD-tree for looking up nearest neighbors. If not provided, a KD-
-            tree will be generated from all Particles in self
+            tree of all Particles in self is built, or reused if the
+            coordinates have not changed since
         particle_array : np.ndarray, shape=(n,), dtype=mb.Compound, optional
             Array of possible particles to consider for return. If not
             provided, this defaults to all Particles in self
+        box : mb.Box, optional, default=None
+            Periodic box to search in instead of `self.periodicity`, which
+            may be triclinic. Ignored if `particle_kdtree` is given.
 
         Returns
         -------
         np.ndarray, shape=(n,), dtype=mb.Compound
-            Particles in range of compound according to user-defined limits
+            Particles in range of compound according to user-defined limits,
+            nearest first
 
         See Also
         --------
+        Compound.particles_in_range_many : Search around many positions
         periodic_kdtree.PerioidicCKDTree : mBuild implementation of kd-trees
         scipy.spatial.ckdtree : Further details on kd-trees
 
         """
         if particle_kdtree is None:
-            particle_kdtree = PeriodicCKDTree(
-                data=self.xyz, bounds=self.periodicity)
-        _, idxs = particle_kdtree.query(
-            compound.pos, k=max_particles, distance_upper_bound=dmax)
-        idxs = idxs[idxs != self.n_particles]
-        if particle_array is None:
-            particle_array = np.array(list(self.particles()))
-        return particle_array[idxs]
+            particle_kdtree = self._periodic_kdtree(box)
+        if max_particles is None:
+            max_particles = particle_kdtree.n
+        if particle_kdtree.n and max_particles:
+            _, idxs = particle_kdtree.query(
+                compound.pos, k=max_particles, distance_upper_bound=dmax)
+            idxs = np.atleast_1d(idxs)
+            idxs = idxs[idxs != particle_kdtree.n]
+        else:
+            idxs = np.empty(0, dtype=int)
+        if particle_array is not None:
+            return particle_array[idxs]
+        index = self._particle_index() if self.children else None
+        if index is None:
+            particles, start = list(self.particles()), 0
+        else:
+            particles, start = index.particles, index.spans[self][0]
+        found = np.empty(len(idxs), dtype=object)
+        for i, idx in enumerate(idxs.tolist()):
+            found[i] = particles[start + idx]
+        return found
+
+    def particles_in_range_many(self, compounds, dmax, max_particles=None,
+                                box=None):
+        """Find the particles within a specified range of many positions.
+
+        All positions are looked up in a single KD-tree of the Particles in
+        the Compound. The tree is kept for as long as the coordinates of the
+        Compound are unchanged, so repeated queries do not rebuild it.
+
+        Parameters
+        ----------
+        compounds : iterable of mb.Compound or array-like, shape=(m, 3)
+            Reference Compounds, or positions, to find Particles in range of
+        dmax : float
+            Particles closer than this to a reference are returned, as in
+            `particles_in_range`
+        max_particles : int, optional, default=None
+            Maximum number of Particles to return per reference, nearest
+            first. By default all Particles within `dmax` are returned.
+        box : mb.Box, optional, default=None
+            Periodic box to search in instead of `self.periodicity`, which
+            may be triclinic.
+
+        Returns
+        -------
+        indptr : np.ndarray, shape=(m + 1,), dtype=int
+            The Particles in range of the i-th reference are
+            `indices[indptr[i]:indptr[i + 1]]`.
+        indices : np.ndarray, dtype=int
+            Positions of the Particles in range in `self.particles()`,
+            nearest first for every reference.
+        distances : np.ndarray, dtype=float
+            Minimum image distance of every Particle to its reference.
+
+        """
+        if isinstance(compounds, Compound):
+            compounds = [compounds]
+        compounds = list(compounds) if not isinstance(
+            compounds, np.ndarray) else compounds
+        if len(compounds) and isinstance(compounds[0], Compound):
+            x = np.array([compound.pos for compound in compounds],
+                         dtype=float)
+        else:
+            x = np.asarray(compounds, dtype=float)
+        x = x.reshape((-1, 3))
+
+        tree = self._periodic_kdtree(box)
+        k = 0
+        if len(x) and tree.n:
+            k = int(np.max(tree.query_ball_point(x, dmax, return_length=True)))
+        if max_particles is not None:
+            k = min(k, max_particles)
+        if k == 0:
+            return (np.zeros(len(x) + 1, dtype=int), np.empty(0, dtype=int),
+                    np.empty(0))
+        distances, indices = tree.query(x, k=k, distance_upper_bound=dmax)
+        distances = distances.reshape((len(x), k))
+        indices = indices.reshape((len(x), k))
+        found = indices != tree.n
+        indptr = np.zeros(len(x) + 1, dtype=int)
+        np.cumsum(found.sum(axis=1), out=indptr[1:])
+        return indptr, indices[found], distances[found]
+
+    def find_overlaps(self, dmin=0.1, box=None, exclude_bonded=True,
+                      indices=False):
+        """Find all pairs of Particles closer than a minimum distance.
+
+        Parameters
+        ----------
+        dmin : float, optional, default=0.1
+            Particles closer than this are considered to overlap, in nm
+        box : mb.Box, optional, default=None
+            Periodic box to use instead of `self.periodicity`, which may be
+            triclinic.
+        exclude_bonded : bool, optional, default=True
+            Do not report pairs of Particles that are bonded to each other.
+        indices : bool, optional, default=False
+            Return the positions of the Particles in `self.particles()`
+            instead of the Particles themselves.
+
+        Returns
+        -------
+        list of tuple of mb.Compound or np.ndarray, shape=(m, 2), dtype=int
+            The overlapping pairs of Particles, sorted by the position of
+            the first and then the second Particle.
+
+        """
+        if not self.children:
+            return np.empty((0, 2), dtype=int) if indices else []
+        pairs, distances = self._cell_list(dmin, box).pairs(
+            return_distances=True)
+        pairs = pairs[distances < dmin]
+        bond_graph = self.root.bond_graph
+        if exclude_bonded and bond_graph is not None and len(pairs):
+            index = self.root._particle_index()
+            bonds = index.bonds(self, bond_graph) - index.spans[self][0]
+            n = self.n_particles
+            pairs = pairs[~np.isin(pairs[:, 0] * n + pairs[:, 1],
+                                   bonds[:, 0] * n + bonds[:, 1])]
+        if indices:
+            return pairs
+        particles = list(self.particles())
+        return [(particles[i], particles[j]) for i, j in pairs.tolist()]
 
     def visualize(self, show_ports=False,
             backend='py3dmol', color_scheme={}): # pragma: no cover
@@ -1262,6 +2852,8 @@ class Compound(object):
             i.e. {'_CGBEAD': 'blue'}
 
         """
+        if show_ports:
+            self._materialize_ports()
         viz_pkg = {'nglview': self._visualize_nglview,
                 'py3dmol': self._visualize_py3dmol}
         if run_from_ipython():
@@ -1395,7 +2987,7 @@ class Compound(object):
 
         """
         if update_port_locations:
-            xyz_init = self.xyz
+            xyz_init = self.xyz.copy()
             self = load(filename, compound=self, coords_only=True)
             self._update_port_locations(xyz_init)
         else:
@@ -1416,13 +3008,41 @@ class Compound(object):
             Reference coordinates to use for comparing how far anchor Particles
             have shifted.
 
+        Notes
+        -----
+        Anchors are mapped to rows of `initial_coordinates` in one pass and,
+        when the coordinates are held by the particle index, the particles
+        of all Ports are shifted with a single array operation. Ports whose
+        anchor is not part of this Compound are left in place.
+
         """
-        particles = list(self.particles())
+        row_of = {particle: i for i, particle in enumerate(self.particles())}
+        ports = list()
+        rows = list()
         for port in self.all_ports():
-            if port.anchor:
-                idx = particles.index(port.anchor)
-                shift = particles[idx].pos - initial_coordinates[idx]
+            row = row_of.get(port.anchor)
+            if row is not None:
+                ports.append(port)
+                rows.append(row)
+        if not ports:
+            return
+        rows = np.array(rows, dtype=int)
+        shifts = self.xyz[rows] - np.asarray(initial_coordinates)[rows]
+
+        index = self.root._coordinates()
+        if index is None:
+            for port, shift in zip(ports, shifts):
                 port.translate(shift)
+            return
+
+        # The particles of each Port occupy a contiguous range of rows.
+        starts = np.array([index.spans[port][2] for port in ports], dtype=int)
+        counts = np.array([index.spans[port][3] for port in ports],
+                          dtype=int) - starts
+        offsets = np.repeat(np.cumsum(counts) - counts - starts, counts)
+        port_rows = np.arange(counts.sum()) - offsets
+        index.xyz[port_rows] += np.repeat(shifts, counts, axis=0)
+        self._coordinates_changed()
 
     def _kick(self):
         """Slightly adjust all coordinates in a Compound
@@ -1430,7 +3050,7 @@ class Compound(object):
         Provides a slight adjustment to coordinates to kick them out of local
         energy minima.
         """
-        xyz_init = self.xyz
+        xyz_init = self.xyz.copy()
         for particle in self.particles():
             particle.pos += (np.random.rand(3,) - 0.5) / 100
         self._update_port_locations(xyz_init)
@@ -1824,6 +3444,158 @@ class Compound(object):
 
         obConversion.WriteFile(mol, os.path.join(tmp_dir, 'minimized.pdb'))
 
+    def freeze(self, show_ports=False, residues=None, chains=None, box=None):
+        """Return an immutable, array-backed snapshot of the Compound.
+
+        The snapshot holds flat arrays of the names, elements, charges,
+        positions, bonds, residues, chains, molecules and rigid bodies of all
+        particles and can be passed to the writers in `mbuild.formats`
+        instead of a ParmEd Structure. The topology part of the snapshot is
+        built in a single traversal and reused until the topology or any
+        particle name changes, so repeatedly exporting a large system does
+        not walk the hierarchy again. Coordinates are copied on every call.
+
+        Parameters
+        ----------
+        show_ports : bool, optional, default=False
+            Include all port atoms in the snapshot.
+        residues : str of list of str, optional, default=None
+            Labels of residues in the Compound. Residues are assigned by
+            checking against Compound.name.
+        chains : str of list of str, optional, default=None
+            Labels of chains in the Compound. Chains are assigned by checking
+            against Compound.name.
+        box : mb.Box, optional, default=None
+            Box information to store with the snapshot. If None, a box is
+            derived from `self.periodicity` and the bounding box on export.
+
+        Returns
+        -------
+        mb.FlatSystem
+
+        See Also
+        --------
+        mbuild.flat_system.FlatSystem
+
+        """
+        if show_ports:
+            self._materialize_ports()
+        if isinstance(residues, str):
+            residues = [residues]
+        if isinstance(residues, (list, set)):
+            residues = tuple(residues)
+        if isinstance(chains, str):
+            chains = [chains]
+        if isinstance(chains, (list, set)):
+            chains = tuple(chains)
+
+        topology = self._frozen_topology(show_ports, residues, chains)
+        if not topology['reported']:
+            # Guesses are reported once, not each time the cached topology
+            # is reused.
+            for name, element in topology['guessed_elements']:
+                warn('Guessing that "{}" is element: "{}"'.format(name,
+                                                                  element))
+            topology['reported'] = True
+
+        if show_ports:
+            xyz = self.xyz_with_ports
+        else:
+            xyz = self.xyz
+        return FlatSystem(title=self.name, xyz=xyz,
+                          periodicity=self.periodicity, box=box,
+                          residues=residues, chains=chains,
+                          **topology['arrays'])
+
+    def _frozen_topology(self, show_ports=False, residues=None, chains=None):
+        """Return the cached flat topology of the Compound. """
+        index = self.root._particle_index()
+        key = (self, show_ports, residues, chains)
+        versions = (self.topology_version, Compound._name_version)
+        cached = index.frozen.get(key)
+        if cached is None or cached[0] != versions:
+            cached = (versions, self._flat_topology(show_ports, residues,
+                                                    chains))
+            index.frozen[key] = cached
+        return cached[1]
+
+    def _flat_topology(self, show_ports, residues, chains):
+        """Collect the per-particle topology arrays of a FlatSystem. """
+        particles = list(self.particles(show_ports))
+        n = len(particles)
+        names = [particle.name for particle in particles]
+        ports = np.array([particle.port_particle for particle in particles],
+                         dtype=bool).reshape(n)
+
+        # Look up each distinct name once.
+        elements = dict()
+        guessed_elements = list()
+        guessed_names = set()
+        for particle, name in zip(particles, names):
+            if particle.port_particle or name in elements:
+                continue
+            atomic_number = None
+            stripped = ''.join(char for char in name if not char.isdigit())
+            try:
+                atomic_number = AtomicNum[name.capitalize()]
+            except KeyError:
+                element = element_by_name(name.capitalize())
+                if stripped not in guessed_names:
+                    guessed_elements.append((name, element))
+                    guessed_names.add(stripped)
+            else:
+                element = name.capitalize()
+            atomic_number = atomic_number or AtomicNum[element]
+            elements[name] = (element, atomic_number, Mass[element])
+        none = ('', 0, 0.0)
+        table = [none if port else elements[name]
+                 for name, port in zip(names, ports.tolist())]
+
+        # Bonds as pairs of rows.
+        row = {particle: i for i, particle in enumerate(particles)}
+        bonds = np.array([(row[a], row[b]) for a, b in self.bonds()
+                          if a in row and b in row],
+                         dtype=int).reshape((-1, 2))
+
+        residue_ids, residue_names = [-1] * n, []
+        if residues:
+            residue_ids, residue_names = _nearest_named(particles, residues)
+        chain_ids = [-1] * n
+        if chains:
+            chain_ids, _ = _nearest_named(particles, chains)
+
+        if self.children:
+            counts = [sum(1 for _ in child.particles(show_ports))
+                      for child in self.children]
+            molecule_ids = np.repeat(np.arange(len(counts)), counts)
+        else:
+            molecule_ids = np.zeros(n, dtype=int)
+
+        rigid_ids = [-1 if particle.rigid_id is None else particle.rigid_id
+                     for particle in particles]
+        charges = [0.0 if particle.port_particle else particle.charge
+                   for particle in particles]
+
+        arrays = dict(
+            names=np.array(names, dtype=str).reshape(n),
+            elements=np.array([entry[0] for entry in table],
+                              dtype=str).reshape(n),
+            atomic_numbers=np.array([entry[1] for entry in table], dtype=int),
+            masses=np.array([entry[2] for entry in table], dtype=float),
+            charges=np.array(charges, dtype=float),
+            bonds=bonds,
+            port_particles=ports,
+            residue_ids=np.array(residue_ids, dtype=int),
+            residue_names=residue_names,
+            chain_ids=np.array(chain_ids, dtype=int),
+            molecule_ids=molecule_ids,
+            rigid_ids=np.array(rigid_ids, dtype=int))
+        for value in arrays.values():
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+        return dict(arrays=arrays, guessed_elements=guessed_elements,
+                    reported=False)
+
     def save(self, filename, show_ports=False, forcefield_name=None,
              forcefield_files=None, forcefield_debug=False, box=None,
              overwrite=False, residues=None, combining_rule='lorentz',
@@ -1911,6 +3683,8 @@ class Compound(object):
         formats.json_formats.compound_to_json : Write to a json file
 
         """
+        if show_ports:
+            self._materialize_ports()
         extension = os.path.splitext(filename)[-1]
 
         if extension == '.json':
@@ -1938,10 +3712,17 @@ class Compound(object):
         if os.path.exists(filename) and not overwrite:
             raise IOError('{0} exists; not overwriting'.format(filename))
 
-        structure = self.to_parmed(box=box, residues=residues,
-                                   show_ports=show_ports)
+        system = self.freeze(show_ports=show_ports, residues=residues,
+                             box=box)
+        # Without a force field, GSD and XYZ files are written straight from
+        # the frozen system.
+        forcefield = forcefield_name or forcefield_files
+        if forcefield or extension not in ['.gsd', '.xyz']:
+            structure = system.to_parmed()
+        else:
+            structure = system
         # Apply a force field with foyer if specified
-        if forcefield_name or forcefield_files:
+        if forcefield:
             foyer = import_('foyer')
             ff = foyer.Forcefield(forcefield_files=forcefield_files,
                             name=forcefield_name, debug=forcefield_debug)
@@ -1949,23 +3730,24 @@ class Compound(object):
                 foyer_kwargs = {}
             structure = ff.apply(structure, **foyer_kwargs)
             structure.combining_rule = combining_rule
+            total_charge = sum([atom.charge for atom in structure])
+        else:
+            total_charge = system.charges.sum()
 
-        total_charge = sum([atom.charge for atom in structure])
         if round(total_charge, 4) != 0.0:
             warn('System is not charge neutral. Total charge is {}.'
                  ''.format(total_charge))
 
         # Provide a warning if rigid_ids are not sequential from 0
         if self.contains_rigid:
-            unique_rigid_ids = sorted(set([
-                p.rigid_id for p in self.rigid_particles()]))
+            unique_rigid_ids = self._rigid_body_ids()
             if max(unique_rigid_ids) != len(unique_rigid_ids) - 1:
                 warn("Unique rigid body IDs are not sequential starting from zero.")
 
         if saver:  # mBuild supported saver.
             if extension in ['.gsd', '.hoomdxml']:
-                kwargs['rigid_bodies'] = [
-                        p.rigid_id for p in self.particles()]
+                kwargs['rigid_bodies'] = [None if body == -1 else body
+                                          for body in system.rigid_ids.tolist()]
             saver(filename=filename, structure=structure, **kwargs)
 
         elif extension == '.sdf':
@@ -2036,6 +3818,122 @@ class Compound(object):
         self.rotate(theta, around)
         self.translate(center_pos)
 
+    def transform_many(self, by=None, theta=None, around=None, parts=None,
+                       spin=True):
+        """Rotate and translate many parts of the Compound at once.
+
+        Each part is first rotated by its angle around its vector, in place
+        like `spin` or about the origin like `rotate`, and then translated by
+        its vector. The coordinates of all parts are transformed in a single
+        vectorized operation on the coordinate buffer of the hierarchy, so
+        this is much faster than calling `spin` and `translate` on every part,
+        e.g. when randomizing the orientations of the molecules of a packed
+        box or placing replicas on a pattern.
+
+        Parameters
+        ----------
+        by : np.ndarray, shape=(3,) or (n, 3), dtype=float, optional
+            The vectors to translate the parts by, one per part or a single
+            vector for all of them.
+        theta : float or np.ndarray, shape=(n,), dtype=float, optional
+            The angles by which to rotate the parts, in radians.
+        around : np.ndarray, shape=(3,) or (n, 3), dtype=float, optional
+            The vectors about which to rotate the parts. Required if `theta`
+            is given.
+        parts : list-like of mb.Compound, optional, default=self.children
+            The parts to transform. The parts must be in the hierarchy of
+            this Compound and must not contain one another.
+        spin : bool, optional, default=True
+            Rotate every part around its own center rather than the origin.
+
+        See Also
+        --------
+        Compound.translate
+        Compound.rotate
+        Compound.spin
+
+        """
+        if parts is None:
+            parts = self.children
+        parts = list(_flatten_compounds(parts))
+        if not parts:
+            return
+        n_parts = len(parts)
+        if theta is not None:
+            if around is None:
+                raise ValueError('A rotation requires vectors to rotate '
+                                 'around')
+            rotations = _rotation_matrices(theta, around)
+            rotations = np.broadcast_to(rotations, (n_parts, 3, 3))
+        if by is not None:
+            by = np.broadcast_to(np.asarray(by, dtype=float).reshape(-1, 3),
+                                 (n_parts, 3))
+
+        # The successors of self follow it in preorder.
+        root = self.root
+        index = root._particle_index()
+        first = 0 if self is root else index.position(self)
+        span = index.spans.get(self)
+        last = first + (span[7] - span[6] if span is not None else 0)
+        if any(part is not self and (
+                part.root is not root or part is root or
+                not first < index.position(part) <= last) for part in parts):
+            raise MBuildError('Only parts in the hierarchy of {} can be '
+                              'transformed.'.format(self))
+
+        index = root._coordinates()
+        rows = None
+        if index is not None:
+            rows, counts = index.rows(parts)
+            if np.unique(rows).size != rows.size:
+                raise MBuildError('The parts to transform overlap.')
+            xyz = index.xyz[rows]
+        else:
+            coordinates = [part.xyz_with_ports.reshape((-1, 3))
+                           for part in parts]
+            counts = np.array([len(xyz) for xyz in coordinates], dtype=int)
+            xyz = np.concatenate(coordinates)
+        owners = np.repeat(np.arange(n_parts), counts)
+
+        if theta is not None:
+            if spin:
+                centers = self._centers_of(parts, xyz, owners, index, rows)
+                xyz -= centers[owners]
+            xyz = np.einsum('nij,nj->ni', rotations[owners], xyz)
+            if spin:
+                xyz += centers[owners]
+        if by is not None:
+            xyz += by[owners]
+
+        if index is not None:
+            index.xyz[rows] = xyz
+            self._coordinates_changed()
+        else:
+            for part, stop, count in zip(parts, np.cumsum(counts), counts):
+                part.xyz_with_ports = xyz[stop - count:stop]
+
+    @staticmethod
+    def _centers_of(parts, xyz, owners, index, rows):
+        """Return the centers of `parts` from their gathered coordinates. """
+        if index is None:
+            return np.array([part.center if part.xyz.size else
+                             part.xyz_with_ports.mean(axis=0)
+                             for part in parts],
+                            dtype=float).reshape((-1, 3))
+        # Like `center`, average over the non-port Particles of each part.
+        # Ports, and parts holding nothing but Ports, are centered on their
+        # Port Particles, as in `Port.center`.
+        n_parts = len(parts)
+        weights = (rows < len(index.particles)).astype(float)
+        sizes = np.bincount(owners, weights=weights, minlength=n_parts)
+        leaves = np.array([not part.children for part in parts], dtype=bool)
+        weights[(leaves | (sizes == 0))[owners]] = 1.0
+        sizes = np.bincount(owners, weights=weights, minlength=n_parts)
+        sums = np.stack([np.bincount(owners, weights=weights * xyz[:, dim],
+                                     minlength=n_parts)
+                         for dim in range(3)], axis=1)
+        return sums / sizes[:, None]
+
     # Interface to Trajectory for reading/writing .pdb and .mol2 files.
     # -----------------------------------------------------------------
     def from_trajectory(self, traj, frame=-1, coords_only=False,
@@ -2126,153 +4024,11 @@ class Compound(object):
 
         See also
         --------
-        _to_topology
-
-        """
-        atom_list = [particle for particle in self.particles(show_ports)]
-
-        top = self._to_topology(atom_list, chains, residues)
-
-        # Coordinates.
-        xyz = np.ndarray(shape=(1, top.n_atoms, 3), dtype='float')
-        for idx, atom in enumerate(atom_list):
-            xyz[0, idx] = atom.pos
-
-        # Unitcell information.
-        unitcell_angles = [90.0, 90.0, 90.0]
-        if box is None:
-            unitcell_lengths = np.empty(3)
-            for dim, val in enumerate(self.periodicity):
-                if val:
-                    unitcell_lengths[dim] = val
-                else:
-                    unitcell_lengths[dim] = self.boundingbox.lengths[dim] + 0.5
-        else:
-            unitcell_lengths = box.lengths
-            unitcell_angles = box.angles
-
-        return md.Trajectory(xyz, top, unitcell_lengths=unitcell_lengths,
-                             unitcell_angles=unitcell_angles)
-
-    def _to_topology(self, atom_list, chains=None, residues=None):
-        """Create a mdtraj.Topology from a Compound.
-
-        Parameters
-        ----------
-        atom_list : list of mb.Compound
-            Atoms to include in the topology
-        chains : mb.Compound or list of mb.Compound
-            Chain types to add to the topology
-        residues : str of list of str
-            Labels of residues in the Compound. Residues are assigned by
-            checking against Compound.name.
-
-        Returns
-        -------
-        top : mdtraj.Topology
-
-        See Also
-        --------
-        mdtraj.Topology : Details on the mdtraj Topology object
+        freeze
 
         """
-        from mdtraj.core.topology import Topology
-
-        if isinstance(chains, str):
-            chains = [chains]
-        if isinstance(chains, (list, set)):
-            chains = tuple(chains)
-
-        if isinstance(residues, str):
-            residues = [residues]
-        if isinstance(residues, (list, set)):
-            residues = tuple(residues)
-        top = Topology()
-        atom_mapping = {}
-
-        default_chain = top.add_chain()
-        default_residue = top.add_residue('RES', default_chain)
-
-        compound_residue_map = dict()
-        atom_residue_map = dict()
-        compound_chain_map = dict()
-        atom_chain_map = dict()
-
-        for atom in atom_list:
-            # Chains
-            if chains:
-                if atom.name in chains:
-                    current_chain = top.add_chain()
-                    compound_chain_map[atom] = current_chain
-                else:
-                    for parent in atom.ancestors():
-                        if chains and parent.name in chains:
-                            if parent not in compound_chain_map:
-                                current_chain = top.add_chain()
-                                compound_chain_map[parent] = current_chain
-                                current_residue = top.add_residue(
-                                    'RES', current_chain)
-                            break
-                    else:
-                        current_chain = default_chain
-            else:
-                current_chain = default_chain
-            atom_chain_map[atom] = current_chain
-
-            # Residues
-            if residues:
-                if atom.name in residues:
-                    current_residue = top.add_residue(atom.name, current_chain)
-                    compound_residue_map[atom] = current_residue
-                else:
-                    for parent in atom.ancestors():
-                        if residues and parent.name in residues:
-                            if parent not in compound_residue_map:
-                                current_residue = top.add_residue(
-                                    parent.name, current_chain)
-                                compound_residue_map[parent] = current_residue
-                            break
-                    else:
-                        current_residue = default_residue
-            else:
-                if chains:
-                    try:  # Grab the default residue from the custom chain.
-                        current_residue = next(current_chain.residues)
-                    except StopIteration:  # Add the residue to the current chain
-                        current_residue = top.add_residue('RES', current_chain)
-                else:  # Grab the default chain's default residue
-                    current_residue = default_residue
-            atom_residue_map[atom] = current_residue
-
-            # Add the actual atoms
-            try:
-                elem = get_by_symbol(atom.name)
-            except KeyError:
-                elem = get_by_symbol("VS")
-            at = top.add_atom(atom.name, elem, atom_residue_map[atom])
-            at.charge = atom.charge
-            atom_mapping[atom] = at
-
-        # Remove empty default residues.
-        chains_to_remove = [
-            chain for chain in top.chains if chain.n_atoms == 0]
-        residues_to_remove = [res for res in top.residues if res.n_atoms == 0]
-        for chain in chains_to_remove:
-            top._chains.remove(chain)
-        for res in residues_to_remove:
-            for chain in top.chains:
-                try:
-                    chain._residues.remove(res)
-                except ValueError:  # Already gone.
-                    pass
-
-        for atom1, atom2 in self.bonds():
-            # Ensure that both atoms are part of the compound. This becomes an
-            # issue if you try to convert a sub-compound to a topology which is
-            # bonded to a different subcompound.
-            if all(a in atom_mapping.keys() for a in [atom1, atom2]):
-                top.add_bond(atom_mapping[atom1], atom_mapping[atom2])
-        return top
+        return self.freeze(show_ports=show_ports, residues=residues,
+                           chains=chains, box=box).to_trajectory()
 
     def from_parmed(self, structure, coords_only=False,
             infer_hierarchy=True):
@@ -2376,117 +4132,13 @@ class Compound(object):
         parmed.structure.Structure : Details on the ParmEd Structure object
 
         """
-        structure = pmd.Structure()
-        structure.title = title if title else self.name
-        atom_mapping = {}  # For creating bonds below
-        guessed_elements = set()
-
         # Attempt to grab residue names based on names of children
         if not residues and infer_residues:
             residues = list(set([child.name for child in self.children]))
 
-        if isinstance(residues, str):
-            residues = [residues]
-        if isinstance(residues, (list, set)):
-            residues = tuple(residues)
-
-        default_residue = pmd.Residue('RES')
-        port_residue = pmd.Residue('PRT')
-        compound_residue_map = dict()
-        atom_residue_map = dict()
-
-        # Loop through particles and add initialize ParmEd atoms
-        for atom in self.particles(include_ports=show_ports):
-            if atom.port_particle:
-                current_residue = port_residue
-                atom_residue_map[atom] = current_residue
-
-                if current_residue not in structure.residues:
-                    structure.residues.append(current_residue)
-
-                pmd_atom = pmd.Atom(atomic_number=0, name='VS',
-                                    mass=0, charge=0)
-                pmd_atom.xx, pmd_atom.xy, pmd_atom.xz = atom.pos * 10  # Angstroms
-
-            else:
-                if residues and atom.name in residues:
-                    current_residue = pmd.Residue(atom.name)
-                    atom_residue_map[atom] = current_residue
-                    compound_residue_map[atom] = current_residue
-                elif residues:
-                    for parent in atom.ancestors():
-                        if residues and parent.name in residues:
-                            if parent not in compound_residue_map:
-                                current_residue = pmd.Residue(parent.name)
-                                compound_residue_map[parent] = current_residue
-                            atom_residue_map[atom] = current_residue
-                            break
-                    else:  # Did not find specified residues in ancestors.
-                        current_residue = default_residue
-                        atom_residue_map[atom] = current_residue
-                else:
-                    current_residue = default_residue
-                    atom_residue_map[atom] = current_residue
-
-                if current_residue not in structure.residues:
-                    structure.residues.append(current_residue)
-
-                atomic_number = None
-                name = ''.join(char for char in atom.name if not char.isdigit())
-                try:
-                    atomic_number = AtomicNum[atom.name.capitalize()]
-                except KeyError:
-                    element = element_by_name(atom.name.capitalize())
-                    if name not in guessed_elements:
-                        warn(
-                            'Guessing that "{}" is element: "{}"'.format(
-                                atom, element))
-                        guessed_elements.add(name)
-                else:
-                    element = atom.name.capitalize()
-
-                atomic_number = atomic_number or AtomicNum[element]
-                mass = Mass[element]
-                pmd_atom = pmd.Atom(atomic_number=atomic_number, name=atom.name,
-                                    mass=mass, charge=atom.charge)
-                pmd_atom.xx, pmd_atom.xy, pmd_atom.xz = atom.pos * 10  # Angstroms
-
-            residue = atom_residue_map[atom]
-            structure.add_atom(pmd_atom, resname=residue.name,
-                               resnum=residue.idx)
-
-            atom_mapping[atom] = pmd_atom
-
-        # "Claim" all of the items it contains and subsequently index all of its items
-        structure.residues.claim()
-
-        # Create and add bonds to ParmEd Structure
-        for atom1, atom2 in self.bonds():
-            bond = pmd.Bond(atom_mapping[atom1], atom_mapping[atom2])
-            structure.bonds.append(bond)
-        # pad box with .25nm buffers
-        if box is None:
-            box = self.boundingbox
-            box_vec_max = box.maxs.tolist()
-            box_vec_min = box.mins.tolist()
-            for dim, val in enumerate(self.periodicity):
-                if val:
-                    box_vec_max[dim] = val
-                    box_vec_min[dim] = 0.0
-                if not val:
-                    box_vec_max[dim] += 0.25
-                    box_vec_min[dim] -= 0.25
-            box = Box(mins=box_vec_min, maxs=box_vec_max)
-
-        box_vector = np.empty(6)
-        if box.angles is not None:
-            box_vector[3:6] = box.angles
-        else:
-            box_vector[3] = box_vector[4] = box_vector[5] = 90.0
-        for dim in range(3):
-            box_vector[dim] = box.lengths[dim] * 10
-        structure.box = box_vector
-        return structure
+        system = self.freeze(show_ports=show_ports, residues=residues,
+                             box=box)
+        return system.to_parmed(title=title)
 
     def to_networkx(self, names_only=False):
         """Create a NetworkX graph representing the hierarchy of a Compound.
@@ -2570,6 +4222,8 @@ class Compound(object):
         Bond orders are assumed to be 1
         OBMol atom indexing starts at 1, with spatial dimension Angstrom
         """
+        if show_ports:
+            self._materialize_ports()
 
         openbabel = import_('openbabel')
         pybel = import_('pybel')
@@ -2839,7 +4493,16 @@ class Compound(object):
 
     def __getitem__(self, selection):
         if isinstance(selection, int):
-            return list(self.particles())[selection]
+            index = self._particle_index() if self.children else None
+            if index is None:
+                return list(self.particles())[selection]
+            start, stop = index.spans[self][:2]
+            if selection < 0:
+                selection += stop - start
+            if not 0 <= selection < stop - start:
+                raise IndexError('Particle index {} out of range for '
+                                 '{}'.format(selection, self))
+            return index.particles[start + selection]
         if isinstance(selection, str):
             if selection not in self.labels:
                 raise MBuildError('{}[\'{}\'] does not exist.'.format(self.name,selection))
@@ -2863,6 +4526,199 @@ class Compound(object):
         descr.append('id: {}>'.format(id(self)))
         return ''.join(descr)
 
+    # Attributes pickled as flat arrays by `__reduce__` rather than per
+    # Compound.
+    _flat_state = _CloneTemplate._structure | frozenset([
+        '_name', '_periodicity', '_charge', 'port_particle', '_rigid_id'])
+
+    def __copy__(self):
+        """Return a shallow copy of the Compound.
+
+        The copy is a new object that shares its parent, children, labels and
+        position with the Compound, like the default `copy.copy`. Use
+        `mb.clone` for an independent copy.
+
+        """
+        cls = type(self)
+        newone = cls.__new__(cls)
+        for klass in cls.__mro__:
+            for slot in klass.__dict__.get('__slots__', ()):
+                if slot in ('__dict__', '__weakref__'):
+                    continue
+                try:
+                    value = object.__getattribute__(self, slot)
+                except AttributeError:
+                    continue
+                object.__setattr__(newone, slot, value)
+        newone.__dict__.update(self.__dict__)
+        return newone
+
+    def __reduce__(self):
+        """Pickle the hierarchy of the Compound as flat arrays.
+
+        The whole hierarchy is pickled from its root, with one entry per
+        Compound (in preorder) in arrays of parent positions, names,
+        coordinates, charges and rigid IDs, so that pickling neither
+        recurses through the hierarchy nor stores a Python object per
+        attribute. Labels, referrers and bonds are stored as positions in
+        this order. Pickling any other Compound pickles its root and the
+        position of the Compound below it.
+
+        Other attributes, including references to Compounds outside of the
+        hierarchy, are pickled as they are.
+
+        This also drives `copy.deepcopy`, which therefore copies the whole
+        hierarchy of a Compound and returns the copy of the Compound within
+        it, as it did when the reference to the parent was copied along.
+        `copy.copy` is handled by `__copy__`.
+
+        """
+        root = self.root
+        index = root._particle_index()
+        if self is not root:
+            return _unpickle_compound, (root, index.position(self))
+
+        nodes = [root] + index.nodes
+        position = {node: i for i, node in enumerate(nodes)}
+
+        def encode(part):
+            return position.get(part, part)
+
+        names, name_ids = np.unique([node._name for node in nodes],
+                                    return_inverse=True)
+        state = dict(
+            parents=np.array([-1] + [position[node.parent]
+                                     for node in index.nodes], dtype=int),
+            names=names.tolist(),
+            name_ids=name_ids,
+            xyz=np.array([node._pos for node in nodes],
+                         dtype=float).reshape((-1, 3)),
+            charges=np.array([node._charge for node in nodes], dtype=float),
+            rigid_ids=np.array([-1 if node._rigid_id is None
+                                else node._rigid_id for node in nodes],
+                               dtype=int),
+            port_particles=np.array([node.port_particle for node in nodes],
+                                    dtype=bool),
+            containers=np.array([node._children is not None
+                                 for node in nodes], dtype=bool),
+            referred_by_parent=np.array(
+                [node.parent is not None and node._referrers is node.parent
+                 for node in nodes], dtype=bool))
+
+        periodic = [i for i, node in enumerate(nodes)
+                    if node._periodicity is not None]
+        labels = dict()
+        referrers = dict()
+        bond_graphs = dict()
+        extras = dict()
+        for i, node in enumerate(nodes):
+            if node._labels is not None:
+                labels[i] = (
+                    [(label, encode(part)) if isinstance(part, Compound)
+                     else (label, [encode(p) for p in part])
+                     for label, part in node._labels._store.items()],
+                    node._labels._hidden)
+            if node._referrers is not None and not state[
+                    'referred_by_parent'][i]:
+                referrers[i] = (isinstance(node._referrers, set),
+                                [encode(referrer) for referrer in
+                                 _referrer_set(node._referrers)])
+            if node.bond_graph is not None:
+                try:
+                    bond_graphs[i] = node.bond_graph.copy(position)
+                except KeyError:
+                    # Bonds to Particles outside of the hierarchy.
+                    bond_graphs[i] = (node.bond_graph,)
+            extra = {key: value for key, value in _CloneTemplate._state(node)
+                     if key not in self._flat_state}
+            if extra:
+                extras[i] = extra
+        state.update(periodic=np.array(periodic, dtype=int),
+                     periodicity=np.array([nodes[i]._periodicity
+                                           for i in periodic],
+                                          dtype=float).reshape((-1, 3)),
+                     labels=labels,
+                     referrers=referrers, bond_graphs=bond_graphs,
+                     extras=extras)
+        return _unpickle_hierarchy, ([type(node) for node in nodes],), state
+
+    def __setstate__(self, state):
+        """Rebuild a hierarchy pickled by `__reduce__`. """
+        nodes = object.__getattribute__(self, '__dict__').pop(
+            '_unpickled_nodes')
+        names = state['names']
+        parents = state['parents'].tolist()
+        rigid_ids = state['rigid_ids'].tolist()
+        referred_by_parent = state['referred_by_parent'].tolist()
+
+        def decode(part):
+            return nodes[part] if isinstance(part, int) else part
+
+        # Attributes are set directly to bypass properties and the
+        # `__getattr__` hooks of Proxies.
+        setattr_ = object.__setattr__
+        for node, name_id, pos, charge, rigid_id, port_particle, container \
+                in zip(nodes, state['name_ids'].tolist(), state['xyz'],
+                       state['charges'].tolist(), rigid_ids,
+                       state['port_particles'].tolist(),
+                       state['containers'].tolist()):
+            setattr_(node, '_name', names[name_id])
+            setattr_(node, '_pos', pos)
+            setattr_(node, '_charge', charge)
+            setattr_(node, '_rigid_id', None if rigid_id < 0 else rigid_id)
+            setattr_(node, 'port_particle', port_particle)
+            setattr_(node, '_children', OrderedSet() if container else None)
+            setattr_(node, '_periodicity', None)
+            setattr_(node, '_labels', None)
+            setattr_(node, '_referrers', None)
+            setattr_(node, 'bond_graph', None)
+            setattr_(node, '_index', None)
+            setattr_(node, '_root', self)
+            setattr_(node, '_aggregates', None)
+            setattr_(node, '_rigid_bodies', None)
+            setattr_(node, '_topology_version', 0)
+            setattr_(node, '_coordinate_version', 0)
+
+        setattr_(self, 'parent', None)
+        for i in range(1, len(nodes)):
+            node = nodes[i]
+            parent = nodes[parents[i]]
+            setattr_(node, 'parent', parent)
+            parent._children.add(node)
+            if referred_by_parent[i]:
+                setattr_(node, '_referrers', parent)
+
+        for i, value in zip(state['periodic'].tolist(), state['periodicity']):
+            setattr_(nodes[i], '_periodicity', value)
+        for i, (entries, hidden) in state['labels'].items():
+            node_labels = _Labels()
+            node_labels._store.update(
+                (label, decode(part)) if not isinstance(part, list)
+                else (label, [decode(p) for p in part])
+                for label, part in entries)
+            node_labels._hidden = hidden
+            setattr_(nodes[i], '_labels', node_labels)
+        for i, (is_set, referrers) in state['referrers'].items():
+            referrers = [decode(referrer) for referrer in referrers]
+            if is_set:
+                setattr_(nodes[i], '_referrers', set(referrers))
+            else:
+                setattr_(nodes[i], '_referrers', referrers[0])
+        for i, graph in state['bond_graphs'].items():
+            if isinstance(graph, tuple):
+                graph = graph[0]
+            else:
+                graph = graph.copy(nodes)
+            setattr_(nodes[i], 'bond_graph', graph)
+        for i, extra in state['extras'].items():
+            object.__getattribute__(nodes[i], '__dict__').update(extra)
+
+        # Children follow their parents in preorder, so the aggregates can
+        # be filled in bottom-up without recursing.
+        for node in reversed(nodes):
+            if node._children:
+                node._aggregate()
+
     def _clone(self, clone_of=None, root_container=None):
         """A faster alternative to deepcopying.
 
@@ -2886,42 +4742,52 @@ class Compound(object):
         # Remember that we're cloning the new one of self.
         clone_of[self] = newone
 
-        newone.name = deepcopy(self.name)
-        newone.periodicity = deepcopy(self.periodicity)
-        newone._pos = deepcopy(self._pos)
-        newone.port_particle = deepcopy(self.port_particle)
-        newone._check_if_contains_rigid_bodies = deepcopy(
-            self._check_if_contains_rigid_bodies)
-        newone._contains_rigid = deepcopy(self._contains_rigid)
-        newone._rigid_id = deepcopy(self._rigid_id)
-        newone._charge = deepcopy(self._charge)
+        # Apart from the arrays, these are all immutable and can be shared.
+        newone._name = self._name
+        if self._periodicity is None:
+            newone._periodicity = None
+        else:
+            newone._periodicity = self._periodicity.copy()
+        newone._pos = self._pos.copy()
+        newone.port_particle = self.port_particle
+        newone._index = None
+        newone._root = newone
+        newone._topology_version = 0
+        newone._coordinate_version = 0
+        if self._aggregates is None:
+            newone._aggregates = None
+        else:
+            newone._aggregates = list(self._aggregates)
+        newone._rigid_bodies = None
+        newone._rigid_id = self._rigid_id
+        newone._charge = self._charge
         if hasattr(self, 'index'):
-            newone.index = deepcopy(self.index)
+            newone.index = self.index
 
-        if self.children is None:
-            newone.children = None
+        if self._children is None:
+            newone._children = None
         else:
-            newone.children = OrderedSet()
+            newone._children = OrderedSet()
         # Parent should be None initially.
         newone.parent = None
-        newone.labels = OrderedDict()
-        newone.referrers = set()
+        newone._labels = None
+        newone._referrers = None
         newone.bond_graph = None
 
         # Add children to clone.
-        if self.children:
-            for child in self.children:
+        if self._children:
+            for child in self._children:
                 newchild = child._clone(clone_of, root_container)
-                newone.children.add(newchild)
+                newone._children.add(newchild)
                 newchild.parent = newone
 
         # Copy labels, except bonds with atoms outside the hierarchy.
-        if self.labels:
-            for label, compound in self.labels.items():
+        if self._labels:
+            newone._labels = _Labels()
+            for label, compound in self._labels._store.items():
                 if not isinstance(compound, list):
                     newone.labels[label] = compound._clone(
                         clone_of, root_container)
-                    compound.referrers.add(clone_of[compound])
                 else:
                     # compound is a list of compounds, so we create an empty
                     # list, and add the clones of the original list elements.
@@ -2929,14 +4795,26 @@ class Compound(object):
                     for subpart in compound:
                         newone.labels[label].append(
                             subpart._clone(clone_of, root_container))
-                        # Referrers must have been handled already, or the will
-                        # be handled
+            if self._labels._hidden:
+                newone._labels._hidden = set(self._labels._hidden)
+            for label, compound in newone._labels._iter_items():
+                if isinstance(compound, Compound):
+                    compound._add_referrer(newone)
 
         return newone
 
     def _clone_bonds(self, clone_of=None):
         """While cloning, clone the bond of the source compound to clone compound"""
         newone = clone_of[self]
+        if self.root is self and self.bond_graph is not None:
+            # The whole graph is copied, sharing its bond arrays.
+            try:
+                newone.bond_graph = self.bond_graph.copy(clone_of)
+            except KeyError:
+                raise MBuildError(
+                    "Cloning failed. Compound contains bonds to "
+                    "Particles outside of its containment hierarchy.")
+            return
         for c1, c2 in self.bonds():
             try:
                 newone.add_bond((clone_of[c1], clone_of[c2]))
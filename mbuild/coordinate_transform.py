@@ -479,6 +479,42 @@ def _rotate(coordinates, theta, around):
     return Rotation(theta, around).apply_to(coordinates)
 
 
+def _rotation_matrices(theta, around):
+    """Return the matrices of many rotations around arbitrary vectors.
+
+    Parameters
+    ----------
+    theta : float or np.ndarray, shape=(n,), dtype=float
+        The angles of the rotations, in radians.
+    around : np.ndarray, shape=(3,) or (n, 3), dtype=float
+        The vectors about which to rotate.
+
+    Returns
+    -------
+    np.ndarray, shape=(n, 3, 3), dtype=float
+        The rotation matrices, built like those of `Rotation`.
+
+    """
+    theta = np.asarray(theta, dtype=float).reshape(-1)
+    around = np.asarray(around, dtype=float).reshape(-1, 3)
+    lengths = norm(around, axis=1)
+    if not lengths.all():
+        raise ValueError('Cannot rotate around a zero vector')
+    theta, around, lengths = np.broadcast_arrays(
+        theta[:, None], around, lengths[:, None])
+    theta = theta[:, 0]
+    x, y, z = (around / lengths).T
+
+    s = np.sin(theta)
+    c = np.cos(theta)
+    t = 1 - c
+    return np.stack([
+        np.stack([t * x * x + c, t * x * y - s * z, t * x * z + s * y], -1),
+        np.stack([t * x * y + s * z, t * y * y + c, t * y * z - s * x], -1),
+        np.stack([t * x * z - s * y, t * y * z + s * x, t * z * z + c], -1)],
+        axis=1)
+
+
 warning_message = 'Please use Compound.rotate()'
 @deprecated(warning_message)
 def rotate(compound, theta, around):
@@ -0,0 +1,330 @@
+"""Immutable, array-backed snapshots of Compounds for export. """
+import numpy as np
+import parmed as pmd
+
+from mbuild.box import Box
+
+__all__ = ['FlatSystem']
+
+
+class FlatSystem(object):
+    """An immutable, array-backed snapshot of a Compound.
+
+    A FlatSystem holds everything the writers need from a Compound as flat
+    arrays with one entry per particle, in hierarchy order. It is created
+    with `Compound.freeze()` and does not change when the Compound it was
+    taken from does. All arrays are read-only.
+
+    Parameters
+    ----------
+    title : str
+        Name of the system, the name of the frozen Compound.
+    names : np.ndarray, shape=(n,), dtype=str
+        Name of every particle.
+    elements : np.ndarray, shape=(n,), dtype=str
+        Element symbol of every particle, '' for port particles.
+    atomic_numbers : np.ndarray, shape=(n,), dtype=int
+        Atomic number of every particle, 0 for port particles.
+    masses : np.ndarray, shape=(n,), dtype=float
+        Mass of every particle in amu, 0 for port particles.
+    charges : np.ndarray, shape=(n,), dtype=float
+        Charge of every particle.
+    xyz : np.ndarray, shape=(n, 3), dtype=float
+        Coordinates of every particle in nm.
+    bonds : np.ndarray, shape=(m, 2), dtype=int
+        Indices of the two particles of every bond.
+    port_particles : np.ndarray, shape=(n,), dtype=bool
+        Whether each particle is a port particle.
+    residue_ids : np.ndarray, shape=(n,), dtype=int
+        Index into `residue_names` of the residue of every particle, -1 for
+        particles outside of the requested residues.
+    residue_names : tuple of str
+        Name of every residue, in order of first appearance.
+    chain_ids : np.ndarray, shape=(n,), dtype=int
+        Index of the chain of every particle, in order of first appearance,
+        -1 for particles outside of the requested chains.
+    molecule_ids : np.ndarray, shape=(n,), dtype=int
+        Index of the child of the frozen Compound holding every particle.
+    rigid_ids : np.ndarray, shape=(n,), dtype=int
+        Rigid body ID of every particle, -1 for particles that are not part
+        of a rigid body.
+    periodicity : np.ndarray, shape=(3,), dtype=float
+        Periodicity of the frozen Compound.
+    box : mb.Box or None
+        Box to use on export. If None, a box is derived from `periodicity`
+        and the bounding box of the particles.
+    residues : tuple of str or None
+        Names of the Compounds that were requested as residues.
+    chains : tuple of str or None
+        Names of the Compounds that were requested as chains.
+
+    See Also
+    --------
+    Compound.freeze
+
+    """
+    __slots__ = ('title', 'names', 'elements', 'atomic_numbers', 'masses',
+                 'charges', 'xyz', 'bonds', 'port_particles', 'residue_ids',
+                 'residue_names', 'chain_ids', 'molecule_ids', 'rigid_ids',
+                 'periodicity', 'box', 'residues', 'chains')
+
+    def __init__(self, title, names, elements, atomic_numbers, masses,
+                 charges, xyz, bonds, port_particles, residue_ids,
+                 residue_names, chain_ids, molecule_ids, rigid_ids,
+                 periodicity, box=None, residues=None, chains=None):
+        arrays = dict(names=names, elements=elements,
+                      atomic_numbers=atomic_numbers, masses=masses,
+                      charges=charges, xyz=xyz, bonds=bonds,
+                      port_particles=port_particles, residue_ids=residue_ids,
+                      chain_ids=chain_ids, molecule_ids=molecule_ids,
+                      rigid_ids=rigid_ids, periodicity=periodicity)
+        for key, value in arrays.items():
+            value = np.asarray(value)
+            if value.flags.writeable:
+                value = value.copy()
+                value.setflags(write=False)
+            object.__setattr__(self, key, value)
+        object.__setattr__(self, 'title', title)
+        object.__setattr__(self, 'residue_names', tuple(residue_names))
+        object.__setattr__(self, 'box', box)
+        object.__setattr__(self, 'residues', residues)
+        object.__setattr__(self, 'chains', chains)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('FlatSystem is immutable.')
+
+    def __repr__(self):
+        return '<FlatSystem {}: {:d} particles, {:d} bonds, id: {}>'.format(
+            self.title, self.n_particles, self.n_bonds, id(self))
+
+    @property
+    def n_particles(self):
+        """The number of particles in the system, including port particles. """
+        return len(self.names)
+
+    @property
+    def n_bonds(self):
+        """The number of bonds in the system. """
+        return len(self.bonds)
+
+    @property
+    def boundingbox(self):
+        """The bounding box of all particles that are not port particles. """
+        xyz = self.xyz[~self.port_particles]
+        return Box(mins=xyz.min(axis=0), maxs=xyz.max(axis=0))
+
+    def box_vector(self):
+        """Return the box as ParmEd box lengths (Angstroms) and angles.
+
+        Without a box, one is fitted around the particles with 0.25nm buffers
+        at each face, except in periodic directions where the periodicity is
+        used.
+
+        Returns
+        -------
+        np.ndarray, shape=(6,), dtype=float
+
+        """
+        box = self.box
+        if box is None:
+            boundingbox = self.boundingbox
+            box_vec_max = boundingbox.maxs.tolist()
+            box_vec_min = boundingbox.mins.tolist()
+            for dim, val in enumerate(self.periodicity):
+                if val:
+                    box_vec_max[dim] = val
+                    box_vec_min[dim] = 0.0
+                else:
+                    box_vec_max[dim] += 0.25
+                    box_vec_min[dim] -= 0.25
+            box = Box(mins=box_vec_min, maxs=box_vec_max)
+
+        box_vector = np.empty(6)
+        if box.angles is not None:
+            box_vector[3:6] = box.angles
+        else:
+            box_vector[3:6] = 90.0
+        box_vector[:3] = np.asarray(box.lengths) * 10
+        return box_vector
+
+    def to_parmed(self, title=''):
+        """Create a ParmEd Structure from the system.
+
+        Parameters
+        ----------
+        title : str, optional, default=self.title
+            Title/name of the ParmEd Structure
+
+        Returns
+        -------
+        parmed.structure.Structure
+
+        See Also
+        --------
+        Compound.to_parmed
+
+        """
+        structure = pmd.Structure()
+        structure.title = title if title else self.title
+
+        default_residue = pmd.Residue('RES')
+        port_residue = pmd.Residue('PRT')
+        residues = [pmd.Residue(name) for name in self.residue_names]
+        appended = set()
+
+        names = self.names.tolist()
+        atomic_numbers = self.atomic_numbers.tolist()
+        masses = self.masses.tolist()
+        charges = self.charges.tolist()
+        residue_ids = self.residue_ids.tolist()
+        ports = self.port_particles.tolist()
+        xyz = self.xyz * 10  # Angstroms
+        atoms = list()
+        for i, name in enumerate(names):
+            if ports[i]:
+                residue = port_residue
+                pmd_atom = pmd.Atom(atomic_number=0, name='VS', mass=0,
+                                    charge=0)
+            else:
+                if residue_ids[i] < 0:
+                    residue = default_residue
+                else:
+                    residue = residues[residue_ids[i]]
+                pmd_atom = pmd.Atom(atomic_number=atomic_numbers[i],
+                                    name=name, mass=masses[i],
+                                    charge=charges[i])
+            if id(residue) not in appended:
+                structure.residues.append(residue)
+                appended.add(id(residue))
+            pmd_atom.xx, pmd_atom.xy, pmd_atom.xz = xyz[i]
+            structure.add_atom(pmd_atom, resname=residue.name,
+                               resnum=residue.idx)
+            atoms.append(pmd_atom)
+
+        # "Claim" all of the items it contains and subsequently index all of
+        # its items
+        structure.residues.claim()
+
+        for i, j in self.bonds.tolist():
+            structure.bonds.append(pmd.Bond(atoms[i], atoms[j]))
+        structure.box = self.box_vector()
+        return structure
+
+    def to_trajectory(self):
+        """Create an md.Trajectory from the system.
+
+        Returns
+        -------
+        md.Trajectory
+
+        See Also
+        --------
+        Compound.to_trajectory
+
+        """
+        import mdtraj as md
+
+        top = self.to_topology()
+        xyz = np.array(self.xyz, dtype=float).reshape((1, top.n_atoms, 3))
+
+        unitcell_angles = [90.0, 90.0, 90.0]
+        if self.box is None:
+            unitcell_lengths = np.empty(3)
+            lengths = self.boundingbox.lengths
+            for dim, val in enumerate(self.periodicity):
+                if val:
+                    unitcell_lengths[dim] = val
+                else:
+                    unitcell_lengths[dim] = lengths[dim] + 0.5
+        else:
+            unitcell_lengths = self.box.lengths
+            unitcell_angles = self.box.angles
+
+        return md.Trajectory(xyz, top, unitcell_lengths=unitcell_lengths,
+                             unitcell_angles=unitcell_angles)
+
+    def to_topology(self):
+        """Create an mdtraj.Topology from the system.
+
+        Every instance of a requested chain becomes a chain, even when it is
+        nested inside a residue, and holds a default 'RES' residue for its
+        particles. Particles outside of the requested chains go to a default
+        chain and particles outside of the requested residues to a default
+        'RES' residue.
+
+        Returns
+        -------
+        mdtraj.Topology
+
+        """
+        from mdtraj.core.element import get_by_symbol
+        from mdtraj.core.topology import Topology
+
+        top = Topology()
+        default_chain = top.add_chain()
+        default_residue = top.add_residue('RES', default_chain)
+        current_chain = default_chain
+        current_residue = default_residue
+
+        chains = dict()
+        residues = dict()
+        elements = dict()
+        atoms = list()
+        names = self.names.tolist()
+        charges = self.charges.tolist()
+        residue_ids = self.residue_ids.tolist()
+        for name, charge, chain_id, residue_id in zip(
+                names, charges, self.chain_ids.tolist(), residue_ids):
+            # A chain or residue that was already started is continued from
+            # the previous particle, as particles are in hierarchy order.
+            if not self.chains or chain_id < 0:
+                current_chain = default_chain
+            elif name in self.chains:
+                current_chain = top.add_chain()
+            elif chain_id not in chains:
+                current_chain = chains[chain_id] = top.add_chain()
+                current_residue = top.add_residue('RES', current_chain)
+
+            if self.residues:
+                if residue_id < 0:
+                    current_residue = default_residue
+                elif name in self.residues:
+                    current_residue = top.add_residue(name, current_chain)
+                elif residue_id not in residues:
+                    current_residue = residues[residue_id] = top.add_residue(
+                        self.residue_names[residue_id], current_chain)
+            elif self.chains:
+                try:  # Grab the default residue from the custom chain.
+                    current_residue = next(current_chain.residues)
+                except StopIteration:
+                    current_residue = top.add_residue('RES', current_chain)
+            else:
+                current_residue = default_residue
+
+            element = elements.get(name)
+            if element is None:
+                try:
+                    element = get_by_symbol(name)
+                except KeyError:
+                    element = get_by_symbol('VS')
+                elements[name] = element
+            atom = top.add_atom(name, element, current_residue)
+            atom.charge = charge
+            atoms.append(atom)
+
+        # Remove empty default residues.
+        chains_to_remove = [
+            chain for chain in top.chains if chain.n_atoms == 0]
+        residues_to_remove = [res for res in top.residues if res.n_atoms == 0]
+        for chain in chains_to_remove:
+            top._chains.remove(chain)
+        for res in residues_to_remove:
+            for chain in top.chains:
+                try:
+                    chain._residues.remove(res)
+                except ValueError:  # Already gone.
+                    pass
+
+        for i, j in self.bonds.tolist():
+            top.add_bond(atoms[i], atoms[j])
+        return top
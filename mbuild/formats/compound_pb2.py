@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: compound.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0e\x63ompound.proto\"\'\n\x04Vec3\x12\t\n\x01x\x18\x01 \x01(\x02\x12\t\n\x01y\x18\x02 \x01(\x02\x12\t\n\x01z\x18\x03 \x01(\x02\" \n\x04Vec2\x12\x0b\n\x03id1\x18\x01 \x01(\x03\x12\x0b\n\x03id2\x18\x02 \x01(\x03\"\x97\x01\n\x08\x43ompound\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x1b\n\x08\x63hildren\x18\x02 \x03(\x0b\x32\t.Compound\x12\x12\n\x03pos\x18\x03 \x01(\x0b\x32\x05.Vec3\x12\x1a\n\x0bperiodicity\x18\x04 \x01(\x0b\x32\x05.Vec3\x12\x0e\n\x06\x63harge\x18\x05 \x01(\x02\x12\n\n\x02id\x18\x06 \x01(\x03\x12\x14\n\x05\x62onds\x18\x07 \x03(\x0b\x32\x05.Vec2b\x06proto3')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'compound_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  _VEC3._serialized_start=18
+  _VEC3._serialized_end=57
+  _VEC2._serialized_start=59
+  _VEC2._serialized_end=91
+  _COMPOUND._serialized_start=94
+  _COMPOUND._serialized_end=245
+# @@protoc_insertion_point(module_scope)
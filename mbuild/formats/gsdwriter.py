@@ -1,5 +1,6 @@
 import numpy as np
 
+from mbuild.flat_system import FlatSystem
 from mbuild.utils.io import import_
 from mbuild.utils.sorting import natural_sort
 from mbuild.utils.geometry import coord_shift
@@ -14,8 +15,8 @@ def write_gsd(structure, filename, ref_distance=1.0, ref_mass=1.0,
 
     Parameters
     ----------
-    structure : parmed.Structure
-        ParmEd Structure object
+    structure : parmed.Structure or mb.FlatSystem
+        ParmEd Structure object or frozen Compound
     filename : str
         Path of the output file.
     ref_distance : float, optional, default=1.0
@@ -28,7 +29,8 @@ def write_gsd(structure, filename, ref_distance=1.0, ref_mass=1.0,
         List of rigid body information. An integer value is required for
         each atom corresponding to the index of the rigid body the particle
         is to be associated with. A value of None indicates the atom is not
-        part of a rigid body.
+        part of a rigid body. If None and `structure` is a frozen Compound,
+        its rigid body IDs are used.
     shift_coords : bool, optional, default=True
         Shift coordinates from (0, L) to (-L/2, L/2) if necessary.
     write_special_pairs : bool, optional, default=True
@@ -39,14 +41,23 @@ def write_gsd(structure, filename, ref_distance=1.0, ref_mass=1.0,
     -----
     Force field parameters are not written to the GSD file and must be included
     manually into a HOOMD input script. 
+
+    A frozen Compound is written straight from its arrays. It carries no
+    force field, so only particles, bonds and an empty set of special pairs
+    are written, matching the output for its ParmEd Structure.
     """
 
     import_('gsd')
     import gsd.hoomd
 
-    xyz = np.array([[atom.xx, atom.xy, atom.xz] for atom in structure.atoms])
+    if isinstance(structure, FlatSystem):
+        box = structure.box_vector()
+        xyz = structure.xyz * 10  # Angstroms
+    else:
+        box = structure.box
+        xyz = np.array([[atom.xx, atom.xy, atom.xz] for atom in structure.atoms])
     if shift_coords:
-        xyz = coord_shift(xyz, structure.box[:3])
+        xyz = coord_shift(xyz, box[:3])
 
     gsd_snapshot = gsd.hoomd.Snapshot()
 
@@ -54,12 +65,12 @@ def write_gsd(structure, filename, ref_distance=1.0, ref_mass=1.0,
     gsd_snapshot.configuration.dimensions = 3
 
     # Write box information
-    if np.allclose(structure.box[3:6], np.array([90, 90, 90])):
-        gsd_snapshot.configuration.box = np.hstack((structure.box[:3] / ref_distance,
+    if np.allclose(box[3:6], np.array([90, 90, 90])):
+        gsd_snapshot.configuration.box = np.hstack((box[:3] / ref_distance,
                                                 np.zeros(3)))
     else:
-        a, b, c = structure.box[0:3] / ref_distance
-        alpha, beta, gamma = np.radians(structure.box[3:6])
+        a, b, c = box[0:3] / ref_distance
+        alpha, beta, gamma = np.radians(box[3:6])
 
         lx = a
         xy = b * np.cos(gamma)
@@ -70,6 +81,14 @@ def write_gsd(structure, filename, ref_distance=1.0, ref_mass=1.0,
 
         gsd_snapshot.configuration.box = np.array([lx, ly, lz, xy, xz, yz])
 
+    if isinstance(structure, FlatSystem):
+        _write_flat_system(gsd_snapshot, structure, xyz, ref_distance,
+                           ref_mass, ref_energy, rigid_bodies,
+                           write_special_pairs)
+        with gsd.hoomd.open(filename, mode='wb') as gsd_file:
+            gsd_file.append(gsd_snapshot)
+        return
+
     _write_particle_information(gsd_snapshot, structure, xyz, ref_distance,
             ref_mass, ref_energy, rigid_bodies)
     if write_special_pairs:
@@ -110,18 +129,84 @@ def _write_particle_information(gsd_snapshot, structure, xyz, ref_distance,
     gsd_snapshot.particles.mass = masses / ref_mass
 
     charges = np.array([atom.charge for atom in structure.atoms])
+    gsd_snapshot.particles.charge = charges / _charge_factor(ref_distance,
+                                                             ref_energy)
+
+    if rigid_bodies:
+        rigid_bodies = [-1 if body is None else body for body in rigid_bodies]
+    gsd_snapshot.particles.body = rigid_bodies
+
+def _charge_factor(ref_distance, ref_energy):
+    """Return the factor converting charges to reduced units. """
     e0 = 2.39725e-4
     '''
     Permittivity of free space = 2.39725e-4 e^2/((kcal/mol)(angstrom)),
     where e is the elementary charge
     '''
-    charge_factor = (4.0*np.pi*e0*ref_distance*ref_energy)**0.5
-    gsd_snapshot.particles.charge = charges / charge_factor
+    return (4.0*np.pi*e0*ref_distance*ref_energy)**0.5
 
+def _write_flat_system(gsd_snapshot, system, xyz, ref_distance, ref_mass,
+        ref_energy, rigid_bodies, write_special_pairs):
+    """Write the particles and bonds of a frozen Compound.
+
+    Parameters
+    ----------
+    gsd_snapshot :
+        The file object of the GSD file being written
+    system : mb.FlatSystem
+        Frozen Compound holding system information
+    xyz : np.ndarray, shape=(n, 3), dtype=float
+        Particle coordinates in Angstroms
+
+    """
+    ports = system.port_particles
+    # Port particles are virtual sites without type, mass or charge, as
+    # through ParmEd.
+    types = np.where(ports, 'VS', system.names)
+
+    gsd_snapshot.particles.N = system.n_particles
+    gsd_snapshot.particles.position = xyz / ref_distance
+
+    unique_types = sorted(set(types.tolist()), key=natural_sort)
+    gsd_snapshot.particles.types = unique_types
+    typeid = {t: i for i, t in enumerate(unique_types)}
+    gsd_snapshot.particles.typeid = np.array(
+        [typeid[t] for t in types.tolist()], dtype=int)
+
+    masses = np.where(ports, 0.0, system.masses)
+    masses[masses==0] = 1.0
+    gsd_snapshot.particles.mass = masses / ref_mass
+
+    charges = np.where(ports, 0.0, system.charges)
+    gsd_snapshot.particles.charge = charges / _charge_factor(ref_distance,
+                                                             ref_energy)
+
+    if rigid_bodies is None:
+        rigid_bodies = system.rigid_ids.tolist()
     if rigid_bodies:
         rigid_bodies = [-1 if body is None else body for body in rigid_bodies]
     gsd_snapshot.particles.body = rigid_bodies
 
+    if write_special_pairs:
+        # Special pairs come from dihedrals, which require a force field.
+        gsd_snapshot.pairs.types = []
+        gsd_snapshot.pairs.typeid = []
+        gsd_snapshot.pairs.group = []
+        gsd_snapshot.pairs.N = 0
+
+    if system.n_bonds:
+        gsd_snapshot.bonds.N = system.n_bonds
+        names = types.tolist()
+        bond_types = ['-'.join(sorted([names[i], names[j]], key=natural_sort))
+                      for i, j in system.bonds.tolist()]
+        unique_bond_types = sorted(set(bond_types), key=natural_sort)
+        bond_typeid = {bond_type: i
+                       for i, bond_type in enumerate(unique_bond_types)}
+        gsd_snapshot.bonds.types = unique_bond_types
+        gsd_snapshot.bonds.typeid = [bond_typeid[bond_type]
+                                     for bond_type in bond_types]
+        gsd_snapshot.bonds.group = system.bonds.tolist()
+
 def _write_pair_information(gsd_snapshot, structure):
     """Write the special pairs in the system.
 
@@ -3,6 +3,7 @@ import numpy as np
 import parmed as pmd
 
 import mbuild as mb
+from mbuild.flat_system import FlatSystem
 from mbuild.utils.sorting import natural_sort
 from mbuild.utils.geometry import coord_shift
 from mbuild.utils.io import import_
@@ -15,12 +16,13 @@ __all__ = ['to_hoomdsnapshot']
 def to_hoomdsnapshot(structure,  ref_distance=1.0, ref_mass=1.0,
               ref_energy=1.0, rigid_bodies=None, shift_coords=True,
               write_special_pairs=True, auto_scale=False, parmed_kwargs={}):
-    """Convert mb.Compound or parmed.Structure to hoomd.data.Snapshot
+    """Convert mb.Compound, mb.FlatSystem or parmed.Structure to hoomd.data.Snapshot
 
     Parameters
     ----------
-    structure : parmed.Structure
-        ParmEd Structure object
+    structure : parmed.Structure, mb.Compound or mb.FlatSystem
+        ParmEd Structure object, or a Compound or frozen Compound which is
+        converted to one
     ref_distance : float, optional, default=1.0
         Reference distance for conversion to reduced units
     ref_mass : float, optional, default=1.0
@@ -54,12 +56,14 @@ def to_hoomdsnapshot(structure,  ref_distance=1.0, ref_mass=1.0,
     Force field parameters are not written to the hoomd_snapshot 
 
     """
-    if not isinstance(structure, (mb.Compound, pmd.Structure)):
+    if not isinstance(structure, (mb.Compound, FlatSystem, pmd.Structure)):
         raise ValueError("You are trying to create a hoomd.Snapshot from " +
                 "{} ".format(type(structure)) + 
-                "please pass mb.Compound or pmd.Structure")
+                "please pass mb.Compound, mb.FlatSystem or pmd.Structure")
     elif isinstance(structure, mb.Compound):
         structure = structure.to_parmed(**parmed_kwargs)
+    elif isinstance(structure, FlatSystem):
+        structure = structure.to_parmed()
 
 
     if not hoomd.context.current:
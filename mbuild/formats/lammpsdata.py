@@ -6,6 +6,7 @@ import numpy as np
 from parmed.parameters import ParameterSet
 
 from mbuild import Box
+from mbuild.flat_system import FlatSystem
 from mbuild.utils.conversion import RB_to_OPLS
 from mbuild.utils.sorting import natural_sort
 from scipy.constants import epsilon_0
@@ -25,8 +26,9 @@ def write_lammpsdata(structure, filename, atom_style='full',
 
     Parameters
     ----------
-    structure : parmed.Structure
-        ParmEd structure object
+    structure : parmed.Structure or mb.FlatSystem
+        ParmEd structure object, or a frozen Compound which is converted to
+        one
     filename : str
         Path of the output file
     atom_style: str
@@ -68,6 +70,9 @@ def write_lammpsdata(structure, filename, atom_style='full',
     if atom_style not in ['atomic', 'charge', 'molecular', 'full']:
         raise ValueError('Atom style "{}" is invalid or is not currently supported'.format(atom_style))
 
+    if isinstance(structure, FlatSystem):
+        structure = structure.to_parmed()
+
     # Check if structure is paramterized
     if unit_style == 'lj':
         if any([atom.sigma for atom in structure.atoms]) is None:
@@ -2,6 +2,7 @@ import numpy as np
 
 import mbuild as mb
 from mbuild.exceptions import MBuildError
+from mbuild.flat_system import FlatSystem
 
 __all__ = ['read_xyz', 'write_xyz']
 
@@ -68,8 +69,8 @@ def write_xyz(structure, filename):
 
     Parameters
     ----------
-    structure : parmed.Structure
-        ParmEd structure object
+    structure : parmed.Structure or mb.FlatSystem
+        ParmEd structure object or frozen Compound
     filename : str
         Path of the output file
 
@@ -88,11 +89,18 @@ def write_xyz(structure, filename):
             'Expected a ParmEd structure, got an mbuild.Compound'
         )
 
-    xyz = np.array([[atom.xx, atom.xy, atom.xz] for atom in structure.atoms])
-    types = [atom.name for atom in structure.atoms]
+    if isinstance(structure, FlatSystem):
+        xyz = structure.xyz * 10  # Angstroms
+        # Port particles are written as virtual sites, as through ParmEd.
+        types = np.where(structure.port_particles, 'VS',
+                         structure.names).tolist()
+    else:
+        xyz = np.array([[atom.xx, atom.xy, atom.xz]
+                        for atom in structure.atoms])
+        types = [atom.name for atom in structure.atoms]
 
     with open(filename, 'w') as xyz_file:
-        xyz_file.write(str(len(structure.atoms)))
+        xyz_file.write(str(len(types)))
         xyz_file.write('\n' + filename+' - created by mBuild\n')
         for typ, coords in zip(types, xyz):
             xyz_file.write('{:s} {:11.6f} {:11.6f} {:11.6f}\n'.format(typ, *coords))
@@ -6,6 +6,7 @@ import numpy as np
 
 
 import mbuild as mb
+from mbuild.box import _unit_vectors
 
 __all__ = ['Lattice']
 
@@ -388,44 +389,18 @@ class Lattice(object):
         to build a Bravais Lattice. The lattice vectors are in the lower
         diagonal matrix form.
 
-        This was adapted from the ASE triclinic.py lattice parameter code.
-
-        S. R. Bahn and K. W. Jacobsen
-        An object-oriented scripting interface to a
-        legacy electronic structure code Comput. Sci. Eng., Vol. 4, 56-66, 2002
-
         Parameters
         ----------
         angles : list-like, required
             Angles of bravais lattice.
 
-        """
+        See Also
+        --------
+        box._unit_vectors : The conversion shared with `mb.Box.vectors`
 
-        dataType = np.float64
-        (alpha, beta, gamma) = angles
-
-        radianConversion = np.pi / 180.0
-        cosa = np.cos(alpha * radianConversion)
-        cosb = np.cos(beta * radianConversion)
-        sinb = np.sin(beta * radianConversion)
-        cosg = np.cos(gamma * radianConversion)
-        sing = np.sin(gamma * radianConversion)
-        matCoef_y = (cosa - cosb * cosg) / sing
-        matCoef_z = np.power(sinb, 2, dtype=dataType) - \
-            np.power(matCoef_y, 2, dtype=dataType)
-
-        if matCoef_z > 0.:
-            matCoef_z = np.sqrt(matCoef_z)
-        else:
-            raise ValueError('Incorrect lattice vector coefficients.'
-                             'Lattice parameters chosen return a non-positive '
-                             'z vector.')
-
-        lattice_vec = [[1, 0, 0],
-                       [cosg, sing, 0],
-                       [cosb, matCoef_y, matCoef_z]]
+        """
 
-        return np.asarray(lattice_vec, dtype=np.float64)
+        return _unit_vectors(angles)
 
     def _from_lattice_vectors(self):
         """Calculate the angles between the vectors that define the lattice.
@@ -558,36 +533,44 @@ class Lattice(object):
         ret_lattice = mb.Compound()
 
         # Create (clone) a mb.Compound for the newly generate positions
+        to_add = []
         if compound_dict is None:
             for key_id, all_pos in cell.items():
                 particle = mb.Compound(name=key_id, pos=[0, 0, 0])
-                for pos in all_pos:
-                    particle_to_add = mb.clone(particle)
+                copies = mb.clone_many(particle, len(all_pos))
+                for particle_to_add, pos in zip(copies, all_pos):
                     particle_to_add.translate_to(list(pos))
-                    ret_lattice.add(particle_to_add)
+                    to_add.append(particle_to_add)
         else:
             for key_id, all_pos in cell.items():
                 if isinstance(compound_dict[key_id], mb.Compound):
                     compound_to_move = compound_dict[key_id]
-                    for pos in all_pos:
-                        tmp_comp = mb.clone(compound_to_move)
+                    copies = mb.clone_many(compound_to_move, len(all_pos))
+                    for tmp_comp, pos in zip(copies, all_pos):
                         tmp_comp.translate_to(list(pos))
-                        ret_lattice.add(tmp_comp)
+                        to_add.append(tmp_comp)
                 else:
                     err_type = type(compound_dict.get(key_id))
                     raise TypeError('Invalid type in provided Compound '
                                     'dictionary. For key {}, type: {} was '
                                     'provided, not mbuild.Compound.'
                                     .format(key_id, err_type))
+
+        ret_lattice.add_many(to_add)
+
         # set periodicity
         ret_lattice.periodicity = np.asarray([a * x, b * y, c * z], dtype=np.float64)
-        warn('Periodicity of non-rectangular lattices are not valid with '
-                    'default boxes. Only rectangular lattices are valid '
-                    'at this time.')
+        if not np.allclose(self.angles, 90.0):
+            warn('The periodicity of a non-rectangular lattice only holds '
+                 'the lengths of its box. Pass the box from '
+                 '`get_populated_box()` to methods such as '
+                 '`generate_bonds` to use the triclinic box.')
 
-        # if coordinates are below a certain threshold, set to 0
+        # Snap rounding noise of either sign around zero to exactly zero.
         tolerance = 1e-12
-        ret_lattice.xyz_with_ports[ret_lattice.xyz_with_ports <= tolerance] = 0.
+        xyz = ret_lattice.xyz_with_ports
+        xyz[np.abs(xyz) <= tolerance] = 0.
+        ret_lattice.xyz_with_ports = xyz
 
         return ret_lattice
 
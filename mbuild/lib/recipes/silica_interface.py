@@ -73,10 +73,11 @@ class SilicaInterface(mb.Compound):
     def _strip_stray_atoms(self):
         """Remove stray atoms and surface pieces. """
         components = self.bond_graph.connected_components()
-        major_component = max(components, key=len)
-        for atom in list(self.particles()):
-            if atom not in major_component:
-                self.remove(atom)
+        major_component = set(max(components, key=len))
+        stray = [atom for atom in self.particles()
+                 if atom not in major_component]
+        if stray:
+            self.remove(stray)
 
     def _bridge_dangling_Os(self, oh_density, thickness):
         """Form Si-O-Si bridges to yield desired density of reactive surface sites.
@@ -92,10 +93,7 @@ class SilicaInterface(mb.Compound):
         area = self.periodicity[0] * self.periodicity[1]
         target = int(oh_density * area)
 
-        dangling_Os = [atom for atom in self.particles()
-                       if atom.name == 'O' and
-                       atom.pos[2] > thickness and
-                       len(self.bond_graph.neighbors(atom)) == 1]
+        dangling_Os = self.select(name='O', z=(thickness, None), degree=1)
 
         n_bridges = int((len(dangling_Os) - target) / 2)
 
@@ -124,14 +122,12 @@ class SilicaInterface(mb.Compound):
 
     def _identify_surface_sites(self, thickness):
         """Label surface sites and add ports above them. """
-        for atom in self.particles():
-            if len(self.bond_graph.neighbors(atom)) == 1:
-                if atom.name == 'O' and atom.pos[2] > thickness:
-                    atom.name = 'O_surface'
-                    port = mb.Port(anchor=atom)
-                    port.spin(np.pi/2, [1, 0, 0])
-                    port.translate(np.array([0.0, 0.0, 0.1]))
-                    self.add(port, "port_{}".format(len(self.referenced_ports())))
+        for atom in self.select(name='O', z=(thickness, None), degree=1):
+            atom.name = 'O_surface'
+            port = mb.Port(anchor=atom, compact=True)
+            port.spin(np.pi/2, [1, 0, 0])
+            port.translate(np.array([0.0, 0.0, 0.1]))
+            self.add(port, "port_{}".format(len(self.referenced_ports())))
 
     def _adjust_stoichiometry(self):
         """Remove O's from underside of surface to yield a 2:1 Si:O ratio. """
@@ -139,10 +135,7 @@ class SilicaInterface(mb.Compound):
         num_Si = len(list(self.particles_by_name('Si')))
         n_deletions = num_O - 2*num_Si
 
-        bottom_Os = [atom for atom in self.particles()
-                     if atom.name == 'O' and
-                        atom.pos[2] < self._O_buffer and
-                        len(self.bond_graph.neighbors(atom)) == 1]
+        bottom_Os = self.select(name='O', z=(None, self._O_buffer), degree=1)
 
         for _ in range(n_deletions):
             O1 = random.choice(bottom_Os)
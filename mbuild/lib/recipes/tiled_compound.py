@@ -8,7 +8,7 @@ from mbuild.compound import Compound
 from mbuild.exceptions import MBuildError
 from mbuild.port import Port
 from mbuild.periodic_kdtree import PeriodicCKDTree
-from mbuild import clone
+from mbuild import clone_many
 
 
 class TiledCompound(Compound):
@@ -45,8 +45,7 @@ class TiledCompound(Compound):
         self.periodicity = np.array(tile.periodicity * n_tiles)
 
         if all(n_tiles == 1):
-            self._add_tile(tile, [(0, 0, 0)])
-            self._hoist_ports(tile)
+            self._add_tiles([tile], [[(0, 0, 0)]])
             return  # Don't waste time copying and checking bonds.
 
         # For every tile, assign temporary ID's to particles which are internal
@@ -59,13 +58,13 @@ class TiledCompound(Compound):
 
         # Replicate and place periodic tiles.
         # -----------------------------------
-        for ijk in it.product(range(n_tiles[0]),
-                              range(n_tiles[1]),
-                              range(n_tiles[2])):
-            new_tile = clone(tile)
+        positions = list(it.product(range(n_tiles[0]),
+                                    range(n_tiles[1]),
+                                    range(n_tiles[2])))
+        new_tiles = clone_many(tile, len(positions))
+        for new_tile, ijk in zip(new_tiles, positions):
             new_tile.translate(np.array(ijk * tile.periodicity))
-            self._add_tile(new_tile, ijk)
-            self._hoist_ports(new_tile)
+        self._add_tiles(new_tiles, positions)
 
         # Fix bonds across periodic boundaries.
         # -------------------------------------
@@ -114,16 +113,18 @@ class TiledCompound(Compound):
             particle.index = None
         del self.particle_kdtree
 
-    def _add_tile(self, new_tile, ijk):
-        """Add a tile with a label indicating its tiling position. """
-        tile_label = "{0}_{1}".format(self.name, '-'.join(str(d) for d in ijk))
-        self.add(new_tile, label=tile_label, inherit_periodicity=False)
-
-    def _hoist_ports(self, new_tile):
-        """Add labels for all the ports to the parent (TiledCompound). """
-        for port in new_tile.children:
-            if isinstance(port, Port):
-                self.add(port, containment=False)
+    def _add_tiles(self, new_tiles, positions):
+        """Add tiles with labels indicating their tiling positions.
+
+        Labels for all the ports of the tiles are hoisted to the parent
+        (TiledCompound).
+        """
+        tile_labels = ["{0}_{1}".format(self.name, '-'.join(str(d) for d in ijk))
+                       for ijk in positions]
+        self.add_many(new_tiles, label=tile_labels, inherit_periodicity=False)
+        self.add_many([port for new_tile in new_tiles
+                       for port in new_tile.children
+                       if isinstance(port, Port)], containment=False)
 
     def _find_particle_image(self, query, match, all_particles):
         """Find particle with the same index as match in a neighboring tile. """
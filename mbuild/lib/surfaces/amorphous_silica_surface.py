@@ -23,7 +23,7 @@ class AmorphousSilicaSurface(mb.Compound):
             if particle.name == 'OB':
                 count += 1
                 port = mb.Port(anchor=particle, orientation=[0, 0, 1],
-                               separation=0.1)
+                               separation=0.1, compact=True)
                 self.add(port, 'port_{}'.format(count))
 
 if __name__ == "__main__":
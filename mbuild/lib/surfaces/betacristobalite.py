@@ -32,7 +32,7 @@ class Betacristobalite(mb.Compound):
             if particle.name.startswith('O') and particle.pos[2] > 1.0:
                 count += 1
                 port = mb.Port(anchor=particle, orientation=[0, 0, 1],
-                               separation=0.1)
+                               separation=0.1, compact=True)
                 self.add(port, 'port_{}'.format(count))
                 particle.name = 'O'  # Strip numbers required in .mol2 files.
             elif particle.name.startswith('Si'):
@@ -7,7 +7,7 @@ from subprocess import PIPE, Popen
 
 import numpy as np
 
-from mbuild import clone
+from mbuild import clone_many
 from mbuild.box import Box
 from mbuild.compound import Compound
 from mbuild.exceptions import MBuildError
@@ -646,9 +646,9 @@ def _create_topology(container, comp_to_add, n_compounds):
         Compound with added compounds from PACKMOL.
     """
 
-    for comp, m_compound in zip(comp_to_add, n_compounds):
-        for _ in range(m_compound):
-            container.add(clone(comp))
+    container.add_many([copy
+                        for comp, m_compound in zip(comp_to_add, n_compounds)
+                        for copy in clone_many(comp, m_compound)])
     return container
 
 
@@ -32,157 +32,202 @@
 # DAMAGE.
 
 import itertools
-import heapq
 
 import numpy as np
-from scipy.spatial import KDTree
+from scipy.spatial import cKDTree
 
+from mbuild.box import _box_vectors
 
-def _gen_relevant_images(x, bounds, distance_upper_bound):
-    """Map x onto canonical unit cell and produce mirror images. """
+# Shifts to the 27 periodic images of the box nearest to a point, in units
+# of the box vectors. The unshifted image is at `_CENTER`.
+_SHIFTS = np.array(list(itertools.product((-1, 0, 1), repeat=3)), dtype=float)
+_CENTER = 13
 
-    real_x = np.copy(x)
 
-    for i, coord in enumerate(x):
-        if bounds[i] > 0.0:
-            real_x[i] = x[i] - np.floor(x[i] / bounds[i]) * bounds[i]
+def _wrap(x, bounds):
+    """Map points onto the canonical image [0, bounds) in periodic directions.
 
-    # if all(v == 0 for v in bounds):
-    #     real_x = x
-    # else:
-    #     real_x = x - np.where(bounds > 0.0,
-    #                       np.floor(x / bounds) * bounds, 0.0)
-    m = len(x)
-
-    xs_to_try = [real_x]
-    for i in range(m):
-        if bounds[i] > 0.0:
-            disp = np.zeros(m)
-            disp[i] = bounds[i]
-
-            if distance_upper_bound == np.inf:
-                xs_to_try = list(
-                    itertools.chain.from_iterable(
-                        (_ + disp, _, _ - disp) for _ in xs_to_try))
-            else:
-                extra_xs = []
-
-                # Point near lower boundary, include image on upper side
-                if abs(real_x[i]) < distance_upper_bound:
-                    extra_xs.extend(_ + disp for _ in xs_to_try)
+    Directions with a non-positive bound are left untouched.
+    """
+    x = np.array(x, dtype=float)
+    periodic = bounds > 0
+    if not periodic.any():
+        return x
+    lengths = np.where(periodic, bounds, 1.0)
+    wrapped = np.where(periodic, np.mod(x, lengths), x)
+    # Tiny negative coordinates round up to the upper bound.
+    wrapped[(wrapped >= bounds) & periodic] = 0.0
+    return wrapped
+
+
+def _wrap_triclinic(x, vectors, inverse):
+    """Map points onto the canonical image of a triclinic box.
+
+    The canonical image has fractional coordinates in [0, 1) along the box
+    vectors, which are given as rows.
+    """
+    fractional = np.asarray(x, dtype=float) @ inverse
+    fractional -= np.floor(fractional)
+    fractional[fractional >= 1.0] = 0.0
+    return fractional @ vectors
 
-                # Point near upper boundary, include image on lower side
-                if abs(bounds[i] - real_x[i]) < distance_upper_bound:
-                    extra_xs.extend(_ - disp for _ in xs_to_try)
 
-                xs_to_try.extend(extra_xs)
+def _minimum_image(displacement, vectors):
+    """Return the shortest periodic images of displacement vectors.
 
-    return xs_to_try
+    Displacements are first reduced to fractional coordinates in
+    [-0.5, 0.5] along the box vectors (given as rows). In a strongly skewed
+    box this is not necessarily the shortest image, so the neighboring
+    images are compared as well.
+    """
+    displacement = np.asarray(displacement, dtype=float)
+    fractional = displacement @ np.linalg.inv(vectors)
+    fractional -= np.round(fractional)
+    candidates = ((fractional @ vectors)[..., None, :] +
+                  _SHIFTS @ vectors)
+    nearest = np.argmin((candidates ** 2).sum(axis=-1), axis=-1)
+    return np.take_along_axis(
+        candidates, nearest[..., None, None], axis=-2)[..., 0, :]
 
 
-class PeriodicCKDTree(KDTree):
+class PeriodicCKDTree(cKDTree):
     """Cython kd-tree for nearest-neighbor lookup with periodic boundaries.
 
-    See scipy.spatial.ckdtree for details on kd-trees.
+    See scipy.spatial.cKDTree for details on kd-trees.
 
-    Searches with periodic boundaries are implemented by mapping all
-    initial data points to one canonical periodic image, building an
-    ordinary kd-tree with these points, then querying this kd-tree multiple
-    times, if necessary, with all the relevant periodic images of the
-    query point.
+    All data points are mapped onto one canonical periodic image and indexed
+    by scipy's cKDTree, which applies the minimum image convention in the
+    periodic directions (its `boxsize` option). Query points are mapped onto
+    the canonical image as well, so points anywhere in space can be queried.
+    Every method accepts a single point or an (m, k) array of points and
+    processes the whole batch in compiled code, e.g. `query_pairs` returns
+    all pairs within a distance in one call.
+
+    Triclinic boxes are supported by giving the box `angles`. Points are then
+    wrapped in fractional coordinates along the box vectors and the tree is
+    built without periodicity; each query is run for the periodic images of
+    the query point that can reach the box within the query distance, and
+    the results are merged, keeping the nearest image of every data point.
 
     Parameters
     ----------
-    bounds : array_like, shape (k,)
-        Size of the periodic box along each spatial dimension.  A
-        negative or zero size for dimension k means that space is not
-        periodic along k.
     data : array-like, shape (n,m)
-        The n data points of dimension mto be indexed. This array is
-        not copied unless this is necessary to produce a contiguous
-        array of doubles, and so modifying this data will result in
-        bogus results.
+        The n data points of dimension m to be indexed.
     leafsize : positive integer
         The number of points at which the algorithm switches over to
         brute-force.
+    bounds : array_like, shape (m,), optional, default=None
+        Size of the periodic box along each spatial dimension.  A
+        negative or zero size for dimension m means that space is not
+        periodic along m. Defaults to no periodicity. For a triclinic box,
+        the lengths of the box vectors.
+    angles : array_like, shape (3,), optional, default=None
+        Angles between the box vectors in degrees, as in `mb.Box`. Defaults
+        to an orthorhombic box. A triclinic box must be periodic in all
+        three dimensions.
+
+    Attributes
+    ----------
+    bounds : np.ndarray, shape (m,)
+        Size of the periodic box along each spatial dimension.
+    angles : np.ndarray, shape (3,) or None
+        Angles between the box vectors, None for an orthorhombic box.
+    vectors : np.ndarray, shape (3, 3) or None
+        Vectors of a triclinic box as rows, None for an orthorhombic box.
+    real_data : np.ndarray, shape (n,m)
+        The data points as given, `data` holds them mapped onto the
+        canonical image.
+
+    Notes
+    -----
+    Each data point is found at most once, at the distance of its nearest
+    periodic image. In a triclinic box this holds for distances up to the
+    smallest width of the box; beyond it, only the images in the 26 boxes
+    around the canonical one are considered.
+
+    `query_ball_tree`, `count_neighbors` and `sparse_distance_matrix` are
+    only supported for orthorhombic boxes.
 
-    Note
-    ----
-    To ensure that no two distinct images of the same point appear in the
-    results, it is essential to restrict the maximum distance between a
-    query point and a data point to half the smallest box dimension.
     """
 
-    def __init__(self, data, leafsize=10, bounds=None):
-        # Map all points to canonical periodic image.
-        if bounds is None:
-            bounds = np.array([0.0, 0.0, 0.0])
-        self.bounds = np.array(bounds)
+    def __init__(self, data, leafsize=10, bounds=None, angles=None):
         self.real_data = np.asarray(data)
-
-        wrapped_data = self.real_data
-
-        for i, row in enumerate(self.real_data):
-            for j, coord in enumerate(row):
-                if bounds[j] > 0.0:
-                    wrap = np.floor(self.real_data[i, j] / bounds[j])
-                    wrapped_data[i, j] = self.real_data[i, j] - wrap * bounds[j]
-
-        # if all(v == 0 for v in bounds):
-        #     wrapped_data = self.real_data
-        # else:
-        #     wrapped_data = (
-        #         self.real_data - np.where(bounds > 0.0,
-        #         (np.floor(self.real_data / bounds) * bounds), 0.0))
-
-        # Calculate maximum distance_upper_bound
-        self.max_distance_upper_bound = np.min(
-            np.where(self.bounds > 0, 0.5 * self.bounds, np.inf))
-
-        # Set up underlying kd-tree
-        super(PeriodicCKDTree, self).__init__(wrapped_data, leafsize)
-
-    # Ideally, KDTree and cKDTree would expose identical query and __query
-    # interfaces.  But they don't, and cKDTree.__query is also inaccessible
-    # from Python.  We do our best here to cope.
-    def __query(self, x, k=1, eps=0, p=2, distance_upper_bound=np.inf):
-        # This is the internal query method, which guarantees that x
-        # is a single point, not an array of points
-        #
-        # A slight complication: k could be "None", which means "return
-        # all neighbors within the given distance_upper_bound".
-
-        # Cap distance_upper_bound
-        distance_upper_bound = np.min([distance_upper_bound,
-                                      self.max_distance_upper_bound])
-
-        # Run queries over all relevant images of x
-        hits_list = []
-        for real_x in _gen_relevant_images(x, self.bounds, distance_upper_bound):
-            d, i = super(PeriodicCKDTree, self).query(
-                    real_x, k, eps, p, distance_upper_bound)
-            if k > 1:
-                hits_list.append(list(zip(d, i)))
-            else:
-                hits_list.append([(d, i)])
-
-        # Now merge results
-        if k > 1:
-            return heapq.nsmallest(k, itertools.chain(*hits_list))
-        elif k == 1:
-            return [min(itertools.chain(*hits_list))]
+        n_dims = self.real_data.shape[-1]
+        if bounds is None:
+            bounds = np.zeros(n_dims)
+        self.bounds = np.array(bounds, dtype=float)
+        if angles is None or np.allclose(angles, 90.0):
+            self.angles = None
+            self.vectors = None
+        else:
+            if n_dims != 3 or not (self.bounds > 0).all():
+                raise ValueError('A triclinic box must be periodic in all '
+                                 'three dimensions. Bounds: {}'.format(
+                                     self.bounds))
+            self.angles = np.array(angles, dtype=float)
+            self.vectors = _box_vectors(self.bounds, self.angles)
+            self._inverse = np.linalg.inv(self.vectors)
+            # Distances between opposite faces of the box.
+            self._widths = (abs(np.linalg.det(self.vectors)) /
+                            np.linalg.norm(np.cross(self.vectors[[1, 2, 0]],
+                                                    self.vectors[[2, 0, 1]]),
+                                           axis=1))
+            super(PeriodicCKDTree, self).__init__(
+                self._wrap(self.real_data).reshape((-1, 3)), leafsize)
+            return
+
+        wrapped_data = self._wrap(self.real_data)
+        if (self.bounds > 0).any():
+            boxsize = np.where(self.bounds > 0, self.bounds, 0.0)
         else:
-            raise ValueError("Invalid k in periodic_kdtree._KDTree__query")
+            boxsize = None
+        super(PeriodicCKDTree, self).__init__(
+            wrapped_data.reshape((-1, n_dims)), leafsize, boxsize=boxsize)
+
+    def _wrap(self, x):
+        """Map points onto the canonical image of the box. """
+        if self.vectors is None:
+            return _wrap(x, self.bounds)
+        return _wrap_triclinic(x, self.vectors, self._inverse)
+
+    def _images(self, x, r, p=2.):
+        """Return the images of points that can reach the box within `r`.
 
-    def query(self, x, k=1, eps=0, p=2, distance_upper_bound=np.inf):
+        Returns the images of the (wrapped) points, the index of the point
+        each image belongs to and the index of its shift in `_SHIFTS`.
+        """
+        x = self._wrap(np.reshape(x, (-1, 3)))
+        fractional = x @ self._inverse
+        # Euclidean length of a vector of unit p-norm, at most.
+        scale = 3.0 ** max(0.0, 0.5 - 1.0 / p)
+        reach = np.reshape(r, (-1, 1)) * scale / self._widths
+        needed = np.ones((len(x), len(_SHIFTS)), dtype=bool)
+        for axis in range(3):
+            shift = _SHIFTS[:, axis]
+            # An image shifted up along an axis is next to the lower face.
+            near_lower = (fractional[:, axis] <= reach[:, axis])[:, None]
+            near_upper = (1.0 - fractional[:, axis] <= reach[:, axis])[:, None]
+            needed &= (((shift == 1) & near_lower) |
+                       ((shift == -1) & near_upper) | (shift == 0))
+        owners, shifts = np.nonzero(needed)
+        return x[owners] + _SHIFTS[shifts] @ self.vectors, owners, shifts
+
+    def _check_orthorhombic(self):
+        if self.vectors is not None:
+            raise NotImplementedError(
+                'Only supported for orthorhombic boxes.')
+
+    def query(self, x, k=1, eps=0, p=2, distance_upper_bound=np.inf,
+              **kwargs):
         """Query the kd-tree for nearest neighbors.
 
         Parameters
         ----------
         x : array_like, last dimension self.m
             An array of points to query.
-        k : integer
-            The number of nearest neighbors to return.
+        k : integer or list of integers
+            The number of nearest neighbors to return, or the (1-based)
+            ranks of the neighbors to return.
         eps : non-negative float
             Return approximate nearest neighbors; the kth returned value
             is guaranteed to be no further than (1+eps) times the
@@ -193,10 +238,9 @@ class PeriodicCKDTree(KDTree):
             2 is the usual Euclidean distance
             infinity is the maximum-coordinate-difference distance
         distance_upper_bound : nonnegative float
-            Return only neighbors within this distance.  This is used to prune
-            tree searches, so if you are doing a series of nearest-neighbor
-            queries, it may help to supply the distance to the nearest neighbor
-            of the most recent point.
+            Return only neighbors within this distance.
+        **kwargs
+            Passed on to scipy.spatial.cKDTree.query, e.g. `workers`.
 
         Returns
         -------
@@ -210,88 +254,75 @@ class PeriodicCKDTree(KDTree):
             Missing neighbors are indicated with self.n.
 
         """
-        x = np.asarray(x)
-        if np.shape(x)[-1] != self.m:
-            raise ValueError("x must consist of vectors of length %d but has "
-                             "shape %s" % (self.m, np.shape(x)))
-        if p < 1:
-            raise ValueError("Only p-norms with 1<=p<=infinity permitted")
-        retshape = np.shape(x)[:-1]
-        if not isinstance(retshape, tuple):
-            if k > 1:
-                dd = np.empty(retshape + (k,), dtype=np.float)
-                dd.fill(np.inf)
-                ii = np.empty(retshape + (k,), dtype=np.int)
-                ii.fill(self.n)
-            elif k == 1:
-                dd = np.empty(retshape, dtype=np.float)
-                dd.fill(np.inf)
-                ii = np.empty(retshape, dtype=np.int)
-                ii.fill(self.n)
-            else:
-                raise ValueError("Requested %s nearest neighbors; acceptable "
-                                 "numbers are integers greater than or equal to"
-                                 " one, or None")
-            for c in np.ndindex(retshape):
-                hits = self.__query(x[c], k=k, eps=eps, p=p,
-                                    distance_upper_bound=distance_upper_bound)
-                if k > 1:
-                    for j, _ in enumerate(hits):
-                        dd[c + (j,)], ii[c + (j,)] = hits[j]
-                elif k == 1:
-                    if len(hits) > 0:
-                        dd[c], ii[c] = hits[0]
-                    else:
-                        dd[c] = np.inf
-                        ii[c] = self.n
-            return dd, ii
+        if self.vectors is None:
+            return super(PeriodicCKDTree, self).query(
+                _wrap(x, self.bounds), k=k, eps=eps, p=p,
+                distance_upper_bound=distance_upper_bound, **kwargs)
+
+        x = np.asarray(x, dtype=float)
+        retshape = x.shape[:-1]
+        if np.ndim(k) == 0:
+            ranks = np.arange(k)
+        else:
+            ranks = np.asarray(k) - 1
+        n_ranks = ranks.max() + 1
+        bound = distance_upper_bound
+        if np.isinf(bound):
+            # The neighbors in the canonical image bound the search through
+            # the other images.
+            nearest, _ = super(PeriodicCKDTree, self).query(
+                self._wrap(x.reshape((-1, 3))), k=[n_ranks], eps=eps, p=p,
+                **kwargs)
+            if np.isfinite(nearest).all():
+                # With some slack for rounding.
+                bound = nearest[:, 0] * (1 + 1e-9) + 1e-12
+        images, owners, _ = self._images(x, bound, p)
+        dd, ii = super(PeriodicCKDTree, self).query(
+            images, k=list(range(1, n_ranks + 1)), eps=eps, p=p,
+            distance_upper_bound=np.max(bound),
+            **kwargs)
+        rows = np.repeat(owners, n_ranks)
+        dd = dd.ravel()
+        ii = ii.ravel()
+
+        # Keep the nearest image of every data point found for a query.
+        order = np.lexsort((dd, ii, rows))
+        rows, dd, ii = rows[order], dd[order], ii[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = (rows[1:] != rows[:-1]) | (ii[1:] != ii[:-1])
+        keep = first & (ii < self.n)
+        rows, dd, ii = rows[keep], dd[keep], ii[keep]
+        order = np.lexsort((dd, rows))
+        rows, dd, ii = rows[order], dd[order], ii[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        found = rank < n_ranks
+
+        n_queries = int(np.prod(retshape))
+        distances = np.full((n_queries, n_ranks), np.inf)
+        indices = np.full((n_queries, n_ranks), self.n, dtype=np.intp)
+        distances[rows[found], rank[found]] = dd[found]
+        indices[rows[found], rank[found]] = ii[found]
+        distances = distances[:, ranks]
+        indices = indices[:, ranks]
+        if np.ndim(k) == 0 and k == 1:
+            shape = retshape
         else:
-            hits = self.__query(x, k=k, eps=eps, p=p,
-                                distance_upper_bound=distance_upper_bound)
-            if k == 1:
-                if len(hits) > 0:
-                    return hits[0]
-                else:
-                    return np.inf, self.n
-            elif k > 1:
-                dd = np.empty(k, dtype=np.float)
-                dd.fill(np.inf)
-                ii = np.empty(k, dtype=np.int)
-                ii.fill(self.n)
-                for j in range(len(hits)):
-                    dd[j], ii[j] = hits[j]
-                return dd, ii
-            else:
-                raise ValueError("Requested %s nearest neighbors; acceptable "
-                                 "numbers are integers greater than or equal to"
-                                 " one, or None")
-
-    # Ideally, KDTree and cKDTree would expose identical __query_ball_point
-    # interfaces.  But they don't, and cKDTree.__query_ball_point is also
-    # inaccessible from Python.  We do our best here to cope.
-    def __query_ball_point(self, x, r, p=2., eps=0):
-        # This is the internal query method, which guarantees that x
-        # is a single point, not an array of points
-
-        # Cap r
-        r = min(r, self.max_distance_upper_bound)
-
-        # Run queries over all relevant images of x
-        results = []
-        for real_x in _gen_relevant_images(x, self.bounds, r):
-            results.extend(super(PeriodicCKDTree, self).query_ball_point(
-                real_x, r, p, eps))
-        return results
-
-    def query_ball_point(self, x, r, p=2., eps=0):
+            shape = retshape + (len(ranks),)
+        distances = distances.reshape(shape)
+        indices = indices.reshape(shape)
+        if not shape:
+            return distances[()], indices[()]
+        return distances, indices
+
+    def query_ball_point(self, x, r, p=2., eps=0, **kwargs):
         """Find all points within distance r of point(s) x.
 
         Parameters
         ----------
         x : array_like, shape tuple + (self.m,)
             The point or points to search for neighbors of.
-        r : positive float
-            The radius of points to return.
+        r : positive float or array_like
+            The radius of points to return, or one radius per point.
         p : float, optional
             Which Minkowski p-norm to use.  Should be in the range [1, inf].
         eps : nonnegative float, optional
@@ -299,6 +330,9 @@ class PeriodicCKDTree(KDTree):
             nearest points are further than ``r / (1 + eps)``, and branches are
             added in bulk if their furthest points are nearer than
             ``r * (1 + eps)``.
+        **kwargs
+            Passed on to scipy.spatial.cKDTree.query_ball_point, e.g.
+            `return_sorted`, `return_length` or `workers`.
 
         Returns
         -------
@@ -309,32 +343,97 @@ class PeriodicCKDTree(KDTree):
 
         Notes
         -----
-        If you have many points whose neighbors you want to find, you may
-        save substantial amounts of time by putting them in a
-        PeriodicCKDTree and using query_ball_tree.
+        All pairs within `r` of the data points themselves are found much
+        faster with `query_pairs`.
         """
-        x = np.asarray(x).astype(np.float)
-        if x.shape[-1] != self.m:
-            raise ValueError(
-                "Searching for a {}d-dimensional point in a {}d-dimensional KDTree".format(
-                    x.shape[-1], self.m))
-        if len(x.shape) == 1:
-            return self.__query_ball_point(x, r, p, eps)
-        else:
-            retshape = x.shape[:-1]
-            result = np.empty(retshape, dtype=np.object)
-            for c in np.ndindex(retshape):
-                result[c] = self.__query_ball_point(x[c], r, p, eps)
-            return result
+        if self.vectors is None:
+            return super(PeriodicCKDTree, self).query_ball_point(
+                _wrap(x, self.bounds), r, p=p, eps=eps, **kwargs)
+
+        return_length = kwargs.pop('return_length', False)
+        kwargs.pop('return_sorted', None)
+        x = np.asarray(x, dtype=float)
+        retshape = x.shape[:-1]
+        r = np.broadcast_to(r, retshape).ravel()
+        images, owners, _ = self._images(x, r, p)
+        neighbors = super(PeriodicCKDTree, self).query_ball_point(
+            images, r[owners], p=p, eps=eps, **kwargs)
+        lengths = [len(found) for found in neighbors]
+        rows = np.repeat(owners, lengths)
+        found = np.fromiter(itertools.chain.from_iterable(neighbors),
+                            dtype=np.intp, count=sum(lengths))
+        # A data point may be within `r` of several images of a query.
+        keys = np.unique(rows * self.n + found)
+        rows, found = np.divmod(keys, max(self.n, 1))
+
+        n_queries = len(r)
+        counts = np.bincount(rows, minlength=n_queries)
+        if return_length:
+            return counts.reshape(retshape) if retshape else counts[0]
+        splits = np.split(found, np.cumsum(counts)[:-1])
+        if not retshape:
+            return splits[0].tolist()
+        result = np.empty(n_queries, dtype=object)
+        for i, neighbors in enumerate(splits):
+            result[i] = neighbors.tolist()
+        return result.reshape(retshape)
+
+    def query_pairs(self, r, p=2., eps=0, output_type='set'):
+        """Find all pairs of points within a distance `r` of each other.
 
-    def query_ball_tree(self, other, r, p=2., eps=0):
-        raise NotImplementedError()
+        Parameters
+        ----------
+        r : positive float
+            The maximum distance.
+        p : float, optional
+            Which Minkowski p-norm to use.  Should be in the range [1, inf].
+        eps : nonnegative float, optional
+            Approximate search, see `query_ball_point`.
+        output_type : {'set', 'ndarray'}, optional, default='set'
+            Return the pairs as a set of tuples or as an (n, 2) array.
 
-    def query_pairs(self, r, p=2., eps=0):
-        raise NotImplementedError()
+        Returns
+        -------
+        results : set or np.ndarray, shape=(n, 2)
+            Pairs `(i, j)` of indices into the data with `i < j`.
 
-    def count_neighbors(self, other, r, p=2.):
-        raise NotImplementedError()
+        """
+        if self.vectors is None:
+            return super(PeriodicCKDTree, self).query_pairs(
+                r, p=p, eps=eps, output_type=output_type)
+
+        pairs = [super(PeriodicCKDTree, self).query_pairs(
+            r, p=p, eps=eps, output_type='ndarray')]
+        # Pairs across the faces of the box, from the shifted images of
+        # the points near them.
+        images, owners, shifts = self._images(self.data, r, p)
+        across = shifts != _CENTER
+        images, owners = images[across], owners[across]
+        neighbors = super(PeriodicCKDTree, self).query_ball_point(
+            images, r, p=p, eps=eps)
+        lengths = [len(found) for found in neighbors]
+        first = np.repeat(owners, lengths)
+        second = np.fromiter(itertools.chain.from_iterable(neighbors),
+                             dtype=np.intp, count=sum(lengths))
+        pairs.append(np.column_stack((first, second)))
+        pairs = np.sort(np.concatenate(pairs).astype(np.intp), axis=1)
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        pairs = np.unique(pairs, axis=0).reshape((-1, 2))
+        if output_type == 'ndarray':
+            return pairs
+        return set(map(tuple, pairs.tolist()))
 
-    def sparse_distance_matrix(self, other, max_distance, p=2.):
-        raise NotImplementedError()
+    def query_ball_tree(self, other, r, p=2., eps=0):
+        self._check_orthorhombic()
+        return super(PeriodicCKDTree, self).query_ball_tree(
+            other, r, p=p, eps=eps)
+
+    def count_neighbors(self, other, r, p=2., **kwargs):
+        self._check_orthorhombic()
+        return super(PeriodicCKDTree, self).count_neighbors(
+            other, r, p=p, **kwargs)
+
+    def sparse_distance_matrix(self, other, max_distance, p=2., **kwargs):
+        self._check_orthorhombic()
+        return super(PeriodicCKDTree, self).sparse_distance_matrix(
+            other, max_distance, p=p, **kwargs)
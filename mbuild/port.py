@@ -1,11 +1,78 @@
+from functools import lru_cache
 import itertools
 
 import numpy as np
 
 from mbuild.compound import Compound, Particle
-from mbuild.coordinate_transform import unit_vector, angle
+from mbuild.coordinate_transform import unit_vector, angle, _rotate
 from mbuild import clone
 
+# Ghost particle positions of an unrotated subport.
+_SUBPORT = np.array([[0.005, 0.0025, -0.0025],
+                     [0.005, 0.0225, -0.0025],
+                     [-0.015, -0.0075, -0.0025],
+                     [0.005, -0.0175, 0.0075]])
+_SUBPORT_LABELS = ('middle', 'top', 'left', 'right')
+
+
+@lru_cache(maxsize=256)
+def _port_shape(orientation):
+    """Return the geometry of a Port facing `orientation`.
+
+    Returns the positions of the eight ghost particles of the 'up' and
+    'down' subports, the three frame points of a compact Port with the same
+    center, and the ghost particles expressed in the frame's basis. The
+    arrays are shared between Ports and must not be modified.
+    """
+    orientation = np.array(orientation, dtype=float)
+    default_direction = np.array([0, 1, 0])
+    up = _SUBPORT
+    down = _SUBPORT
+    if np.allclose(default_direction, unit_vector(-orientation)):
+        down = _rotate(down, np.pi, [0, 0, 1])
+        up = _rotate(up, np.pi, [0, 0, 1])
+        down = _rotate(down, np.pi, [0, 0, 1])
+    elif np.allclose(default_direction, unit_vector(orientation)):
+        down = _rotate(down, np.pi, [0, 0, 1])
+    else:
+        normal = np.cross(default_direction, orientation)
+        theta = angle(default_direction, orientation)
+        up = _rotate(up, theta, normal)
+        down = _rotate(down, theta, normal)
+        down = _rotate(down, np.pi, normal)
+    points = np.vstack([up, down])
+
+    # Any three points that are not collinear fix the orientation of the
+    # Port; they are spread around its center so that spinning a compact
+    # Port about its center matches spinning the full Port.
+    center = points.mean(axis=0)
+    u = points[1] - points[0]
+    v = points[2] - points[0]
+    frame = center + np.array([u, v, -u - v])
+    local = _to_frame(points, frame)
+
+    for array in (points, frame, local):
+        array.flags.writeable = False
+    return points, frame, local
+
+
+def _frame_basis(frame):
+    center = frame.mean(axis=0)
+    e1 = unit_vector(frame[0] - center)
+    e2 = frame[1] - center
+    e2 = unit_vector(e2 - np.dot(e2, e1) * e1)
+    return center, np.array([e1, e2, np.cross(e1, e2)])
+
+
+def _to_frame(points, frame):
+    center, basis = _frame_basis(frame)
+    return np.dot(points - center, basis.T)
+
+
+def _from_frame(local, frame):
+    center, basis = _frame_basis(frame)
+    return center + np.dot(local, basis)
+
 
 class Port(Compound):
     """A set of four ghost Particles used to connect parts.
@@ -20,6 +87,14 @@ class Port(Compound):
         Distance to shift port along the orientation vector from the anchor
         particle position. If no anchor is provided, the port will be shifted
         from the origin.
+    compact : bool, optional, default=False
+        Represent the port by three ghost Particles spanning its frame
+        instead of its two subports. The subports are built on demand, when
+        the port is indexed (e.g. `port['up']`, as done by `force_overlap`)
+        or when ports are shown in output. Compact ports are much cheaper to
+        create and store, which matters for surfaces carrying thousands of
+        ports. Until then, `xyz_with_ports` of the port holds the three
+        frame points; `center` and `direction` are unaffected.
 
     Attributes
     ----------
@@ -36,51 +111,76 @@ class Port(Compound):
         transform.
 
     """
-    def __init__(self, anchor=None, orientation=None, separation=0):
+    # Positions of the ghost particles in the frame of a compact Port, None
+    # once the subports have been built.
+    _shape = None
+
+    def __init__(self, anchor=None, orientation=None, separation=0,
+                 compact=False):
         super(Port, self).__init__(name='Port', port_particle=True)
         self.anchor = anchor
+        self.used = False
 
-        default_direction = np.array([0, 1, 0])
         if orientation is None:
             orientation = [0, 1, 0]
-        orientation = np.asarray(orientation)
-
-        up = Compound(name='subport', port_particle=True)
-        up.add(Particle(name='G', pos=[0.005, 0.0025, -0.0025],
-                        port_particle=True), 'middle')
-        up.add(Particle(name='G', pos=[0.005, 0.0225, -0.0025],
-                        port_particle=True), 'top')
-        up.add(Particle(name='G', pos=[-0.015, -0.0075, -0.0025],
-                        port_particle=True), 'left')
-        up.add(Particle(name='G', pos=[0.005, -0.0175, 0.0075],
-                        port_particle=True), 'right')
-
-        down = clone(up)
-        self.add(up, 'up')
-        self.add(down, 'down')
-        self.used = False
+        orientation = np.asarray(orientation, dtype=float)
+        points, frame, local = _port_shape(tuple(orientation.tolist()))
 
-        if np.allclose(
-                default_direction, unit_vector(-orientation)):
-            down.rotate(np.pi, [0, 0, 1])
-            self.rotate(np.pi, [0, 0, 1])
-        elif np.allclose(
-                default_direction, unit_vector(orientation)):
-            down.rotate(np.pi, [0, 0, 1])
+        shift = separation*unit_vector(orientation)
+        if anchor:
+            shift = shift + anchor.pos - points.mean(axis=0)
+
+        if compact:
+            self.add_many([Particle(name='G', pos=pos, port_particle=True)
+                           for pos in frame + shift], label='frame[$]')
+            self._shape = local
         else:
-            normal = np.cross(default_direction, orientation)
-            self.rotate(angle(default_direction, orientation), normal)
-            down.rotate(np.pi, normal)
+            self._add_subports(points + shift)
 
-        if anchor:
-            self.translate_to(anchor.pos)
+    def _add_subports(self, points):
+        for label, rows in (('up', points[:4]), ('down', points[4:])):
+            subport = Compound(name='subport', port_particle=True)
+            subport.add_many([Particle(name='G', pos=pos, port_particle=True)
+                              for pos in rows], label=list(_SUBPORT_LABELS))
+            self.add(subport, label)
+
+    @property
+    def compact(self):
+        """Whether the subports of the Port have not been built yet. """
+        return self._shape is not None
+
+    def _materialize(self):
+        """Replace the frame of a compact Port by its subports. """
+        if self._shape is None:
+            return
+        points = _from_frame(self._shape, self.xyz_with_ports)
+        self._shape = None
+        for particle in self.children:
+            particle.parent = None
+            particle._root = particle
+        self.children = None
+        del self.labels['frame']
+        self._invalidate_index()
+        self._add_subports(points)
+
+    def __getitem__(self, selection):
+        self._materialize()
+        return super(Port, self).__getitem__(selection)
+
+    @property
+    def labels(self):
+        self._materialize()
+        return Compound.labels.fget(self)
 
-        self.translate(separation*unit_vector(orientation))
+    @labels.setter
+    def labels(self, value):
+        Compound.labels.fset(self, value)
 
     def _clone(self, clone_of=None, root_container=None):
         newone = super(Port, self)._clone(clone_of, root_container)
         newone.anchor = clone(self.anchor, clone_of, root_container)
         newone.used = self.used
+        newone._shape = self._shape
         return newone
 
     @property
@@ -92,6 +192,9 @@ class Port(Compound):
     def direction(self):
         """The unit vector pointing in the 'direction' of the Port
         """
+        if self._shape is not None:
+            # The first frame axis is parallel to the 'up' middle-top vector.
+            return _frame_basis(self.xyz_with_ports)[1][0]
         return unit_vector(self.xyz_with_ports[1]-self.xyz_with_ports[0])
 
     @property
@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+
+import mbuild as mb
+from mbuild.bond_graph import BondGraph
+from mbuild.tests.base_test import BaseTest
+
+
+class TestBondGraph(BaseTest):
+
+    @pytest.fixture
+    def chain(self):
+        particles = [mb.Particle(name='C') for _ in range(5)]
+        graph = BondGraph()
+        for p1, p2 in zip(particles[:-1], particles[1:]):
+            graph.add_edge(p1, p2)
+        return graph, particles
+
+    def test_add_remove_edge(self, chain):
+        graph, particles = chain
+        assert graph.number_of_nodes() == 5
+        assert graph.number_of_edges() == 4
+        assert graph.has_edge(particles[1], particles[0])
+        assert not graph.has_edge(particles[0], particles[2])
+
+        graph.add_edge(particles[0], particles[1])
+        assert graph.number_of_edges() == 4
+
+        graph.remove_edge(particles[0], particles[1])
+        assert not graph.has_edge(particles[0], particles[1])
+        assert not graph.has_node(particles[0])
+        assert graph.number_of_edges() == 3
+        with pytest.raises(ValueError):
+            graph.remove_edge(particles[0], particles[1])
+
+    def test_neighbors(self, chain):
+        graph, particles = chain
+        assert set(graph.neighbors(particles[2])) == {particles[1],
+                                                     particles[3]}
+        assert graph.neighbors(mb.Particle()) == []
+
+        idx = graph.node_indices(particles)
+        assert sorted(graph.neighbor_indices(idx[2])) == [idx[1], idx[3]]
+        assert list(graph.degree_array()[idx]) == [1, 2, 2, 2, 1]
+
+    def test_remove_node(self, chain):
+        graph, particles = chain
+        graph.remove_node(particles[2])
+        assert not graph.has_node(particles[2])
+        assert graph.number_of_edges() == 2
+        assert graph.neighbors(particles[1]) == [particles[0]]
+        assert len(graph.connected_components()) == 2
+
+    def test_edges(self, chain):
+        graph, particles = chain
+        bonds = {frozenset(edge) for edge in graph.edges()}
+        assert bonds == {frozenset(pair) for pair
+                         in zip(particles[:-1], particles[1:])}
+        edge_array = graph.edge_array()
+        assert edge_array.shape == (4, 2)
+        assert np.all(edge_array[:, 0] <= edge_array[:, 1])
+
+    def test_compose(self, chain):
+        graph, particles = chain
+        other = BondGraph()
+        extra = mb.Particle(name='H')
+        other.add_edge(particles[0], extra)
+        other.add_edge(particles[4], particles[0])
+        graph.compose(other)
+        assert graph.number_of_edges() == 6
+        assert set(graph.neighbors(particles[0])) == {particles[1],
+                                                     particles[4], extra}
+        assert len(graph.connected_components()) == 1
+
+    def test_subgraph(self, chain):
+        graph, particles = chain
+        subgraph = graph.subgraph(particles[:3])
+        assert subgraph.number_of_edges() == 2
+        assert not subgraph.has_node(particles[3])
+
+    def test_connected_components(self, chain):
+        graph, particles = chain
+        graph.remove_edge(particles[1], particles[2])
+        lone = mb.Particle()
+        graph.add_node(lone)
+        components = graph.connected_components()
+        assert sorted(len(c) for c in components) == [1, 2, 3]
+        assert [lone] in components
+
+    def test_compaction(self):
+        graph = BondGraph()
+        particles = [mb.Particle() for _ in range(3000)]
+        for p1, p2 in zip(particles[:-1], particles[1:]):
+            graph.add_edge(p1, p2)
+        assert graph._n_pending < graph._min_pending
+        for p1, p2 in zip(particles[:-1:2], particles[1::2]):
+            graph.remove_edge(p1, p2)
+        assert graph.number_of_edges() == 1499
+        assert not graph.has_edge(particles[0], particles[1])
+        assert graph.has_edge(particles[1], particles[2])
+        assert len(graph.connected_components()) == 1499
+        assert graph.number_of_edges() == len(graph.edges()) == 1499
+
+    def test_reclaim_removed_nodes(self):
+        compound = mb.Compound()
+        anchor = mb.Particle(name='C')
+        compound.add(anchor)
+        for _ in range(1000):
+            particle = mb.Particle(name='H')
+            compound.add(particle)
+            compound.add_bond((anchor, particle))
+            compound.remove(particle)
+        graph = compound.root.bond_graph
+        assert graph.number_of_nodes() == 0
+        assert len(graph._nodes) <= 2 * graph._min_dead
+
+        graph = BondGraph()
+        particles = [mb.Particle() for _ in range(200)]
+        for p1, p2 in zip(particles[:-1], particles[1:]):
+            graph.add_edge(p1, p2)
+        for particle in particles[1:150]:
+            graph.remove_node(particle)
+        assert len(graph._nodes) < 150
+        assert graph.number_of_edges() == len(graph.edges()) == 49
+        assert graph.has_edge(particles[150], particles[151])
+        assert not graph.has_node(particles[0])
+        assert graph.neighbors(particles[199]) == [particles[198]]
+
+    def test_copy(self, chain):
+        graph, particles = chain
+        replicas = [mb.Particle(name='C') for _ in particles]
+        mapping = dict(zip(particles, replicas))
+        copy = graph.copy(mapping)
+        assert copy.number_of_edges() == 4
+        assert copy.has_edge(replicas[0], replicas[1])
+        assert not copy.has_node(particles[0])
+
+        copy.remove_edge(replicas[0], replicas[1])
+        copy.add_edge(replicas[0], replicas[4])
+        assert graph.has_edge(particles[0], particles[1])
+        assert not graph.has_edge(particles[0], particles[4])
+        assert graph.number_of_edges() == 4
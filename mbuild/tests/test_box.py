@@ -1,6 +1,8 @@
 import pytest
 import numpy as np
 import mbuild as mb
+from mbuild.cell_list import CellList
+from mbuild.periodic_kdtree import PeriodicCKDTree
 from mbuild.tests.base_test import BaseTest
 
 
@@ -114,6 +116,35 @@ class TestBox(BaseTest):
         with pytest.raises(AssertionError):
             box.lengths = -1
 
+    def test_vectors(self):
+        box = mb.Box(lengths=[1, 2, 3])
+        assert np.allclose(box.vectors, np.diag([1, 2, 3]))
+
+        box = mb.Box(lengths=[1, 2, 3], angles=[70, 80, 120])
+        a, b, c = box.vectors
+        assert np.allclose(np.linalg.norm(box.vectors, axis=1), [1, 2, 3])
+        assert np.allclose(np.degrees([np.arccos(b @ c / 6),
+                                       np.arccos(a @ c / 3),
+                                       np.arccos(a @ b / 2)]), [70, 80, 120])
+        assert a[1] == a[2] == b[2] == 0
+
+        lattice = mb.Lattice(lattice_spacing=[1, 2, 3], angles=[70, 80, 120])
+        assert np.allclose(box.vectors, lattice.lattice_vectors *
+                           np.array([[1], [2], [3]]))
+
+        # No box has these angles.
+        box = mb.Box(lengths=[1, 1, 1], angles=[30, 30, 120])
+        with pytest.raises(ValueError):
+            box.vectors
+        with pytest.raises(ValueError):
+            mb.Lattice(lattice_spacing=[1, 1, 1], angles=[30, 30, 120])
+        with pytest.raises(ValueError):
+            PeriodicCKDTree(np.zeros((2, 3)), bounds=[1, 1, 1],
+                            angles=[30, 30, 120])
+        with pytest.raises(ValueError):
+            CellList(np.zeros((2, 3)), 0.2, bounds=[1, 1, 1],
+                     angles=[30, 30, 120])
+
     def test_compound_without_box(self, ethane):
         # Set coordinates to trigger the case where `box.mins`
         # coordinates can be less than [0, 0, 0]
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+import mbuild as mb
+from mbuild.cell_list import _OFFSETS, CellList
+from mbuild.tests.base_test import BaseTest
+
+
+def _distances(x, data, bounds, angles=None):
+    """Brute force minimum image distances. """
+    d = x[:, None, :] - data[None, :, :]
+    if angles is None:
+        lengths = np.where(bounds > 0, bounds, np.inf)
+        d -= np.where(bounds > 0, np.round(d / lengths) * bounds, 0)
+        return np.sqrt((d ** 2).sum(axis=-1))
+    vectors = mb.Box(lengths=bounds, angles=angles).vectors
+    fractional = d @ np.linalg.inv(vectors)
+    d = (fractional - np.round(fractional)) @ vectors
+    distances = np.full(d.shape[:2], np.inf)
+    for shift in _OFFSETS:
+        distances = np.minimum(distances, np.linalg.norm(
+            d + shift @ vectors, axis=-1))
+    return distances
+
+
+class TestCellList(BaseTest):
+
+    @staticmethod
+    def _points(n=300, seed=5):
+        rng = np.random.RandomState(seed)
+        return rng.uniform(-1, 4, size=(n, 3))
+
+    def _check(self, data, r, bounds, angles=None, **kwargs):
+        bounds = np.asarray(bounds, dtype=float)
+        cells = CellList(data, r, bounds=bounds, angles=angles)
+        distances = _distances(data, data, bounds, angles)
+        expected = np.argwhere(np.triu(distances <= r, k=1))
+        pairs, d = cells.pairs(return_distances=True, **kwargs)
+        assert np.array_equal(pairs, expected)
+        assert np.allclose(d, distances[tuple(expected.T)])
+
+        indptr, indices, d = cells.query(data[:25])
+        for i, row in enumerate(distances[:25]):
+            found = indices[indptr[i]:indptr[i + 1]]
+            assert sorted(found) == np.flatnonzero(row <= r).tolist()
+            assert np.all(np.diff(d[indptr[i]:indptr[i + 1]]) >= 0)
+            assert np.allclose(row[found], d[indptr[i]:indptr[i + 1]])
+
+    def test_non_periodic(self):
+        self._check(self._points(), 0.6, [0, 0, 0])
+        self._check(self._points(), 0.6, [0, 0, 0], batch_size=7)
+
+    def test_periodic(self):
+        self._check(self._points(), 0.6, [3, 3, 3])
+        self._check(self._points(), 0.6, [3, 2.5, 0])
+
+    def test_small_box(self):
+        # Fewer than three cells along a dimension.
+        self._check(self._points(), 0.7, [1.5, 3, 1.2])
+
+    def test_triclinic(self):
+        self._check(self._points(), 0.6, [3, 2.5, 3.5], angles=[80, 100, 120])
+        self._check(self._points(), 0.6, [1.4, 2.5, 3], angles=[90, 90, 60])
+
+    def test_update(self):
+        data = self._points()
+        cells = CellList(data, 0.5, bounds=[3, 3, 3])
+        moved = data + np.random.RandomState(0).normal(0, 0.3, data.shape)
+        cells.update(moved)
+        expected = CellList(moved, 0.5, bounds=[3, 3, 3])
+        assert np.array_equal(cells.pairs(), expected.pairs())
+
+    def test_cutoff(self):
+        cells = CellList(self._points(), 0.5)
+        assert len(cells.pairs(0.3)) < len(cells.pairs())
+        with pytest.raises(ValueError):
+            cells.pairs(0.6)
+        with pytest.raises(ValueError):
+            CellList(self._points(), 0)
+        with pytest.raises(ValueError):
+            CellList(self._points(), 0.5, bounds=[3, 3, 0], angles=[90, 90, 60])
+
+    def test_empty(self):
+        cells = CellList(np.empty((0, 3)), 0.5)
+        assert cells.n == 0
+        assert cells.pairs().shape == (0, 2)
+        indptr, indices, distances = cells.query([[0, 0, 0]])
+        assert np.array_equal(indptr, [0, 0])
@@ -17,4 +17,13 @@ class TestCoarseGraining(BaseTest):
         assert all(child.name.startswith(propyl.name)
                    for child in cg_clone.children)
         assert cg_clone.wrapped.n_particles == 20
-        assert cg_clone.wrapped.n_bonds == 19
\ No newline at end of file
+        assert cg_clone.wrapped.n_bonds == 19
+
+    def test_clone_many(self, hexane, propyl):
+        cg = mb.coarse_grain(hexane, particle_classes=[propyl.__class__])
+        copies = mb.clone_many(cg, 3)
+        assert len(copies) == 3
+        for cg_clone in copies:
+            assert cg_clone.n_particles == 2
+            assert cg_clone.n_bonds == 1
+            assert cg_clone.wrapped.n_particles == 20
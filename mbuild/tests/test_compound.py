@@ -1,5 +1,9 @@
+import copy
 import os
+import pickle
+import sys
 import time
+import warnings
 
 import numpy as np
 import parmed as pmd
@@ -8,6 +12,7 @@ import pytest
 
 import mbuild as mb
 from mbuild.exceptions import MBuildError
+from mbuild.periodic_kdtree import PeriodicCKDTree
 from mbuild.utils.geometry import calc_dihedral
 from mbuild.utils.io import get_fn, import_, has_foyer, has_intermol, has_openbabel, has_networkx
 from mbuild.tests.base_test import BaseTest
@@ -203,6 +208,106 @@ class TestCompound(BaseTest):
         assert compound.n_particles == 8 + 3
         assert compound.n_bonds == 7 + 2
 
+    def test_add_many(self, ethane, h2o):
+        compound = mb.Compound()
+        waters = [mb.clone(h2o) for _ in range(5)]
+        compound.add_many([ethane] + waters)
+        assert compound.n_particles == 8 + 5 * 3
+        assert compound.n_bonds == 7 + 5 * 2
+        assert compound['Ethane[0]'] is ethane
+        assert compound['H2O'] == waters
+        assert compound['H2O[4]'] is waters[-1]
+        assert all(water.parent is compound for water in waters)
+
+        compound.add_many([mb.clone(h2o) for _ in range(2)], label='water[$]')
+        assert len(compound['water']) == 2
+        compound.add(mb.clone(h2o))
+        assert compound['H2O[5]'] is compound['H2O'][-1]
+
+    def test_add_many_labels(self, h2o):
+        compound = mb.Compound()
+        waters = [mb.clone(h2o) for _ in range(3)]
+        compound.add_many(waters, label=['a', 'b', 'c'])
+        assert [compound[label] for label in 'abc'] == waters
+
+        with pytest.raises(ValueError):
+            compound.add_many([mb.clone(h2o)], label=['d', 'e'])
+        with pytest.raises(MBuildError):
+            compound.add_many([mb.clone(h2o), mb.clone(h2o)], label='f')
+
+        # Conflicts are found before any part is added.
+        compound = mb.Compound()
+        compound.add(mb.Particle(), 'y')
+        with pytest.raises(MBuildError):
+            compound.add_many([mb.Particle(), mb.Particle()], label=['z', 'y'])
+        with pytest.raises(MBuildError):
+            compound.add_many([mb.Particle(), mb.Particle()], label=['z', 'z'])
+        with pytest.raises(MBuildError):
+            compound.add_many([mb.Particle(), mb.Particle()],
+                              label=['x[$]', 'x[0]'])
+        assert len(compound.children) == 1
+        assert list(compound.labels) == ['y']
+        compound.add_many([mb.Particle(), mb.Particle()], label=['z', 'y'],
+                          replace=True)
+        assert len(compound.children) == 3
+
+    def test_numbered_labels(self, h2o):
+        compound = mb.Compound()
+        waters = [mb.clone(h2o) for _ in range(3)]
+        compound.add(waters)
+        assert compound['H2O[1]'] is waters[1]
+        assert 'H2O[3]' not in compound.labels
+        assert 'H2O[01]' not in compound.labels
+        assert list(compound.labels) == ['H2O', 'H2O[0]', 'H2O[1]', 'H2O[2]']
+        assert len(compound.labels) == 4
+        # Only the list label is stored.
+        assert len(compound.labels._store) == 1
+
+        compound.remove(waters[1])
+        assert 'H2O[1]' not in compound.labels
+        assert compound['H2O[2]'] is waters[2]
+        assert list(compound.labels) == ['H2O', 'H2O[0]', 'H2O[2]']
+
+        copy = mb.clone(compound)
+        assert list(copy.labels) == list(compound.labels)
+        assert copy['H2O[2]'] in copy.children
+        assert copy['H2O[2]'].referrers == {copy}
+
+        with pytest.raises(MBuildError):
+            compound.add(mb.clone(h2o), 'H2O[0]')
+        extra = mb.clone(h2o)
+        compound.add(extra, 'H2O[0]', replace=True)
+        assert compound['H2O[0]'] is extra
+        assert compound['H2O'][0] is waters[0]
+
+    def test_add_same_label_twice(self, h2o):
+        top = mb.Compound()
+        top.add(h2o, 'r', containment=False)
+        with pytest.raises(MBuildError):
+            top.add(h2o, 'r', containment=False)
+        top.add(h2o, 'r', containment=False, replace=True)
+        assert top['r'] is h2o
+
+    def test_add_many_existing_parent(self, ethane, h2o):
+        compound = mb.Compound()
+        with pytest.raises(MBuildError):
+            compound.add_many([h2o, h2o])
+        assert len(compound.children) == 0
+        with pytest.raises(ValueError):
+            compound.add_many([h2o, 'water'])
+        assert h2o.parent is None
+
+    def test_add_many_rigid(self, rigid_benzene):
+        compound = mb.Compound()
+        compound.add_many([mb.clone(rigid_benzene) for _ in range(3)])
+        assert compound.contains_rigid
+        assert compound.max_rigid_id == 2
+        assert [c.max_rigid_id for c in compound.children] == [0, 1, 2]
+
+        compound.add_many([mb.clone(rigid_benzene) for _ in range(2)],
+                          reset_rigid_ids=False)
+        assert compound.max_rigid_id == 2
+
     def test_init_with_subcompounds1(self, ethane):
         compound = mb.Compound(ethane)
         assert compound.n_particles == 8
@@ -248,6 +353,38 @@ class TestCompound(BaseTest):
         xyz = ch3.xyz_with_ports
         assert xyz.shape == (12, 3)
 
+    def test_xyz_shared_buffer(self, ethane):
+        xyz = ethane.xyz
+        assert np.shares_memory(xyz, ethane.xyz)
+        assert np.shares_memory(xyz, ethane.xyz_with_ports)
+        assert np.shares_memory(xyz, ethane.children[0].xyz)
+        assert all(np.shares_memory(xyz, particle.pos)
+                   for particle in ethane.particles())
+
+        ethane[0].pos = [1, 2, 3]
+        assert np.allclose(xyz[0], [1, 2, 3])
+        ethane.xyz = np.zeros((8, 3))
+        assert np.allclose(ethane[0].pos, [0, 0, 0])
+
+    def test_xyz_after_add(self, ethane, methane):
+        ethane.xyz
+        ethane.add(methane)
+        assert ethane.xyz.shape == (13, 3)
+        assert np.allclose(ethane.xyz[8:], methane.xyz)
+
+        methane.translate([1, 0, 0])
+        assert np.allclose(ethane.xyz[8:], methane.xyz)
+
+    def test_xyz_with_ports_order(self, ch3):
+        expected = np.array([particle.pos for particle
+                             in ch3.particles(include_ports=True)])
+        assert np.allclose(ch3.xyz_with_ports, expected)
+
+        new_xyz = np.random.random(expected.shape)
+        ch3.xyz_with_ports = new_xyz
+        assert np.allclose([particle.pos for particle
+                            in ch3.particles(include_ports=True)], new_xyz)
+
     def test_xyz_setter_bad_shape(self):
         single_compound = mb.Compound()
         with pytest.raises(ValueError):
@@ -264,6 +401,165 @@ class TestCompound(BaseTest):
         only_C = ethane.particles_by_name('C')
         assert sum(1 for _ in only_C) == 2
 
+    def test_particles_by_name_subcompound(self, ethane):
+        methyl = ethane.children[1]
+        assert list(methyl.particles_by_name('H')) == [
+            p for p in methyl.particles() if p.name == 'H']
+
+        methyl[1].name = 'D'
+        assert sum(1 for _ in ethane.particles_by_name('H')) == 5
+        assert list(ethane.particles_by_name('D')) == [methyl[1]]
+
+    def test_particle_index(self, ethane, methane):
+        particles = list(ethane.particles())
+        assert ethane.n_particles == 8
+        assert [ethane[i] for i in range(8)] == particles
+        assert ethane[-1] is particles[-1]
+        assert ethane.children[1][0] is particles[4]
+        with pytest.raises(IndexError):
+            ethane[8]
+
+        ethane.add(methane)
+        assert ethane.n_particles == 13
+        assert ethane[8] is methane[0]
+
+        ethane.remove(methane)
+        assert ethane.n_particles == 8
+        assert ethane[-1] is particles[-1]
+
+    def test_root(self, ethane, h2o):
+        hydrogen = ethane.children[0][1]
+        assert hydrogen.root is ethane
+
+        system = mb.Compound()
+        system.add(ethane)
+        assert hydrogen.root is system
+        assert ethane['methyl1'].root is system
+
+        top = mb.Compound(subcompounds=[system, h2o])
+        assert hydrogen.root is top
+        assert h2o[0].root is top
+        assert top.root is top
+
+    def test_root_after_remove(self, ethane):
+        system = mb.Compound(subcompounds=ethane)
+        methyl = ethane.children[0]
+        hydrogen = methyl.children[1]
+        assert hydrogen.root is system
+
+        system.remove(methyl)
+        assert methyl.parent is None
+        assert methyl.root is methyl
+        for part in [hydrogen, ethane.children[0].children[0]]:
+            ancestors = list(part.ancestors())
+            assert part.root is (ancestors[-1] if ancestors else part)
+        assert ethane.children[0].children[0].root is system
+
+    def test_versions(self, ethane, h2o):
+        system = mb.Compound()
+        versions = [(system.topology_version, system.coordinate_version)]
+
+        def changed(topology, coordinates):
+            topology_version, coordinate_version = versions[-1]
+            versions.append((system.topology_version,
+                             system.coordinate_version))
+            return ((topology_version != system.topology_version) ==
+                    topology and
+                    (coordinate_version != system.coordinate_version) ==
+                    coordinates)
+
+        system.add(ethane)
+        assert changed(True, True)
+        assert ethane[0].topology_version == system.topology_version
+        ethane[0].pos += 0.1
+        assert changed(False, True)
+        system.translate([1, 0, 0])
+        assert changed(False, True)
+        system.xyz = system.xyz + 0.1
+        assert changed(False, True)
+        system.remove_bond((ethane[0], ethane[4]))
+        assert changed(True, True)
+        system.add_bond((ethane[0], ethane[4]))
+        assert changed(True, False)
+        system.add(h2o)
+        assert changed(True, True)
+        system.name = 'renamed'
+        assert changed(False, False)
+
+        methyl = ethane.children[0]
+        methyl_version = methyl.topology_version
+        system.remove(methyl)
+        assert changed(True, True)
+        assert methyl.topology_version != methyl_version
+
+    def test_traversal_deep_hierarchy(self):
+        top = compound = mb.Compound()
+        for _ in range(3 * sys.getrecursionlimit()):
+            child = mb.Compound()
+            compound.add(child)
+            compound = child
+        compound.add(mb.Particle(name='C'))
+        particle = compound.children[0]
+
+        n_successors = 3 * sys.getrecursionlimit() + 1
+        assert len(list(top.successors())) == n_successors
+        assert list(top.particles()) == [particle]
+        assert len(list(particle.ancestors())) == n_successors
+
+        # Below the root the traversal does not wait for the index.
+        compound.add(mb.Particle(name='H'))
+        assert len(list(top.children[0].successors())) == n_successors
+        assert len(list(top.successors())) == n_successors + 1
+
+    def test_traversal_matches_hierarchy(self, ethane):
+        from mbuild.compound import _preorder
+
+        box = mb.Compound(subcompounds=mb.clone_many(ethane, 3))
+        carbons = list(box.children[1].particles_by_name('C'))
+        box.remove_bond(carbons)
+        assert box._particle_index() is not None
+
+        for compound in [box, box.children[1], box.children[1].children[0]]:
+            walked = list(_preorder(compound))
+            assert list(compound.successors()) == walked
+            assert list(compound.particles(include_ports=True)) == [
+                part for part in walked if not part.children]
+            assert list(compound.particles()) == [
+                part for part in walked
+                if not part.children and not part.port_particle]
+            assert compound.all_ports() == [
+                part for part in walked if isinstance(part, mb.Port)]
+        assert len(box.all_ports()) == 2
+
+    def test_add_bond_deep_hierarchy(self):
+        def build(depth):
+            top = compound = mb.Compound()
+            for _ in range(depth):
+                child = mb.Compound()
+                compound.add(child)
+                compound = child
+            particles = [mb.Particle(name='C') for _ in range(2)]
+            compound.add(particles)
+            return top, particles
+
+        top, (a, b) = build(200)
+        assert a.root is top
+        # The root is cached on the Particle, so later lookups take a single
+        # step instead of walking up 200 levels.
+        assert a._root is top
+        for _ in range(3):
+            a.add_bond((a, b))
+        assert top.n_bonds == 1
+
+        # Wrapping the hierarchy leaves the cached root stale until the next
+        # lookup, which hops along the cached roots and updates them.
+        wrapper = mb.Compound()
+        wrapper.add(top)
+        assert a._root is top
+        assert a.root is wrapper
+        assert a._root is wrapper
+        assert wrapper.n_bonds == 1
+
     def test_particles_in_range(self, ethane):
         group = ethane.particles_in_range(ethane[0], 0.141)
         assert sum([1 for x in group if x.name == 'H']) == 3
@@ -273,10 +569,149 @@ class TestCompound(BaseTest):
         assert sum([1 for x in group if x.name == 'H']) == 3
         assert sum([1 for x in group if x.name == 'C']) == 1
 
+    def test_particles_in_range_many(self, ethane):
+        system = mb.Compound([ethane, mb.clone(ethane)])
+        system.children[1].translate([0.3, 0.1, 0])
+        system.periodicity = np.array([0.5, 0.6, 0.7])
+        xyz = system.xyz.copy()
+        hydrogens = list(system.particles_by_name('H'))
+        indptr, indices, distances = system.particles_in_range_many(
+            hydrogens, 0.2)
+        assert len(indptr) == len(hydrogens) + 1
+        d = xyz[:, None, :] - xyz[None, :, :]
+        d -= np.round(d / system.periodicity) * system.periodicity
+        d = np.linalg.norm(d, axis=-1)
+        particles = list(system.particles())
+        for i, hydrogen in enumerate(hydrogens):
+            row = d[particles.index(hydrogen)]
+            found = indices[indptr[i]:indptr[i + 1]]
+            assert sorted(found) == np.flatnonzero(row < 0.2).tolist()
+            assert np.allclose(distances[indptr[i]:indptr[i + 1]], row[found])
+            assert np.all(np.diff(distances[indptr[i]:indptr[i + 1]]) >= 0)
+
+        same = system.particles_in_range_many(
+            [h.pos for h in hydrogens], 0.2, max_particles=2)
+        assert np.all(np.diff(same[0]) <= 2)
+        assert np.array_equal(same[1][same[0][:-1]], indices[indptr[:-1]])
+
+        tree = system._periodic_kdtree()
+        assert system._periodic_kdtree() is tree
+        system.children[1].translate([0.01, 0, 0])
+        assert system._periodic_kdtree() is not tree
+
+    def test_particles_in_range_bound(self):
+        system = mb.Compound([mb.Particle(pos=[0, 0, 0]),
+                              mb.Particle(pos=[0.5, 0, 0]),
+                              mb.Particle(pos=[0, 0.25, 0])])
+        # The upper bound is exclusive.
+        found = system.particles_in_range(system[0], 0.5)
+        assert list(found) == [system[0], system[2]]
+        indptr, indices, _ = system.particles_in_range_many(
+            [system[0]], 0.5)
+        assert indices.tolist() == [0, 2]
+        assert len(system.particles_in_range(system[0], 0.5001)) == 3
+        found = system.children[1].particles_in_range(system[1], 1.0)
+        assert list(found) == [system[1]]
+
+    def test_particles_in_range_single_query(self, ethane, monkeypatch):
+        system = mb.Compound(mb.clone_many(ethane, 5))
+        for i, part in enumerate(system.children):
+            part.translate([i, 0, 0])
+        system.particles_in_range(system[0], 0.2)
+        calls = {'particles': 0, 'query_ball_point': 0}
+
+        def counted(cls, name):
+            method = getattr(cls, name)
+
+            def wrapper(*args, **kwargs):
+                calls[name] += 1
+                return method(*args, **kwargs)
+            monkeypatch.setattr(cls, name, wrapper)
+
+        counted(mb.Compound, 'particles')
+        counted(PeriodicCKDTree, 'query_ball_point')
+        found = system.particles_in_range(system[0], 0.2)
+        assert found[0] is system[0] and len(found) > 1
+        assert calls == {'particles': 0, 'query_ball_point': 0}
+
+    def test_particles_in_range_moved_in_place(self, ethane):
+        system = mb.Compound([ethane, mb.clone(ethane)])
+        particle = system[0]
+        assert len(system.particles_in_range(particle, 0.2)) > 1
+        system.xyz[0] += 100
+        found = system.particles_in_range(particle, 0.2)
+        assert len(found) == 1 and found[0] is particle
+        particle.pos[:] -= 100
+        assert len(system.particles_in_range(particle, 0.2)) > 1
+
     def test_generate_bonds(self, ch3):
         ch3.generate_bonds('H', 'H', dmin=0.01, dmax=2.0)
         assert ch3.n_bonds == 3 + 3
 
+    def test_generate_bonds_triclinic(self):
+        lattice = mb.Lattice(lattice_spacing=[0.25, 0.25, 0.4],
+                             angles=[90, 90, 120],
+                             lattice_points={'A': [[0, 0, 0]]})
+        with pytest.warns(UserWarning):
+            layer = lattice.populate(x=4, y=4, z=1)
+        box = lattice.get_populated_box(x=4, y=4, z=1)
+        layer.generate_bonds('A', 'A', dmin=0.2, dmax=0.26, box=box)
+        # Six neighbors per site in a periodic hexagonal layer.
+        assert layer.n_bonds == 16 * 6 // 2
+
+    def test_generate_bonds_rules(self):
+        rng = np.random.RandomState(0)
+        particles = [mb.Particle(name=name, pos=pos) for name, pos in
+                     zip(rng.choice(['A', 'B', 'C'], 300),
+                         rng.uniform(0, 2, size=(300, 3)))]
+        rules = [('A', 'B', 0.1, 0.25), ('C', 'C', 0.0, 0.2),
+                 ('B', 'D', 0.0, 0.3)]
+        together = mb.Compound([mb.clone(p) for p in particles])
+        together.periodicity = np.array([2.0, 2.0, 2.0])
+        together.generate_bonds(rules=rules)
+        separate = mb.Compound([mb.clone(p) for p in particles])
+        separate.periodicity = np.array([2.0, 2.0, 2.0])
+        for rule in rules:
+            separate.generate_bonds(*rule)
+        assert together.n_bonds == separate.n_bonds > 0
+        bonds = [set(map(tuple, np.sort(compound.bond_graph.edge_array(
+            list(compound.particles())), axis=1).tolist()))
+            for compound in (together, separate)]
+        assert bonds[0] == bonds[1]
+
+        n_bonds = together.n_bonds
+        together.generate_bonds('A', 'B', 0.0, 0.0)
+        together.generate_bonds(rules=[('A', 'B', 0.0, -1.0)])
+        together.generate_bonds(rules=[])
+        assert together.n_bonds == n_bonds
+
+        with pytest.raises(ValueError):
+            together.generate_bonds('A', 'B', 0.1)
+        with pytest.raises(ValueError):
+            together.generate_bonds('A', rules=rules)
+        with pytest.raises(ValueError):
+            together.generate_bonds(rules=[('A', 'B', 0.1)])
+
+    def test_find_overlaps(self, ethane):
+        assert ethane.find_overlaps(0.12) == []
+        pairs = ethane.find_overlaps(0.12, exclude_bonded=False, indices=True)
+        assert len(pairs) == ethane.n_bonds - 1
+
+        moved = mb.clone(ethane)
+        moved.translate([0, 0, 0.02])
+        system = mb.Compound([ethane, moved])
+        pairs = system.find_overlaps(0.03)
+        assert len(pairs) == ethane.n_particles
+        assert all(a.name == b.name for a, b in pairs)
+        assert np.array_equal(
+            system.find_overlaps(0.03, indices=True),
+            [[i, i + 8] for i in range(8)])
+
+        pair = mb.Compound([mb.Particle(pos=[0.01, 0.5, 0.5]),
+                            mb.Particle(pos=[0.99, 0.5, 0.5])])
+        assert pair.find_overlaps(0.05) == []
+        assert len(pair.find_overlaps(0.05, box=mb.Box([1, 1, 1]))) == 1
+
     def test_remove_from_box(self, ethane):
         n_ethanes = 5
         box = mb.fill_box(ethane, n_ethanes, [3, 3, 3])
@@ -370,6 +805,83 @@ class TestCompound(BaseTest):
         assert ethane.n_bonds == 0
         assert len(ethane.children) == 0
 
+    def test_remove_batch(self, monkeypatch):
+        compound = mb.Compound()
+        compound.add([mb.Particle(name='C', pos=[0.1 * i, 0, 0])
+                      for i in range(1000)])
+        particles = list(compound.particles())
+        for a, b in zip(particles[:-1], particles[1:]):
+            compound.add_bond((a, b))
+        to_remove = particles[::2]
+
+        # Removing many parts at once must not rebuild the particle index
+        # (or anything else linear in the size of the Compound) per part.
+        builds = []
+        init = mb.compound._ParticleIndex.__init__
+        def counting_init(index, root):
+            builds.append(root)
+            init(index, root)
+        monkeypatch.setattr(mb.compound._ParticleIndex, '__init__',
+                            counting_init)
+        compound.remove(to_remove)
+        assert len(builds) <= 1
+        assert compound.n_particles == 500
+        assert compound.n_bonds == 0
+        assert list(compound.particles()) == particles[1::2]
+        assert all(particle.parent is None for particle in to_remove)
+
+    def test_remove_bonded_subcompounds(self, ethane):
+        box = mb.fill_box(ethane, 6, [3, 3, 3])
+        box.remove([box.children[0], box.children[3]])
+        assert box.n_particles == 4 * ethane.n_particles
+        assert box.n_bonds == 4 * ethane.n_bonds
+        assert len(box.all_ports()) == 0
+
+    def test_periodicity_in_place(self):
+        compound = mb.Compound()
+        compound.periodicity[2] = 5.0
+        assert np.array_equal(compound.periodicity, [0, 0, 5])
+        assert np.array_equal(mb.clone(compound).periodicity, [0, 0, 5])
+
+    def test_particle_leaf(self):
+        particle = mb.Particle(name='C', pos=[1, 2, 3], charge=-0.5)
+        assert particle.name == 'C'
+        assert np.allclose(particle.pos, [1, 2, 3])
+        assert particle.charge == -0.5
+        assert particle.rigid_id is None
+        assert particle.parent is None
+        assert len(particle.children) == 0
+        assert not particle.periodicity.any()
+        assert not vars(particle)
+
+        compound = mb.Compound()
+        compound.add(particle, 'atom')
+        assert particle.parent is compound
+        assert particle.referrers == {compound}
+        assert compound.labels['atom'] is particle
+
+        particle.labels['self'] = particle
+        particle.index = 7
+        copy = mb.clone(particle)
+        assert copy.index == 7
+        assert copy.labels['self'] is copy
+
+    def test_particle_memory(self):
+        tracemalloc = pytest.importorskip('tracemalloc')
+        n_particles = 20000
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            compound = mb.Compound()
+            compound.add([mb.Particle(name='C', pos=[0.1 * i, 0, 0])
+                          for i in range(n_particles)])
+            used = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        assert compound.n_particles == n_particles
+        # About 1.7 kB per particle with per-particle containers.
+        assert used / n_particles < 1000
+
     def test_remove_no_bond_graph(self):
         compound = mb.Compound()
         particle = mb.Compound(name='C', pos=[0, 0, 0])
@@ -667,6 +1179,133 @@ class TestCompound(BaseTest):
 
         assert np.allclose(compound2.xyz, compound3.xyz)
 
+    def test_select(self, ethane, h2o):
+        system = mb.Compound([ethane, h2o])
+        particles = list(system.particles())
+
+        def expected(condition):
+            return [p for p in particles if condition(p)]
+
+        assert system.select() == particles
+        assert system.select(name='H') == expected(lambda p: p.name == 'H')
+        assert system.select(name=['C', 'O']) == expected(
+            lambda p: p.name in ['C', 'O'])
+        assert system.select(element='O') == [h2o[0]]
+        assert system.select(within='H2O') == list(h2o.particles())
+        assert system.select(within='CH3', name='C') == expected(
+            lambda p: p.name == 'C')
+        assert system.select(degree=4) == expected(lambda p: p.name == 'C')
+        assert system.select(degree=[2, 4]) == expected(
+            lambda p: p.name in ['C', 'O'])
+
+        z = np.median(system.xyz[:, 2])
+        assert system.select(z=(z, None)) == expected(lambda p: p.pos[2] > z)
+        assert system.select(name='H', z=(None, z)) == expected(
+            lambda p: p.name == 'H' and p.pos[2] < z)
+        box = mb.Box(mins=ethane.boundingbox.mins, maxs=ethane.boundingbox.maxs)
+        assert set(system.select(box=box)) >= set(ethane.particles())
+
+        h2o[0].rigid_id = 0
+        assert system.select(rigid_id=0) == [h2o[0]]
+        assert np.array_equal(system.select(name='O', indices=True), [8])
+        assert ethane.select(name='H', indices=True).tolist() == [
+            i for i, p in enumerate(ethane.particles()) if p.name == 'H']
+
+        h2o[1].name = 'X'
+        assert system.select(name='X') == [h2o[1]]
+        system.remove_bond((h2o[0], h2o[1]))
+        assert system.select(within='H2O', degree=1) == [h2o[0], h2o[2]]
+
+    def test_freeze(self, ethane, h2o):
+        compound = mb.Compound([ethane, h2o])
+        h2o[0].charge = -0.8
+        system = compound.freeze()
+        assert isinstance(system, mb.FlatSystem)
+        assert system.n_particles == 11
+        assert system.n_bonds == compound.n_bonds == 9
+        assert system.names.tolist() == [p.name for p in compound.particles()]
+        assert system.elements.tolist().count('H') == 8
+        assert np.allclose(system.xyz, compound.xyz)
+        assert np.allclose(system.charges.sum(), -0.8)
+        assert system.molecule_ids.tolist() == [0] * 8 + [1] * 3
+        assert (system.rigid_ids == -1).all()
+        assert (system.residue_ids == -1).all()
+        bonds = [(p.name for p in pair) for pair in compound.bonds()]
+        assert sorted(tuple(sorted(pair)) for pair in bonds) == sorted(
+            tuple(sorted(system.names[pair])) for pair in system.bonds)
+
+        with pytest.raises(ValueError):
+            system.xyz[0] = 1.0
+        with pytest.raises(AttributeError):
+            system.names = None
+        compound.translate([1, 0, 0])
+        assert not np.allclose(system.xyz, compound.xyz)
+
+    def test_freeze_residues(self, h2o, ethane, ch3):
+        system = mb.Compound([h2o, mb.clone(h2o), ethane])
+        frozen = system.freeze(residues=['Ethane', 'H2O'], chains='CH3')
+        assert frozen.residue_names == ('H2O', 'H2O', 'Ethane')
+        assert frozen.residue_ids.tolist() == [0] * 3 + [1] * 3 + [2] * 8
+        assert frozen.chain_ids.tolist() == [-1] * 6 + [0] * 4 + [1] * 4
+        assert frozen.molecule_ids.tolist() == [0] * 3 + [1] * 3 + [2] * 8
+
+        frozen = ch3.freeze(show_ports=True)
+        assert frozen.n_particles == ch3.n_particles + 8
+        assert frozen.port_particles.sum() == 8
+        assert (frozen.masses[frozen.port_particles] == 0).all()
+        assert frozen.to_parmed().residues[-1].name == 'PRT'
+
+    @pytest.mark.parametrize('chains, residues, expected', [
+        ('CH3', 'Ethane',
+         (5, 7, [0] * 6 + [2] * 4 + [3] * 4 + [5] * 4 + [6] * 4,
+          [0] * 6 + [1] * 4 + [2] * 4 + [3] * 4 + [4] * 4)),
+        (['Ethane'], ['CH3', 'H2O'],
+         (3, 9, [1] * 3 + [5] * 3 + [3] * 4 + [4] * 4 + [7] * 4 + [8] * 4,
+          [0] * 6 + [1] * 8 + [2] * 8)),
+        (['Ethane', 'H2O'], 'CH3',
+         (3, 9, [0] * 6 + [3] * 4 + [4] * 4 + [7] * 4 + [8] * 4,
+          [0] * 6 + [2] * 8 + [4] * 8)),
+    ])
+    def test_to_trajectory_chains_residues(self, h2o, ethane, chains,
+                                           residues, expected):
+        system = mb.Compound([h2o, ethane, mb.clone(h2o), mb.clone(ethane)])
+        top = system.to_trajectory(chains=chains, residues=residues).top
+        n_chains, n_residues, residue_ids, chain_ids = expected
+        assert top.n_chains == n_chains
+        assert top.n_residues == n_residues
+        assert [atom.residue.index for atom in top.atoms] == residue_ids
+        assert [atom.residue.chain.index for atom in top.atoms] == chain_ids
+
+        top = ethane.to_trajectory(chains='CH3', residues='Ethane').top
+        assert top.n_chains == 2
+        assert top.n_residues == 4
+
+    def test_freeze_element_guess_once(self):
+        compound = mb.Compound([mb.Particle(name='foobar')])
+        with pytest.warns(UserWarning):
+            compound.freeze()
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', UserWarning)
+            compound.freeze()
+            compound.to_trajectory()
+
+    def test_freeze_reuses_topology(self, ethane):
+        system = ethane.freeze()
+        assert ethane.freeze().names is system.names
+
+        ethane[0].charge = 0.5
+        frozen = ethane.freeze()
+        assert frozen.charges is not system.charges
+        assert frozen.charges[0] == 0.5
+
+        ethane[0].name = 'O'
+        frozen = ethane.freeze()
+        assert frozen.names[0] == 'O'
+        assert frozen.elements[0] == 'O'
+
+        ethane.remove_bond((ethane[0], ethane[1]))
+        assert ethane.freeze().n_bonds == 6
+
     def test_fillbox_then_parmed(self):
         # This test would fail with the old to_parmed code (pre PR #699)
 
@@ -729,6 +1368,14 @@ class TestCompound(BaseTest):
         compound.periodicity = np.array([0.2, 0.2, 0.2])
         assert round(compound.min_periodic_distance(C_pos[0], C_pos[1]), 2) == 0.06
 
+        box = mb.Box(lengths=[1, 1, 1], angles=[90, 90, 120])
+        xyz0 = np.zeros(3)
+        assert np.isclose(compound.min_periodic_distance(
+            xyz0, xyz0 + box.vectors[0] + box.vectors[1] + [0.1, 0, 0], box),
+            0.1)
+        assert np.isclose(compound.min_periodic_distance(
+            xyz0, [0.9, 0, 0], box=mb.Box(lengths=[1, 1, 1])), 0.1)
+
     def test_bond_graph(self, ch3):
         compound = mb.Compound()
         compound.add(ch3)
@@ -756,6 +1403,28 @@ class TestCompound(BaseTest):
         assert not any(compound.bond_graph.has_node(particle)
                        for particle in ch3_nobonds.particles())
 
+    def test_bonds_subcompound(self, ethane, h2o):
+        system = mb.Compound(subcompounds=[ethane, h2o])
+        system.n_particles
+        bond_graph = system.bond_graph
+
+        def bonds(compound):
+            return {frozenset(bond) for bond in compound.bonds()}
+
+        for part in [ethane, ethane['methyl1'], h2o, ethane[0]]:
+            expected = {frozenset(bond) for bond in
+                        bond_graph.subgraph(part.particles()).edges()}
+            assert bonds(part) == expected
+            assert part.n_bonds == len(expected)
+        assert ethane.n_bonds == 7
+        assert ethane['methyl1'].n_bonds == 3
+
+        system.add_bond((ethane[0], h2o[0]))
+        assert ethane.n_bonds == 7
+        system.add_bond((ethane[1], ethane[5]))
+        assert ethane.n_bonds == 8
+        assert ethane['methyl1'].n_bonds == 3
+
     def test_update_coords_update_ports(self, ch2):
         distances = np.round([ch2.min_periodic_distance(port.pos, ch2[0].pos)
                               for port in ch2.referenced_ports()], 5)
@@ -775,6 +1444,17 @@ class TestCompound(BaseTest):
         assert np.array_equal(distances, updated_distances)
         assert np.array_equal(orientations, updated_orientations)
 
+    def test_update_port_locations_many(self, ch2):
+        system = mb.Compound(mb.clone_many(ch2, 50))
+        ports = system.all_ports()
+        offsets = [port.xyz_with_ports - port.anchor.pos for port in ports]
+
+        xyz_init = system.xyz.copy()
+        system.xyz = xyz_init + np.random.random(xyz_init.shape)
+        system._update_port_locations(xyz_init)
+        for port, offset in zip(ports, offsets):
+            assert np.allclose(port.xyz_with_ports - port.anchor.pos, offset)
+
     def test_charge(self, ch2, ch3):
         compound = mb.Compound(charge=2.0)
         assert compound.charge == 2.0
@@ -792,6 +1472,27 @@ class TestCompound(BaseTest):
         with pytest.raises(AttributeError):
             compound.charge = 2.0
 
+    def test_charge_aggregates(self, ch2, ch3):
+        compound = mb.Compound(subcompounds=[ch2, ch3])
+        assert compound.charge == 0.0
+        ch3[0].charge = 1.0
+        ch2[1].charge = -0.25
+        assert ch3.charge == 1.0
+        assert compound.charge == 0.75
+        assert compound.n_particles == 7
+
+        compound.remove(ch3[0])
+        assert compound.charge == -0.25
+        assert compound.n_particles == 6
+
+        # A Particle that gets children no longer counts its own charge.
+        particle = mb.Compound(name='A', charge=2.0)
+        compound.add(particle)
+        assert compound.charge == 1.75
+        particle.add(mb.Particle(name='B', charge=0.5))
+        assert compound.charge == 0.25
+        assert compound.n_particles == 7
+
     def test_charge_subcompounds(self, ch2, ch3):
         ch2[0].charge = 0.5
         ch2[1].charge = -0.25
@@ -869,6 +1570,109 @@ class TestCompound(BaseTest):
         with pytest.raises(MBuildError):
             ch3_clone = mb.clone(ch3)
 
+    def test_clone_referrers(self, ethane):
+        referrers = [set(part.referrers) for part in ethane.successors()]
+        ethane_clone = mb.clone(ethane)
+        assert [part.referrers for part in ethane.successors()] == referrers
+        for part in ethane_clone.successors():
+            assert part.parent in part.referrers
+
+    def test_clone_many(self, ch3):
+        ch3.add_bond((ch3[1], ch3[2]))
+        copies = mb.clone_many(ch3, 3)
+        assert len(copies) == 3
+        assert len(set(copies)) == 3
+        for copy in copies:
+            assert copy is not ch3
+            assert type(copy) is type(ch3)
+            assert copy.n_particles == ch3.n_particles
+            assert copy.n_bonds == ch3.n_bonds == 4
+            assert np.allclose(copy.xyz_with_ports, ch3.xyz_with_ports)
+            assert list(copy.labels.keys()) == list(ch3.labels.keys())
+            assert copy['C'][0] is copy[0]
+            assert copy['up'].anchor is copy[0]
+            assert copy['up'].parent is copy
+            particles = set(copy.particles())
+            assert all(set(bond) <= particles for bond in copy.bonds())
+
+        copies[0].translate([1, 0, 0])
+        copies[0]['C[0]'].name = 'X'
+        assert np.allclose(copies[1].xyz_with_ports, ch3.xyz_with_ports)
+        assert copies[1][0].name == ch3[0].name == 'C'
+        copies[1].remove_bond((copies[1][1], copies[1][2]))
+        assert copies[2].n_bonds == ch3.n_bonds == 4
+
+        box = mb.Compound(subcompounds=copies)
+        assert box.n_bonds == 3 + 2 * 4
+
+    def test_pickle(self, ch3, h2o):
+        h2o[0].charge = -0.8
+        h2o[1].rigid_id = 0
+        system = mb.Compound([ch3, h2o], periodicity=[2, 2, 2])
+        system.add(ch3[2], label='outside_hierarchy', containment=False)
+        del ch3.labels['H[1]']
+        copy = pickle.loads(pickle.dumps(system))
+        copy_ch3, copy_h2o = copy.children
+
+        assert type(copy_ch3) is type(ch3)
+        assert copy.n_particles == system.n_particles
+        assert copy.n_bonds == system.n_bonds
+        assert np.allclose(copy.xyz_with_ports, system.xyz_with_ports)
+        assert np.allclose(copy.periodicity, system.periodicity)
+        assert [p.name for p in copy.particles(include_ports=True)] == [
+            p.name for p in system.particles(include_ports=True)]
+        assert list(copy_ch3.labels) == list(ch3.labels)
+        assert 'H[1]' not in copy_ch3.labels
+        assert copy.charge == system.charge == -0.8
+        assert copy_h2o[1].rigid_id == 0
+        assert copy.max_rigid_id == 0
+        assert copy_ch3['up'].anchor is copy_ch3[0]
+        assert copy_ch3['H[0]'] is copy_ch3[1]
+        assert copy_ch3[1].parent is copy_ch3
+        assert copy_ch3[1].referrers == {copy_ch3}
+        assert copy['outside_hierarchy'] is copy_ch3[2]
+        assert copy['outside_hierarchy'].referrers == {copy, copy_ch3}
+        particles = set(copy.particles())
+        assert all(set(bond) <= particles for bond in copy.bonds())
+
+        copy_ch3.translate([1, 0, 0])
+        assert np.allclose(copy_ch3.xyz, ch3.xyz + [1, 0, 0])
+
+    def test_pickle_part(self, ethane):
+        part = pickle.loads(pickle.dumps(ethane['methyl2'][0]))
+        assert part.root.n_particles == ethane.n_particles
+        assert part is part.root['methyl2'][0]
+
+    def test_copy_part(self, ethane):
+        methyl = ethane.children[0]
+        shallow = copy.copy(methyl)
+        assert shallow is not methyl
+        assert type(shallow) is type(methyl)
+        assert shallow.parent is ethane
+        assert shallow.children == methyl.children
+        assert shallow.name == methyl.name
+
+        deep = copy.deepcopy(methyl)
+        assert deep is not methyl
+        assert deep.root is not ethane
+        assert deep.root.n_particles == ethane.n_particles
+        assert deep.root.n_bonds == ethane.n_bonds
+        assert np.allclose(deep.xyz, methyl.xyz)
+        deep.translate([1, 0, 0])
+        assert not np.allclose(deep.xyz, methyl.xyz)
+        assert methyl.parent is ethane
+
+    def test_pickle_deep(self):
+        compound = mb.Compound()
+        part = compound
+        for _ in range(5000):
+            part.add(mb.Compound())
+            part = part.children[0]
+        part.add(mb.Particle(name='C', pos=[1, 2, 3]))
+        copy = pickle.loads(pickle.dumps(compound))
+        assert copy.n_particles == 1
+        assert np.allclose(copy.xyz, [[1, 2, 3]])
+
     def test_load_mol2_mdtraj(self):
         with pytest.raises(KeyError):
             mb.load(get_fn('benzene-nonelement.mol2'))
@@ -14,6 +14,7 @@ from mbuild.coordinate_transform import (Translation, CoordinateTransform,
                                          y_axis_transform, z_axis_transform,
                                          rotate, spin, spin_x, spin_y, spin_z,
                                          angle, _spin)
+from mbuild.exceptions import MBuildError
 from mbuild.tests.base_test import BaseTest
 import mbuild as mb
 
@@ -83,13 +84,13 @@ class TestCoordinateTransform(BaseTest):
         assert (rigid_transform.apply_to(np.array([[2, 3, 4]])) == B).all()
 
     def test_rotate_0(self, methane):
-        before = methane.xyz_with_ports
+        before = methane.xyz_with_ports.copy()
         methane.rotate(0.0, np.asarray([1.0, 0.0, 0.0]))
         after = methane.xyz_with_ports
         assert (np.array_equal(before, after))
 
     def test_rotate_2pi(self, methane):
-        before = methane.xyz_with_ports
+        before = methane.xyz_with_ports.copy()
         methane.rotate(2*np.pi, np.asarray([1.0, 0.0, 0.0]))
         after = methane.xyz_with_ports
         assert (np.allclose(before, after))
@@ -143,32 +144,32 @@ class TestCoordinateTransform(BaseTest):
             methane.rotate(0.1, (1, 0))
 
     def test_spin_360x(self, methane):
-        before = methane.xyz_with_ports
+        before = methane.xyz_with_ports.copy()
         methane.spin(2*np.pi, np.asarray([1, 0, 0]))
         assert(np.allclose(before, methane.xyz_with_ports, atol=1e-16))
 
     def test_spin_360y(self, methane):
-        before = methane.xyz_with_ports
+        before = methane.xyz_with_ports.copy()
         methane.spin(2*np.pi, np.asarray([0, 1, 0]))
         assert(np.allclose(before, methane.xyz_with_ports, atol=1e-16))
 
     def test_spin_360z(self, methane):
-        before = methane.xyz_with_ports
+        before = methane.xyz_with_ports.copy()
         methane.spin(2*np.pi, np.asarray([0, 0, 1]))
         assert(np.allclose(before, methane.xyz_with_ports, atol=1e-16))
 
     def test_spin_0x(self, methane):
-        before = methane.xyz_with_ports
+        before = methane.xyz_with_ports.copy()
         methane.spin(0, np.asarray([1, 0, 0]))
         assert(np.allclose(before, methane.xyz_with_ports, atol=1e-16))
 
     def test_spin_0y(self, methane):
-        before = methane.xyz_with_ports
+        before = methane.xyz_with_ports.copy()
         methane.spin(0, np.asarray([0, 1, 0]))
         assert(np.allclose(before, methane.xyz_with_ports, atol=1e-16))
 
     def test_spin_0z(self, methane):
-        before = methane.xyz_with_ports
+        before = methane.xyz_with_ports.copy()
         methane.spin(0, np.asarray([0, 0, 1]))
         assert(np.allclose(before, methane.xyz_with_ports, atol=1e-16))
 
@@ -258,42 +259,42 @@ class TestCoordinateTransform(BaseTest):
                                      to_positions=ch2['down'])
 
     def test_rotate_around_x(self, methane):
-        before = methane.xyz_with_ports
+        before = methane.xyz_with_ports.copy()
         rotate_around_x(methane, np.pi)
         after = methane.xyz_with_ports
         assert (    np.allclose(before[:, 1], -1*after[:, 1], atol=1e-16)
                 and np.allclose(before[:, 2], -1*after[:, 2], atol=1e-16))
 
     def test_rotate_around_y(self, ch2):
-        before = ch2.xyz_with_ports
+        before = ch2.xyz_with_ports.copy()
         rotate_around_y(ch2, np.pi)
         after = ch2.xyz_with_ports
         assert (    np.allclose(before[:, 0], -1*after[:, 0], atol=1e-16)
                 and np.allclose(before[:, 2], -1*after[:, 2], atol=1e-16))
 
     def test_rotate_around_z(self, ch2):
-        before = ch2.xyz_with_ports
+        before = ch2.xyz_with_ports.copy()
         rotate_around_z(ch2, np.pi)
         after = ch2.xyz_with_ports
         assert (    np.allclose(before[:, 0], -1*after[:, 0], atol=1e-16)
                 and np.allclose(before[:, 1], -1*after[:, 1], atol=1e-16))
 
     def test_rotate_around_x_away_from_origin(self, sixpoints):
-        before = sixpoints.xyz_with_ports
+        before = sixpoints.xyz_with_ports.copy()
         rotate_around_x(sixpoints, np.pi)
         after = sixpoints.xyz_with_ports
         assert (    np.allclose(before[:, 1], -1*after[:, 1], atol=1e-16)
                 and np.allclose(before[:, 2], -1*after[:, 2], atol=1e-16))
 
     def test_rotate_around_y_away_from_origin(self, sixpoints):
-        before = sixpoints.xyz_with_ports
+        before = sixpoints.xyz_with_ports.copy()
         rotate_around_y(sixpoints, np.pi)
         after = sixpoints.xyz_with_ports
         assert (    np.allclose(before[:, 0], -1*after[:, 0], atol=1e-16)
                 and np.allclose(before[:, 2], -1*after[:, 2], atol=1e-16))
 
     def test_rotate_around_z_away_from_origin(self, sixpoints):
-        before = sixpoints.xyz_with_ports
+        before = sixpoints.xyz_with_ports.copy()
         rotate_around_z(sixpoints, np.pi)
         after = sixpoints.xyz_with_ports
         assert (    np.allclose(before[:, 1], -1*after[:, 1], atol=1e-16)
@@ -319,7 +320,7 @@ class TestCoordinateTransform(BaseTest):
         assert (methane_atoms[0].pos == np.array([0, 0, 0])).all()
 
     def test_translate_to(self, methane):
-        before = methane.xyz_with_ports
+        before = methane.xyz_with_ports.copy()
         original_center = methane.center
         translate_value = np.array([2, 3, 4])
         methane.translate_to(translate_value)
@@ -384,3 +385,64 @@ class TestCoordinateTransform(BaseTest):
         assert np.array_equal(rot_by_compound.pos, rot_by_array.pos)
 
 
+
+    def test_transform_many(self, ethane):
+        system = mb.Compound(mb.clone_many(ethane, 10))
+        expected = mb.clone(system)
+        by = np.random.random((10, 3))
+        theta = np.random.random(10) * 2 * np.pi
+        around = np.random.random((10, 3))
+
+        for part, vec, angle, axis in zip(expected.children, by, theta,
+                                          around):
+            part.spin(angle, axis)
+            part.translate(vec)
+        system.transform_many(by=by, theta=theta, around=around)
+        assert np.allclose(system.xyz_with_ports, expected.xyz_with_ports)
+
+        for part, angle, axis in zip(expected.children, theta, around):
+            part.rotate(angle, axis)
+        system.transform_many(theta=theta, around=around, spin=False)
+        assert np.allclose(system.xyz_with_ports, expected.xyz_with_ports)
+
+    def test_transform_many_parts(self, ethane):
+        system = mb.Compound(mb.clone_many(ethane, 3))
+        before = system.xyz.copy()
+        parts = [system.children[0].children[0], system.children[2][0]]
+        system.transform_many(by=[1, 0, 0], parts=parts)
+        moved = np.zeros(len(before), dtype=bool)
+        moved[[0, 1, 2, 3, 16]] = True
+        assert np.allclose(system.xyz[moved], before[moved] + [1, 0, 0])
+        assert np.allclose(system.xyz[~moved], before[~moved])
+
+    def test_transform_many_bad_input(self, ethane):
+        system = mb.Compound(mb.clone_many(ethane, 3))
+        with pytest.raises(ValueError):
+            system.transform_many(theta=np.pi/2, around=[0, 0, 0])
+        with pytest.raises(ValueError):
+            system.transform_many(theta=np.pi/2)
+        with pytest.raises(MBuildError):
+            system.transform_many(by=[1, 0, 0],
+                                  parts=[system.children[0], system[0]])
+        with pytest.raises(MBuildError):
+            system.transform_many(by=[1, 0, 0], parts=[mb.clone(ethane)])
+        first, second = system.children[:2]
+        with pytest.raises(MBuildError):
+            first.transform_many(by=[1, 0, 0], parts=[second])
+        with pytest.raises(MBuildError):
+            first.transform_many(by=[1, 0, 0], parts=[system])
+        first.transform_many(by=[1, 0, 0], parts=[first[0], first[1]])
+
+    def test_transform_many_ports(self, ch2):
+        system = mb.Compound([mb.clone(ch2), mb.Compound()])
+        system.children[1].add(mb.Port(anchor=system.children[1]), 'up')
+        system.children[1]['up'].translate([1, 2, 3])
+        expected = mb.clone(system)
+        # A part holding only a Port turns around the Port's center.
+        for part in (expected.children[0]['up'], expected.children[1]['up']):
+            part.spin(0.5, [0, 0, 1])
+        system.transform_many(theta=[0.5], around=[0, 0, 1],
+                              parts=[system.children[0]['up'],
+                                     system.children[1]])
+        assert np.all(np.isfinite(system.xyz_with_ports))
+        assert np.allclose(system.xyz_with_ports, expected.xyz_with_ports)
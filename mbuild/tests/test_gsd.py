@@ -27,6 +27,33 @@ class TestGSD(BaseTest):
         box = mb.Box(lengths=np.array([2.0, 2.0, 2.0]), angles=[60, 70, 80])
         ethane.save(filename='triclinic-box.gsd', forcefield_name='oplsaa', box=box)
 
+    @pytest.mark.skipif(not has_gsd, reason="GSD package not installed")
+    def test_save_flat_system(self, benzene):
+        import gsd, gsd.pygsd
+        from mbuild.formats.gsdwriter import write_gsd
+
+        benzene.label_rigid_bodies(rigid_particles='C')
+        rigid_bodies = [p.rigid_id for p in benzene.particles()]
+        write_gsd(benzene.to_parmed(), 'structure.gsd',
+                  rigid_bodies=rigid_bodies)
+        write_gsd(benzene.freeze(), 'frozen.gsd')
+
+        frames = []
+        for filename in ['structure.gsd', 'frozen.gsd']:
+            gsd_file = gsd.pygsd.GSDFile(open(filename, 'rb'))
+            frames.append(gsd.hoomd.HOOMDTrajectory(gsd_file).read_frame(0))
+        structure, frozen = frames
+        assert np.allclose(structure.configuration.box,
+                           frozen.configuration.box)
+        for attr in ['types', 'typeid', 'mass', 'charge', 'body',
+                     'position']:
+            assert np.array_equal(getattr(structure.particles, attr),
+                                  getattr(frozen.particles, attr))
+        for attr in ['N', 'types', 'typeid', 'group']:
+            assert np.array_equal(getattr(structure.bonds, attr),
+                                  getattr(frozen.bonds, attr))
+        assert frozen.pairs.N == structure.pairs.N == 0
+
     @pytest.mark.skipif(not has_foyer, reason="Foyer package not installed")
     @pytest.mark.skipif(not has_gsd, reason="GSD package not installed")
     def test_particles(self, ethane):
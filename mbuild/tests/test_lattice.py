@@ -218,6 +218,15 @@ class TestLattice(BaseTest):
         np.testing.assert_allclose(compound_test.periodicity,
                                    np.asarray([x*y for x,y in zip(replication, lattice.lattice_spacing)]))
 
+    def test_populate_snaps_near_zero(self):
+        lattice = mb.Lattice(lattice_spacing=[0.3, 0.3, 0.3],
+                             lattice_vectors=[[1, 0, 0], [0, 1, 0],
+                                              [-1e-14, 1e-14, 1]],
+                             lattice_points={'A': [[0, 0, 0]]})
+        compound = lattice.populate(x=1, y=1, z=2)
+        # Rounding noise of either sign is set to exactly zero.
+        assert compound.xyz.tolist() == [[0, 0, 0], [0, 0, 0.3]]
+
     def test_get_box(self):
         lattice = mb.Lattice(lattice_spacing=[1, 1, 1], angles=[90, 90, 90],
                              lattice_points={'A' : [[0, 0, 0]]})
@@ -0,0 +1,123 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import mbuild as mb
+from mbuild.periodic_kdtree import PeriodicCKDTree
+from mbuild.tests.base_test import BaseTest
+
+
+def _min_image_distances(x, data, bounds):
+    d = x[:, None, :] - data[None, :, :]
+    lengths = np.where(bounds > 0, bounds, np.inf)
+    d -= np.where(bounds > 0, np.round(d / lengths) * bounds, 0)
+    return np.sqrt((d ** 2).sum(axis=-1))
+
+
+def _triclinic_distances(x, data, vectors):
+    d = x[:, None, :] - data[None, :, :]
+    fractional = d @ np.linalg.inv(vectors)
+    d = (fractional - np.round(fractional)) @ vectors
+    distances = np.full(d.shape[:2], np.inf)
+    for shift in itertools.product(range(-2, 3), repeat=3):
+        distances = np.minimum(distances, np.linalg.norm(
+            d + np.array(shift) @ vectors, axis=-1))
+    return distances
+
+
+class TestPeriodicCKDTree(BaseTest):
+
+    @staticmethod
+    def _points(n=200, seed=12):
+        rng = np.random.RandomState(seed)
+        bounds = np.array([2.0, 3.0, 0.0])
+        # Spread points beyond the box to exercise wrapping.
+        data = rng.uniform(-2, 5, size=(n, 3))
+        return data, bounds
+
+    def test_wrap(self):
+        data, bounds = self._points()
+        tree = PeriodicCKDTree(data, bounds=bounds)
+        assert tree.real_data is data
+        assert np.all(tree.data[:, :2] >= 0)
+        assert np.all(tree.data[:, :2] < bounds[:2])
+        assert np.array_equal(tree.data[:, 2], data[:, 2])
+
+        tree = PeriodicCKDTree([[-1e-17, 0, 0]], bounds=[1, 1, 1])
+        assert np.array_equal(tree.data, [[0, 0, 0]])
+
+    def test_query(self):
+        data, bounds = self._points()
+        tree = PeriodicCKDTree(data, bounds=bounds)
+        x = data[:20] + [4, -6, 0]
+        d, idx = tree.query(x, k=5)
+        expected = np.sort(_min_image_distances(x, data, bounds), axis=1)
+        assert d.shape == idx.shape == (20, 5)
+        assert np.allclose(d, expected[:, :5])
+
+        d, idx = tree.query(x[0], k=1, distance_upper_bound=1e-9)
+        assert np.isclose(d, 0) and idx == 0
+
+    def test_query_ball_point(self):
+        data, bounds = self._points()
+        tree = PeriodicCKDTree(data, bounds=bounds)
+        distances = _min_image_distances(data[:20], data, bounds)
+        neighbors = tree.query_ball_point(data[:20], 0.8)
+        for row, found in zip(distances, neighbors):
+            assert sorted(found) == np.flatnonzero(row <= 0.8).tolist()
+        assert sorted(tree.query_ball_point(data[0], 0.8)) == sorted(
+            neighbors[0])
+
+    def test_query_pairs(self):
+        data, bounds = self._points()
+        tree = PeriodicCKDTree(data, bounds=bounds)
+        distances = _min_image_distances(data, data, bounds)
+        expected = np.argwhere(np.triu(distances <= 0.5, k=1))
+        pairs = tree.query_pairs(0.5, output_type='ndarray')
+        assert np.array_equal(pairs[np.lexsort(pairs.T[::-1])], expected)
+
+    def test_non_periodic(self):
+        data, _ = self._points()
+        tree = PeriodicCKDTree(data)
+        assert tree.boxsize is None
+        assert np.array_equal(tree.data, data)
+
+    def test_triclinic(self):
+        rng = np.random.RandomState(3)
+        bounds = [2.0, 2.5, 3.0]
+        angles = [80, 100, 120]
+        vectors = mb.Box(lengths=bounds, angles=angles).vectors
+        data = rng.uniform(-3, 5, size=(300, 3))
+        tree = PeriodicCKDTree(data, bounds=bounds, angles=angles)
+        assert np.allclose(tree.vectors, vectors)
+        fractional = tree.data @ np.linalg.inv(vectors)
+        assert np.all((fractional >= 0) & (fractional < 1))
+
+        distances = _triclinic_distances(data, data, vectors)
+        d, idx = tree.query(data[:30], k=6)
+        assert np.allclose(d, np.sort(distances[:30], axis=1)[:, :6])
+        assert np.allclose(np.take_along_axis(distances[:30], idx, axis=1), d)
+        d, idx = tree.query(data[:30], k=6, distance_upper_bound=0.5)
+        expected = np.sort(distances[:30], axis=1)[:, :6]
+        assert np.allclose(d[expected <= 0.5], expected[expected <= 0.5])
+        assert np.all(idx[expected > 0.5] == tree.n)
+        d, idx = tree.query(data[5])
+        assert np.isclose(d, 0) and idx == 5
+
+        neighbors = tree.query_ball_point(data[:30], 0.7)
+        for row, found in zip(distances, neighbors):
+            assert found == np.flatnonzero(row <= 0.7).tolist()
+
+        expected = np.argwhere(np.triu(distances <= 0.6, k=1))
+        assert np.array_equal(tree.query_pairs(0.6, output_type='ndarray'),
+                              expected)
+        assert tree.query_pairs(0.6) == set(map(tuple, expected.tolist()))
+
+    def test_triclinic_not_periodic(self):
+        data, bounds = self._points()
+        with pytest.raises(ValueError):
+            PeriodicCKDTree(data, bounds=bounds, angles=[90, 90, 120])
+        tree = PeriodicCKDTree(data, bounds=[1, 1, 1], angles=[90, 90, 120])
+        with pytest.raises(NotImplementedError):
+            tree.count_neighbors(tree, 0.1)
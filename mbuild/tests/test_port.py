@@ -81,3 +81,46 @@ class TestPattern(BaseTest):
                                port2['down'].xyz_with_ports)
             assert np.allclose(port1['down'].xyz_with_ports,
                                port2['up'].xyz_with_ports)
+
+    def test_compact_port(self, ethane):
+        np.random.seed(12)
+        for orientation in [[0, 1, 0], [0, -1, 0], [1, 1, 1]]:
+            full = mb.Port(anchor=ethane, orientation=orientation,
+                           separation=0.1)
+            compact = mb.Port(anchor=ethane, orientation=orientation,
+                              separation=0.1, compact=True)
+            assert compact.compact
+            assert len(compact.xyz_with_ports) == 3
+            for port in (full, compact):
+                port.spin(1.3, [1, 2, 3])
+                port.translate([0.5, -0.2, 0.1])
+                port.rotate(0.7, [0, 0, 1])
+            assert np.allclose(full.center, compact.center)
+            assert np.allclose(full.direction, compact.direction)
+
+            assert np.allclose(full['up'].xyz_with_ports,
+                               compact['up'].xyz_with_ports)
+            assert not compact.compact
+            assert np.allclose(full.xyz_with_ports, compact.xyz_with_ports)
+            assert list(compact.labels) == ['up', 'down']
+            assert compact['down']['top'].parent is compact['down']
+
+    def test_compact_port_clone(self, ch2):
+        port = mb.Port(anchor=ch2[0], compact=True)
+        ch2.add(port, 'compact')
+        copy = mb.clone(ch2)
+        assert copy['compact'].compact
+        assert copy['compact'].anchor is copy[0]
+        copy.save('compact_ports.mol2', show_ports=True, overwrite=True)
+        assert not copy['compact'].compact
+        assert port.compact
+
+    def test_compact_port_force_overlap(self, ch2):
+        ch2_copy = mb.clone(ch2)
+        port = mb.Port(anchor=ch2_copy[0], orientation=[0, 1, 0],
+                       separation=0.07, compact=True)
+        ch2_copy.add(port, 'compact')
+        target = port.center
+        mb.force_overlap(ch2, ch2['up'], port, add_bond=False)
+        assert np.allclose(ch2['up'].center, target)
+        assert not port.compact
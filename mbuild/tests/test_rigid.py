@@ -440,6 +440,18 @@ class TestRigid(BaseTest):
         assert filled.max_rigid_id == n_benzenes - 3
         assert len(list(filled.rigid_particles())) == (n_benzenes - 2) * rigid_benzene.n_particles
 
+    def test_delete_body_non_contiguous(self, rigid_benzene):
+        n_benzenes = 10
+        filled = mb.fill_box(rigid_benzene,
+                             n_compounds=n_benzenes,
+                             box=[0, 0, 0, 4, 4, 4])
+        kept = [child for i, child in enumerate(filled.children) if i % 3]
+        filled.remove([child for i, child in enumerate(filled.children)
+                       if not i % 3])
+
+        assert filled.max_rigid_id == len(kept) - 1
+        assert [child.max_rigid_id for child in kept] == list(range(len(kept)))
+
     def test_delete_body_all(self, rigid_benzene):
         n_benzenes = 10
         filled = mb.fill_box(rigid_benzene,
@@ -577,3 +589,71 @@ class TestRigid(BaseTest):
         assert compound.rigid_id is None
         assert compound.max_rigid_id is 0
         assert len(list(compound.rigid_particles())) == 2
+
+    def test_add_rigid_bodies_no_traversal(self, rigid_benzene, monkeypatch):
+        bodies = mb.clone_many(rigid_benzene, 200)
+        compound = mb.Compound()
+
+        # Adding a rigid body must not walk the Particles of the Compound it
+        # is added to, and the aggregates touched per body must not grow
+        # with the number of bodies already added.
+        traversed = []
+        contributions = [0]
+        particles = mb.Compound.particles
+        contribution = mb.Compound._contribution
+        def counting_particles(self, *args, **kwargs):
+            traversed.append(self)
+            return particles(self, *args, **kwargs)
+        def counting_contribution(self):
+            contributions[0] += 1
+            return contribution(self)
+        monkeypatch.setattr(mb.Compound, 'particles', counting_particles)
+        monkeypatch.setattr(mb.Compound, '_contribution',
+                            counting_contribution)
+        per_body = []
+        for body in bodies:
+            contributions[0] = 0
+            compound.add(body)
+            per_body.append(contributions[0])
+        assert compound not in traversed
+        assert max(per_body[1:]) == per_body[1]
+        monkeypatch.undo()
+
+        assert compound.max_rigid_id == 199
+        assert compound.n_particles == 12 * 200
+        assert sorted(set(p.rigid_id for p in compound.particles())) == list(
+            range(200))
+
+    def test_rigid_aggregates_after_remove(self, rigid_benzene):
+        compound = mb.Compound(subcompounds=mb.clone_many(rigid_benzene, 3))
+        assert compound.max_rigid_id == 2
+
+        compound.remove(compound.children[2][0])
+        assert compound.max_rigid_id == 2
+        assert compound.n_particles == 35
+
+        compound.remove(compound.children[2])
+        assert compound.max_rigid_id == 1
+        assert compound.n_particles == 24
+
+        compound.unlabel_rigid_bodies()
+        assert compound.contains_rigid is False
+        assert compound.max_rigid_id is None
+
+    def test_remove_several_bodies(self, rigid_benzene):
+        compound = mb.Compound(subcompounds=mb.clone_many(rigid_benzene, 6))
+        assert list(compound.rigid_particles(rigid_id=5))[0] in \
+            compound.children[5].particles()
+
+        kept = compound.children[4]
+        compound.remove([compound.children[i] for i in (0, 2, 3)])
+        assert compound.max_rigid_id == 2
+        assert sorted(set(p.rigid_id for p in compound.particles())) == \
+            [0, 1, 2]
+        assert set(kept.particles()) == set(compound.rigid_particles(1))
+        assert set(kept.rigid_particles(1)) == set(kept.particles())
+        assert len(list(kept.rigid_particles(0))) == 0
+
+        kept[0].rigid_id = 7
+        assert len(list(compound.rigid_particles(7))) == 1
+        assert len(list(compound.rigid_particles(1))) == 11
@@ -135,6 +135,16 @@ class TestUtils(BaseTest):
         assert (new_xyz[0,:] == np.array([-1,-1,1])).all()
         assert (new_xyz[1,:] == xyz[1,:]).all()
 
+    def test_coord_wrap_triclinic(self):
+        box = mb.Box(mins=[-1, -1, -1], maxs=[1, 1, 1], angles=[90, 90, 120])
+        vectors = box.vectors
+        fractional = np.array([[0.25, 0.5, 0.75], [1.25, -0.5, 2.75]])
+        xyz = fractional @ vectors + box.mins
+
+        new_xyz = wrap_coords(xyz, box)
+        assert np.allclose(new_xyz[0], xyz[0])
+        assert np.allclose(new_xyz[1], [0.25, 0.5, 0.75] @ vectors + box.mins)
+
     def test_has_ipython(self):
         __IPYTHON__ = None
         assert run_from_ipython() is False
@@ -38,3 +38,9 @@ class TestXYZ(BaseTest):
         ethane.save(filename='ethane.xyz')
         ethane_in = mb.load('ethane.xyz')
         assert np.allclose(ethane.xyz, ethane_in.xyz)
+
+    def test_write_flat_system(self, ethane):
+        write_xyz(ethane.freeze(), 'frozen.xyz')
+        write_xyz(ethane.to_parmed(), 'structure.xyz')
+        with open('frozen.xyz') as frozen, open('structure.xyz') as structure:
+            assert frozen.readlines()[2:] == structure.readlines()[2:]
@@ -74,13 +74,19 @@ def wrap_coords(xyz, box):
 
     Notes
     -----
-    Currently only supports orthorhombic boxes
+    If a mb.Box with angles other than 90 degrees is passed, the coordinates
+    are wrapped along the box vectors (see `mb.Box.vectors`), starting from
+    `box.mins`.
     """
     if not isinstance(box, mb.Box):
         box_arr = np.asarray(box)
         assert box_arr.shape == (3,)
 
         wrap_xyz = xyz - 1*np.floor_divide(xyz, box_arr) * box_arr
+    elif not np.allclose(box.angles, 90.0):
+        vectors = box.vectors
+        fractional = (xyz - box.mins) @ np.linalg.inv(vectors)
+        wrap_xyz = (fractional - np.floor(fractional)) @ vectors + box.mins
     else:
         xyz = xyz - box.mins  
         wrap_xyz = (xyz 